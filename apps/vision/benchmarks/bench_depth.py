@@ -0,0 +1,62 @@
+"""
+Benchmark the /vision/depth generator: per-row Python loop vs. broadcast.
+
+Run from apps/vision:
+    python benchmarks/bench_depth.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from main import _depth_map  # noqa: E402
+
+SIZES = {
+    "1MP": (1152, 864),
+    "4MP": (2304, 1728),
+    "12MP": (4032, 3024),
+    "24MP": (6000, 4000),
+}
+REPEATS = 5
+
+
+def legacy_depth_map(w: int, h: int) -> np.ndarray:
+    """The original row-at-a-time implementation."""
+    arr = np.zeros((h, w), dtype=np.uint8)
+    for y in range(h):
+        val = int((y / h) * 200 + 55)
+        arr[y, :] = val
+    return arr
+
+
+def best_of(fn, *args) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - t0)
+    return min(timings) * 1000
+
+
+def main() -> None:
+    print(f"{'size':>6} {'variant':>18} {'ms':>9} {'ms/MP':>8}")
+    for name, (w, h) in SIZES.items():
+        mp = w * h / 1e6
+        assert np.array_equal(legacy_depth_map(w, h), _depth_map(w, h))
+        variants = {
+            "legacy loop": lambda: legacy_depth_map(w, h),
+            "gradient uint8": lambda: _depth_map(w, h),
+            "plane uint16": lambda: _depth_map(w, h, "plane", 0.45, "uint16"),
+            "plane float16": lambda: _depth_map(w, h, "plane", 0.45, "float16"),
+        }
+        for label, fn in variants.items():
+            ms = best_of(fn)
+            print(f"{name:>6} {label:>18} {ms:9.2f} {ms / mp:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Measure response size and server CPU per response mode and encoder setting.
+
+Builds each endpoint payload from a synthetic photo and renders it as
+base64 JSON, raw image bytes and a multipart bundle. CPU time covers
+payload construction plus encoding, measured with process_time.
+
+Run from apps/vision:
+    python benchmarks/bench_response_modes.py
+"""
+
+import io
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from main import _depth_payload, _matte_payload, _segment_payload  # noqa: E402
+from payloads import EncodeOptions, NotAcceptable, render  # noqa: E402
+
+WIDTH, HEIGHT = 2304, 1728  # 4MP
+REPEATS = 3
+
+ENDPOINTS = {
+    "segment masks": lambda data: _segment_payload(data, "masks"),
+    "segment crops": lambda data: _segment_payload(data, "crops"),
+    "segment labelmap": lambda data: _segment_payload(data, "labelmap"),
+    "depth uint8": lambda data: _depth_payload(data, "plane", 0.45, "uint8"),
+    "depth float16": lambda data: _depth_payload(data, "plane", 0.45, "float16"),
+    "matte": lambda data: _matte_payload(data, "faucets"),
+}
+VARIANTS = [
+    ("json", EncodeOptions("png", 6)),
+    ("raw", EncodeOptions("png", 6)),
+    ("raw", EncodeOptions("png", 1)),
+    ("raw", EncodeOptions("webp", 4)),
+    ("multipart", EncodeOptions("png", 6)),
+    ("multipart", EncodeOptions("png", 1)),
+    ("multipart", EncodeOptions("webp", 4)),
+]
+
+
+def synthetic_photo() -> bytes:
+    rng = np.random.default_rng(0)
+    y = np.linspace(0, 255, HEIGHT, dtype=np.float32)[:, None, None]
+    arr = np.clip(y + rng.normal(0, 12, (HEIGHT, WIDTH, 3)), 0, 255).astype(np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(arr).save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+
+def main() -> None:
+    data = synthetic_photo()
+    print(f"{'endpoint':>17} {'mode':>9} {'encoder':>7} {'bytes':>10} {'cpu ms':>8}")
+    for name, build in ENDPOINTS.items():
+        for mode, options in VARIANTS:
+            cpu = []
+            try:
+                for _ in range(REPEATS):
+                    t0 = time.process_time()
+                    _, body, _ = render(build(data), mode, options)
+                    cpu.append(time.process_time() - t0)
+            except NotAcceptable:
+                continue
+            print(
+                f"{name:>17} {mode:>9} {options.key():>7} "
+                f"{len(body):>10} {min(cpu) * 1000:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -14,18 +14,34 @@ swap in real ML models (SAM, MiDaS, etc.) for production quality.
 
 from __future__ import annotations
 
-import base64
-import io
-import math
+import json
+import os
+import sys
 import uuid
-from typing import Optional
+from pathlib import Path
+from typing import Callable, Optional
 
 import numpy as np
-from fastapi import FastAPI, UploadFile, File, Form
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
 from PIL import Image, ImageDraw, ImageFilter
 
+# Shared pipeline utilities live in the LuxePlan backend package.
+BACKEND_DIR = os.getenv(
+    "LUXEPLAN_BACKEND_DIR",
+    str(Path(__file__).resolve().parents[2] / "luxeplan" / "backend"),
+)
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+
+from app.services.analysis_cache import analysis_cache, content_hash  # noqa: E402
+from app.services.executors import cpu_pools  # noqa: E402
+from app.services.image_context import ImageContext  # noqa: E402
+from app.services.mask_rle import counts_to_string, label_map_counts  # noqa: E402
+
+from payloads import EncodeOptions, NotAcceptable, Part, Payload, negotiate, render  # noqa: E402
+
 app = FastAPI(title="LuxePlan Vision", version="0.1.0")
 
 app.add_middleware(
@@ -40,14 +56,65 @@ app.add_middleware(
 # Helpers
 # ---------------------------------------------------------------------------
 
-def _decode_image(data: bytes) -> Image.Image:
-    return Image.open(io.BytesIO(data)).convert("RGBA")
+# Bump when an endpoint's heuristic or model changes; keys cached responses.
+MODEL_VERSIONS: dict[str, str] = {
+    "segment": "rect-v1",
+    "anchors": "fixed-v1",
+    "depth": "heuristic-v2",
+    "matte": "ellipse-v1",
+}
+
+
+def _negotiate(request: Request) -> tuple[str, EncodeOptions]:
+    try:
+        return negotiate(request.headers.get("accept", ""), dict(request.query_params))
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+
+def _respond(media_type: str, body: bytes, headers: dict) -> Response:
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def _render(payload: Payload, mode: str, options: EncodeOptions) -> tuple[str, bytes, dict]:
+    try:
+        return render(payload, mode, options)
+    except NotAcceptable as exc:
+        raise HTTPException(status_code=406, detail=str(exc))
+
+
+async def _cached_response(
+    request: Request,
+    data: bytes,
+    endpoint: str,
+    params: str,
+    compute: Callable[[], Payload],
+    version: Optional[str] = None,
+) -> Response:
+    """
+    Serve a rendered response from the shared content-addressed analysis
+    cache. Hits never decode the image; misses run `compute` (decode,
+    rasterize) and the encoder on the CPU thread pool and store the result.
+    The cache key covers the response mode and encoder options.
+    """
+    mode, options = _negotiate(request)
+    image_hash = content_hash(data)
+    kind = f"vision.{endpoint}:{params}|{mode},{options.key()}"
+    version = version or MODEL_VERSIONS[endpoint]
+
+    cached = analysis_cache.get(image_hash, kind, version)
+    if cached is not None:
+        header, body = cached.split(b"\n\n", 1)
+        media_type, headers = json.loads(header)
+        return _respond(media_type, body, headers)
 
+    def compute_and_store() -> tuple[str, bytes, dict]:
+        media_type, body, headers = _render(compute(), mode, options)
+        header = json.dumps([media_type, headers]).encode()
+        analysis_cache.put(image_hash, kind, version, header + b"\n\n" + body)
+        return media_type, body, headers
 
-def _image_to_b64(img: Image.Image, fmt: str = "PNG") -> str:
-    buf = io.BytesIO()
-    img.save(buf, format=fmt)
-    return base64.b64encode(buf.getvalue()).decode()
+    return _respond(*await cpu_pools.run_in_thread(compute_and_store))
 
 
 # Proportional regions matching the front-end getSurfaceRegion
@@ -73,44 +140,144 @@ FIXTURE_ANCHORS: dict[str, dict] = {
 # POST /vision/segment
 # ---------------------------------------------------------------------------
 
-@app.post("/vision/segment")
-async def segment(image: UploadFile = File(...)):
+SEGMENT_MODES = ("masks", "labelmap", "crops", "rle")
+SEGMENT_FEATHER_RADIUS = 3
+# Gaussian support is ~3 sigma; crops are padded so the feather is not clipped.
+SEGMENT_CROP_PAD = SEGMENT_FEATHER_RADIUS * 3
+
+
+def _region_boxes(w: int, h: int) -> list[tuple[str, int, int, int, int]]:
+    """Pixel boxes (label, x0, y0, x1, y1) for SURFACE_REGIONS; x1/y1 are inclusive."""
+    boxes = []
+    for label, (y0p, y1p, x0p, x1p) in SURFACE_REGIONS.items():
+        boxes.append((label, int(x0p * w), int(y0p * h), int(x1p * w), int(y1p * h)))
+    return boxes
+
+
+def _rasterize_label_map(w: int, h: int, boxes: list[tuple[str, int, int, int, int]]) -> np.ndarray:
     """
-    Return segmentation masks for known surface regions.
+    Paint every region into one uint8 label image (0 = unlabeled, ids from 1).
 
-    TODO: Replace proportional-rectangle heuristic with a real
-    segmentation model (e.g. Meta SAM-2, SegGPT, or OneFormer).
-    The response format stays the same.
+    Regions are painted in SURFACE_REGIONS order, so later regions win where
+    they overlap. Cost is proportional to the painted area.
     """
-    data = await image.read()
-    img = _decode_image(data)
-    w, h = img.size
+    label_map = np.zeros((h, w), dtype=np.uint8)
+    for label_id, (_, x0, y0, x1, y1) in enumerate(boxes, start=1):
+        label_map[y0:y1 + 1, x0:x1 + 1] = label_id
+    return label_map
 
-    masks: list[dict] = []
-    for label, (y0p, y1p, x0p, x1p) in SURFACE_REGIONS.items():
-        x0, y0 = int(x0p * w), int(y0p * h)
-        x1, y1 = int(x1p * w), int(y1p * h)
 
+def _feathered_crop(label_map: np.ndarray, label_id: int, bounds: tuple[int, int, int, int]) -> tuple[Image.Image, dict]:
+    """
+    Cut one label out of the label map, padded by the feather support, and
+    blur only that crop. Returns the crop and its placement in the frame.
+    """
+    h, w = label_map.shape
+    x0, y0, x1, y1 = bounds
+    cx0, cy0 = max(0, x0 - SEGMENT_CROP_PAD), max(0, y0 - SEGMENT_CROP_PAD)
+    cx1, cy1 = min(w, x1 + 1 + SEGMENT_CROP_PAD), min(h, y1 + 1 + SEGMENT_CROP_PAD)
+
+    crop = (label_map[cy0:cy1, cx0:cx1] == label_id).astype(np.uint8) * 255
+    crop_img = Image.fromarray(crop, "L").filter(
+        ImageFilter.GaussianBlur(radius=SEGMENT_FEATHER_RADIUS)
+    )
+    return crop_img, {"x": cx0, "y": cy0, "width": cx1 - cx0, "height": cy1 - cy0}
+
+
+def _full_frame_masks(w: int, h: int, boxes: list[tuple[str, int, int, int, int]]) -> Payload:
+    masks: list[dict] = []
+    parts: list[Part] = []
+    for label, x0, y0, x1, y1 in boxes:
         # Create a binary mask image (white = region)
         mask_img = Image.new("L", (w, h), 0)
         draw = ImageDraw.Draw(mask_img)
         draw.rectangle([x0, y0, x1, y1], fill=255)
 
         # Feather edges slightly for blending
-        mask_img = mask_img.filter(ImageFilter.GaussianBlur(radius=3))
+        mask_img = mask_img.filter(ImageFilter.GaussianBlur(radius=SEGMENT_FEATHER_RADIUS))
 
         polygon = [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
         area = (x1 - x0) * (y1 - y0)
 
-        masks.append({
+        entry = {
             "label": label,
-            "mask_b64": _image_to_b64(mask_img),
             "polygon": polygon,
             "area": area,
             "bounds": {"x": x0, "y": y0, "width": x1 - x0, "height": y1 - y0},
-        })
+        }
+        masks.append(entry)
+        parts.append(Part(f"mask.{label}", entry, "mask_b64", image=mask_img))
+    return Payload({"width": w, "height": h, "masks": masks}, parts)
+
+
+def _check_segment_mode(mode: str) -> None:
+    if mode not in SEGMENT_MODES:
+        raise HTTPException(status_code=422, detail=f"Unknown segment mode: {mode}")
+
+
+@app.post("/vision/segment")
+async def segment(request: Request, image: UploadFile = File(...), mode: str = Form("masks")):
+    """
+    Return segmentation masks for known surface regions.
+
+    `mode` selects the mask payload:
+    - "masks": one full-frame feathered PNG per label (legacy).
+    - "labelmap": a single packed uint8 label PNG; pixel value is the
+      label `id` listed in `masks`, 0 is unlabeled. Unfeathered.
+    - "crops": one feathered PNG per label covering only its bounding box
+      (padded for the feather), positioned by `crop`.
+    - "rle": no images; each mask carries a COCO-style `rle`
+      ({size: [h, w], counts}) that app/services/mask_rle.py can decode,
+      measure and combine. Unfeathered.
+
+    "labelmap", "crops" and "rle" rasterize every region into one label
+    image in a single pass, so cost and payload scale with region area
+    rather than frame area times label count.
+
+    TODO: Replace proportional-rectangle heuristic with a real
+    segmentation model (e.g. Meta SAM-2, SegGPT, or OneFormer).
+    The response format stays the same.
+    """
+    _check_segment_mode(mode)
+    data = await image.read()
+    return await _cached_response(
+        request, data, "segment", f"mode={mode}", lambda: _segment_payload(ImageContext(data), mode)
+    )
+
 
-    return {"width": w, "height": h, "masks": masks}
+def _segment_payload(ctx: ImageContext, mode: str) -> Payload:
+    w, h = ctx.size
+    boxes = _region_boxes(w, h)
+
+    if mode == "masks":
+        return _full_frame_masks(w, h, boxes)
+
+    label_map = _rasterize_label_map(w, h, boxes)
+    pixel_counts = np.bincount(label_map.ravel(), minlength=len(boxes) + 1)
+    rle = label_map_counts(label_map, len(boxes) + 1) if mode == "rle" else {}
+
+    masks: list[dict] = []
+    parts: list[Part] = []
+    for label_id, (label, x0, y0, x1, y1) in enumerate(boxes, start=1):
+        entry = {
+            "id": label_id,
+            "label": label,
+            "polygon": [[x0, y0], [x1, y0], [x1, y1], [x0, y1]],
+            "area": int(pixel_counts[label_id]),
+            "bounds": {"x": x0, "y": y0, "width": x1 - x0, "height": y1 - y0},
+        }
+        if mode == "crops":
+            crop_img, crop = _feathered_crop(label_map, label_id, (x0, y0, x1, y1))
+            entry["crop"] = crop
+            parts.append(Part(f"mask.{label}", entry, "mask_b64", image=crop_img))
+        elif mode == "rle" and label_id in rle:
+            entry["rle"] = {"size": [h, w], "counts": counts_to_string(rle[label_id])}
+        masks.append(entry)
+
+    meta = {"width": w, "height": h, "mode": mode, "masks": masks}
+    if mode == "labelmap":
+        parts.append(Part("label_map", meta, "label_map_b64", image=Image.fromarray(label_map, "L")))
+    return Payload(meta, parts)
 
 
 # ---------------------------------------------------------------------------
@@ -118,7 +285,7 @@ async def segment(image: UploadFile = File(...)):
 # ---------------------------------------------------------------------------
 
 @app.post("/vision/anchors")
-async def anchors(image: UploadFile = File(...)):
+async def anchors(request: Request, image: UploadFile = File(...)):
     """
     Return anchor points for fixture placement.
 
@@ -127,8 +294,13 @@ async def anchors(image: UploadFile = File(...)):
     existing fixture locations.
     """
     data = await image.read()
-    img = _decode_image(data)
-    w, h = img.size
+    return await _cached_response(
+        request, data, "anchors", "", lambda: _anchors_payload(ImageContext(data))
+    )
+
+
+def _anchors_payload(ctx: ImageContext) -> Payload:
+    w, h = ctx.size
 
     points: list[dict] = []
     for label, info in FIXTURE_ANCHORS.items():
@@ -143,36 +315,124 @@ async def anchors(image: UploadFile = File(...)):
             "plane": info["plane"],
         })
 
-    return {"width": w, "height": h, "anchors": points}
+    return Payload({"width": w, "height": h, "anchors": points})
 
 
 # ---------------------------------------------------------------------------
 # POST /vision/depth
 # ---------------------------------------------------------------------------
 
+DEPTH_MODELS = ("gradient", "plane")
+DEPTH_DTYPES = ("uint8", "uint16", "float16")
+
+# Ground-plane model geometry (metres): camera height above the floor,
+# floor-to-ceiling height, and the back-wall distance that caps depth.
+CAMERA_HEIGHT_M = 1.5
+CEILING_HEIGHT_M = 2.7
+BACK_WALL_M = 4.5
+
+
+def _depth_closeness(h: int, model: str = "gradient", horizon: float = 0.45) -> np.ndarray:
+    """
+    Per-row closeness in [0, 1] (0 = far, 1 = near), shape (h,).
+
+    Both heuristics only vary with the row, so the full map is a broadcast
+    of this column across the image width.
+
+    - gradient: linear ramp, top far / bottom near.
+    - plane: floor and ceiling planes meeting at a horizon row. With the
+      focal length taken as the image height, inverse depth of a horizontal
+      plane grows linearly with the row's distance from the horizon; the
+      back wall caps the maximum depth.
+    """
+    rows = np.arange(h, dtype=np.float64)
+    if model == "gradient":
+        return rows / h
+
+    y_h = horizon * h
+    offset = (rows - y_h) / h
+    inv_depth = np.where(
+        offset >= 0,
+        offset / CAMERA_HEIGHT_M,
+        -offset / (CEILING_HEIGHT_M - CAMERA_HEIGHT_M),
+    )
+    inv_depth = np.maximum(inv_depth, 1.0 / BACK_WALL_M)
+    return inv_depth / inv_depth.max()
+
+
+def _depth_map(
+    w: int, h: int, model: str = "gradient", horizon: float = 0.45, dtype: str = "uint8"
+) -> np.ndarray:
+    """
+    Build an (h, w) depth map in a single broadcast.
+
+    uint8 keeps the legacy 55..255 display range (brighter = closer);
+    uint16 spans the full 0..65535 range; float16 is raw closeness in [0, 1].
+    """
+    closeness = _depth_closeness(h, model, horizon)
+    if dtype == "uint8":
+        column = (closeness * 200 + 55).astype(np.uint8)
+    elif dtype == "uint16":
+        column = (closeness * 65535).astype(np.uint16)
+    else:
+        column = closeness.astype(np.float16)
+    return np.ascontiguousarray(np.broadcast_to(column[:, np.newaxis], (h, w)))
+
+
+def _check_depth_params(model: str, dtype: str) -> None:
+    if model not in DEPTH_MODELS:
+        raise HTTPException(status_code=422, detail=f"Unknown depth model: {model}")
+    if dtype not in DEPTH_DTYPES:
+        raise HTTPException(status_code=422, detail=f"Unsupported depth dtype: {dtype}")
+
+
 @app.post("/vision/depth")
-async def depth(image: UploadFile = File(...)):
+async def depth(
+    request: Request,
+    image: UploadFile = File(...),
+    model: str = Form("gradient"),
+    horizon: float = Form(0.45),
+    dtype: str = Form("uint8"),
+):
     """
-    Return a grayscale depth map (brighter = closer).
+    Return a depth map (brighter = closer).
+
+    `model` selects the CPU fallback: "gradient" (vertical ramp) or "plane"
+    (floor/ceiling planes meeting at `horizon`, a fraction of image height).
+    `dtype` selects "uint8" or "uint16" grayscale images, or "float16" raw
+    little-endian closeness values (`encoding` is "image" or "raw").
 
-    TODO: Replace gradient heuristic with MiDaS or Depth Anything V2.
+    TODO: Replace heuristics with MiDaS or Depth Anything V2.
     """
+    _check_depth_params(model, dtype)
+    horizon = min(max(horizon, 0.0), 1.0)
     data = await image.read()
-    img = _decode_image(data)
-    w, h = img.size
+    return await _cached_response(
+        request,
+        data,
+        "depth",
+        f"model={model},horizon={horizon:.4f},dtype={dtype}",
+        lambda: _depth_payload(ImageContext(data), model, horizon, dtype),
+    )
+
+
+def _depth_payload(ctx: ImageContext, model: str, horizon: float, dtype: str) -> Payload:
+    w, h = ctx.size
 
-    # Simple vertical gradient: top is far (dark), bottom is near (bright)
-    arr = np.zeros((h, w), dtype=np.uint8)
-    for y in range(h):
-        val = int((y / h) * 200 + 55)  # 55..255
-        arr[y, :] = val
+    arr = _depth_map(w, h, model, horizon, dtype)
 
-    depth_img = Image.fromarray(arr, "L")
-    return {
+    meta = {
         "width": w,
         "height": h,
-        "depth_b64": _image_to_b64(depth_img),
+        "model": model,
+        "dtype": dtype,
+        "encoding": "raw" if dtype == "float16" else "image",
     }
+    if dtype == "float16":
+        part = Part("depth", meta, "depth_b64", raw=arr.astype("<f2").tobytes())
+    else:
+        part = Part("depth", meta, "depth_b64", image=Image.fromarray(arr))
+    return Payload(meta, [part])
 
 
 # ---------------------------------------------------------------------------
@@ -180,15 +440,20 @@ async def depth(image: UploadFile = File(...)):
 # ---------------------------------------------------------------------------
 
 @app.post("/vision/matte")
-async def matte(image: UploadFile = File(...), label: str = Form("faucets")):
+async def matte(request: Request, image: UploadFile = File(...), label: str = Form("faucets")):
     """
     Return an alpha matte for a detected fixture (for removal / inpainting).
 
     TODO: Replace with a real matting model (ViTMatte, MODNet).
     """
     data = await image.read()
-    img = _decode_image(data)
-    w, h = img.size
+    return await _cached_response(
+        request, data, "matte", f"label={label}", lambda: _matte_payload(ImageContext(data), label)
+    )
+
+
+def _matte_payload(ctx: ImageContext, label: str) -> Payload:
+    w, h = ctx.size
 
     anchor = FIXTURE_ANCHORS.get(label, FIXTURE_ANCHORS["faucets"])
     cx, cy = int(anchor["x"] * w), int(anchor["y"] * h)
@@ -199,19 +464,64 @@ async def matte(image: UploadFile = File(...), label: str = Form("faucets")):
     draw.ellipse([cx - rw, cy - rh, cx + rw, cy + rh], fill=255)
     matte_img = matte_img.filter(ImageFilter.GaussianBlur(radius=8))
 
-    return {
-        "width": w,
-        "height": h,
-        "matte_b64": _image_to_b64(matte_img),
-    }
+    meta = {"width": w, "height": h}
+    return Payload(meta, [Part("matte", meta, "matte_b64", image=matte_img)])
 
 
 # ---------------------------------------------------------------------------
 # POST /vision/inpaint
 # ---------------------------------------------------------------------------
 
+INPAINT_BLUR_RADIUS = 30
+# PIL's blur radius is the Gaussian sigma; pad the ROI by its ~3 sigma support
+# so the fill sees the real surroundings rather than the crop edge.
+INPAINT_ROI_PAD = INPAINT_BLUR_RADIUS * 3
+
+# fill(crop_rgb, crop_mask) -> filled crop_rgb, both (h, w[, 3]) uint8
+InpaintFill = Callable[[np.ndarray, np.ndarray], np.ndarray]
+
+
+def _mask_bbox(mask_np: np.ndarray) -> Optional[tuple[int, int, int, int]]:
+    """Bounding box (x0, y0, x1, y1), exclusive end, of nonzero mask pixels."""
+    rows = np.flatnonzero(mask_np.any(axis=1))
+    if rows.size == 0:
+        return None
+    cols = np.flatnonzero(mask_np[rows[0]:rows[-1] + 1].any(axis=0))
+    return int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1
+
+
+def _inpaint_roi(img_np: np.ndarray, mask_np: np.ndarray, fill: InpaintFill, pad: int) -> np.ndarray:
+    """
+    Inpaint only the mask's bounding box, padded by `pad`, and write the
+    result back into `img_np` in place. `fill` sees just the crop, so any
+    fill (blur stub or a real model) costs O(masked area), not O(frame).
+    """
+    bbox = _mask_bbox(mask_np)
+    if bbox is None:
+        return img_np
+
+    h, w = mask_np.shape
+    x0, y0, x1, y1 = bbox
+    roi = (slice(max(0, y0 - pad), min(h, y1 + pad)), slice(max(0, x0 - pad), min(w, x1 + pad)))
+
+    crop = img_np[roi]
+    crop_mask = mask_np[roi]
+    filled = fill(crop, crop_mask)
+
+    alpha = (crop_mask.astype(np.float32) / 255.0)[:, :, np.newaxis]
+    img_np[roi] = (crop * (1 - alpha) + filled * alpha).astype(np.uint8)
+    return img_np
+
+
+def _blur_fill(crop: np.ndarray, crop_mask: np.ndarray) -> np.ndarray:
+    """Crude content-aware fill: a heavy Gaussian blur of the surroundings."""
+    blurred = Image.fromarray(crop).filter(ImageFilter.GaussianBlur(radius=INPAINT_BLUR_RADIUS))
+    return np.asarray(blurred)
+
+
 @app.post("/vision/inpaint")
 async def inpaint(
+    request: Request,
     image: UploadFile = File(...),
     mask: UploadFile = File(...),
     prompt: str = Form("Remove the object and fill with the surrounding background."),
@@ -219,35 +529,101 @@ async def inpaint(
     """
     Inpaint the masked region of the image.
 
+    Only the mask's padded bounding box is processed (see `_inpaint_roi`).
+
     TODO: Replace with a real inpainting model (LaMa, Stable Diffusion
-    inpaint, or call an external API like OpenAI images/edits).
-    Current stub does a crude content-aware fill using Gaussian blur.
+    inpaint, or call an external API like OpenAI images/edits), passed
+    to `_inpaint_roi` as the fill. Current stub does a crude
+    content-aware fill using Gaussian blur.
     """
     img_data = await image.read()
     mask_data = await mask.read()
+    mode, options = _negotiate(request)
 
-    img = _decode_image(img_data).convert("RGB")
-    mask_img = Image.open(io.BytesIO(mask_data)).convert("L")
+    def compute() -> tuple[str, bytes, dict]:
+        return _render(_inpaint_payload(img_data, mask_data), mode, options)
 
-    w, h = img.size
-    mask_img = mask_img.resize((w, h))
+    return _respond(*await cpu_pools.run_in_thread(compute))
 
-    # Crude inpaint: blur the image heavily, paste blurred region where mask is white
-    blurred = img.filter(ImageFilter.GaussianBlur(radius=30))
-    mask_np = np.array(mask_img)
-    img_np = np.array(img)
-    blur_np = np.array(blurred)
 
-    alpha = (mask_np.astype(np.float32) / 255.0)[:, :, np.newaxis]
-    result = (img_np * (1 - alpha) + blur_np * alpha).astype(np.uint8)
-    result_img = Image.fromarray(result)
+def _inpaint_payload(img_data: bytes, mask_data: bytes) -> Payload:
+    ctx = ImageContext(img_data)
+    mask_img = ImageContext(mask_data).gray
 
-    return {
-        "width": w,
-        "height": h,
-        "image_b64": _image_to_b64(result_img),
+    w, h = ctx.size
+    if mask_img.size != (w, h):
+        mask_img = mask_img.resize((w, h))
+
+    img_np = np.array(ctx.rgb_array)  # writable copy; the ROI is filled in place
+    _inpaint_roi(img_np, np.asarray(mask_img), _blur_fill, INPAINT_ROI_PAD)
+    result_img = Image.fromarray(img_np)
+
+    meta = {"width": w, "height": h}
+    return Payload(meta, [Part("image", meta, "image_b64", image=result_img)])
+
+
+# ---------------------------------------------------------------------------
+# POST /vision/analyze
+# ---------------------------------------------------------------------------
+
+ANALYZE_STAGES = ("segment", "anchors", "depth", "matte")
+
+
+@app.post("/vision/analyze")
+async def analyze(
+    request: Request,
+    image: UploadFile = File(...),
+    stages: str = Form("segment,anchors,depth"),
+    mode: str = Form("labelmap"),
+    model: str = Form("gradient"),
+    horizon: float = Form(0.45),
+    dtype: str = Form("uint8"),
+    label: str = Form("faucets"),
+):
+    """
+    Run any subset of segment / anchors / depth / matte against one upload.
+
+    `stages` is a comma-separated list. The image is opened once and shared
+    by every stage; stage parameters match the single-stage endpoints
+    (`mode` for segment, `model`/`horizon`/`dtype` for depth, `label` for
+    matte). Each stage's result is nested under its name; binary parts are
+    named "<stage>.<part>".
+    """
+    selected = list(dict.fromkeys(s.strip() for s in stages.split(",") if s.strip()))
+    unknown = [s for s in selected if s not in ANALYZE_STAGES]
+    if not selected or unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown or empty stages: {unknown}")
+    _check_segment_mode(mode)
+    _check_depth_params(model, dtype)
+    horizon = min(max(horizon, 0.0), 1.0)
+
+    builders: dict[str, Callable[[ImageContext], Payload]] = {
+        "segment": lambda ctx: _segment_payload(ctx, mode),
+        "anchors": _anchors_payload,
+        "depth": lambda ctx: _depth_payload(ctx, model, horizon, dtype),
+        "matte": lambda ctx: _matte_payload(ctx, label),
     }
 
+    def compute() -> Payload:
+        ctx = ImageContext(data)
+        w, h = ctx.size
+        combined = Payload({"width": w, "height": h})
+        for stage in selected:
+            payload = builders[stage](ctx)
+            combined.meta[stage] = payload.meta
+            for part in payload.parts:
+                part.name = f"{stage}.{part.name}"
+                combined.parts.append(part)
+        return combined
+
+    data = await image.read()
+    params = (
+        f"stages={'+'.join(selected)},mode={mode},model={model},"
+        f"horizon={horizon:.4f},dtype={dtype},label={label}"
+    )
+    version = "+".join(MODEL_VERSIONS[s] for s in selected)
+    return await _cached_response(request, data, "analyze", params, compute, version=version)
+
 
 # ---------------------------------------------------------------------------
 # Health check
@@ -256,3 +632,9 @@ async def inpaint(
 @app.get("/")
 async def health():
     return {"status": "ok", "service": "luxeplan-vision"}
+
+
+@app.get("/metrics/executors")
+async def executor_metrics():
+    """Queue depth and wait/run times of the CPU worker pools."""
+    return cpu_pools.metrics()
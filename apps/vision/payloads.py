@@ -0,0 +1,195 @@
+"""
+Response payloads for the vision endpoints.
+
+Endpoints build a `Payload`: JSON metadata plus image parts. The part
+bytes are only encoded when the response is rendered in the negotiated mode:
+
+- json (default): each part is base64-encoded into its metadata field
+- raw (`Accept: image/png` or `image/webp`): the single image part as the
+  body, metadata in the `X-Vision-Metadata` header
+- multipart (`Accept: multipart/mixed`): a JSON metadata part followed by
+  one binary part per image; metadata entries reference parts by `part`
+
+Encoding is tunable per request with `?image_format=png|webp` and
+`?compress_level=0-9`, or by default via VISION_IMAGE_FORMAT and
+VISION_PNG_COMPRESS_LEVEL. WebP only holds 8-bit L/RGB/RGBA images, so
+asking for it on anything else (16-bit or float depth) is refused as
+NotAcceptable rather than truncated.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import io
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Optional
+
+from PIL import Image
+
+IMAGE_FORMATS = ("png", "webp")
+# Modes WebP stores losslessly; it has no 16-bit or float channels.
+WEBP_MODES = ("L", "RGB", "RGBA")
+
+DEFAULT_IMAGE_FORMAT = os.getenv("VISION_IMAGE_FORMAT", "png")
+DEFAULT_PNG_COMPRESS_LEVEL = int(os.getenv("VISION_PNG_COMPRESS_LEVEL", "6"))
+
+
+@dataclass
+class Part:
+    """One binary part. `target[field]` receives it in JSON mode."""
+
+    name: str
+    target: dict
+    field: str
+    image: Optional[Image.Image] = None
+    raw: Optional[bytes] = None
+    media_type: str = "application/octet-stream"
+
+
+@dataclass
+class Payload:
+    meta: dict
+    parts: list[Part] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class EncodeOptions:
+    image_format: str = DEFAULT_IMAGE_FORMAT
+    compress_level: int = DEFAULT_PNG_COMPRESS_LEVEL
+
+    def key(self) -> str:
+        return f"{self.image_format}{self.compress_level}"
+
+    def encode(self, img: Image.Image) -> tuple[bytes, str]:
+        buf = io.BytesIO()
+        if self.image_format == "webp":
+            if img.mode not in WEBP_MODES:
+                raise NotAcceptable(
+                    f"WebP cannot hold {img.mode} images without loss; use image_format=png"
+                )
+            # Masks and depth must round-trip exactly, so WebP is lossless;
+            # compress_level maps onto WebP's 0-6 effort scale; `exact` keeps
+            # colour under fully transparent pixels.
+            img.save(
+                buf,
+                format="WEBP",
+                lossless=True,
+                exact=True,
+                method=min(self.compress_level, 6),
+            )
+            return buf.getvalue(), "image/webp"
+        img.save(buf, format="PNG", compress_level=self.compress_level)
+        return buf.getvalue(), "image/png"
+
+
+class NotAcceptable(ValueError):
+    """The requested mode cannot represent this payload."""
+
+
+ACCEPTED_TYPES = {
+    "application/json": ("json", None),
+    "multipart/mixed": ("multipart", None),
+    "image/png": ("raw", "png"),
+    "image/webp": ("raw", "webp"),
+}
+
+
+def _preferred_type(accept: str) -> Optional[str]:
+    """Highest-q supported media type in an Accept header (ties keep order)."""
+    candidates = []
+    for position, item in enumerate(accept.lower().split(",")):
+        media_type, *params = [p.strip() for p in item.split(";")]
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if media_type in ACCEPTED_TYPES and q > 0:
+            candidates.append((-q, position, media_type))
+    return min(candidates)[2] if candidates else None
+
+
+def negotiate(accept: str, query: dict) -> tuple[str, EncodeOptions]:
+    """Pick the response mode from Accept and encoder options from the query."""
+    image_format = query.get("image_format", DEFAULT_IMAGE_FORMAT).lower()
+
+    mode, accept_format = ACCEPTED_TYPES.get(_preferred_type(accept or ""), ("json", None))
+    image_format = accept_format or image_format
+
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(f"Unsupported image_format: {image_format}")
+    try:
+        level = int(query.get("compress_level", DEFAULT_PNG_COMPRESS_LEVEL))
+    except ValueError:
+        raise ValueError("compress_level must be an integer") from None
+    return mode, EncodeOptions(image_format, min(max(level, 0), 9))
+
+
+def render(payload: Payload, mode: str, options: EncodeOptions) -> tuple[str, bytes, dict]:
+    """Encode a payload. Returns (media type, body, extra headers)."""
+    encoded = [_encode_part(part, options) for part in payload.parts]
+    if any(part.image is not None for part in payload.parts):
+        payload.meta["image_format"] = options.image_format
+
+    if mode == "json":
+        for part, (data, _) in zip(payload.parts, encoded):
+            part.target[part.field] = base64.b64encode(data).decode()
+        return "application/json", _dumps(payload.meta), {}
+
+    for part in payload.parts:
+        part.target["part"] = part.name
+
+    if mode == "raw":
+        if len(encoded) != 1:
+            raise NotAcceptable(
+                f"Response has {len(encoded)} binary parts; request multipart/mixed"
+            )
+        data, media_type = encoded[0]
+        return media_type, data, {"X-Vision-Metadata": _dumps(payload.meta).decode()}
+
+    return _multipart(payload, encoded)
+
+
+def _encode_part(part: Part, options: EncodeOptions) -> tuple[bytes, str]:
+    if part.image is not None:
+        return options.encode(part.image)
+    return part.raw or b"", part.media_type
+
+
+def _dumps(meta: dict) -> bytes:
+    return json.dumps(meta, separators=(",", ":")).encode()
+
+
+def _multipart(payload: Payload, encoded: list[tuple[bytes, str]]) -> tuple[str, bytes, dict]:
+    meta = _dumps(payload.meta)
+
+    # Deterministic boundary so identical payloads render (and cache) identically.
+    digest = hashlib.blake2b(digest_size=12)
+    digest.update(meta)
+    for data, _ in encoded:
+        digest.update(data)
+    boundary = f"luxeplan-{digest.hexdigest()}"
+
+    chunks = [
+        f"--{boundary}\r\n"
+        "Content-Type: application/json\r\n"
+        'Content-Disposition: inline; name="metadata"\r\n\r\n'.encode(),
+        meta,
+        b"\r\n",
+    ]
+    for part, (data, media_type) in zip(payload.parts, encoded):
+        chunks += [
+            f"--{boundary}\r\n"
+            f"Content-Type: {media_type}\r\n"
+            f'Content-Disposition: attachment; name="{part.name}"\r\n'
+            f"Content-Length: {len(data)}\r\n\r\n".encode(),
+            data,
+            b"\r\n",
+        ]
+    chunks.append(f"--{boundary}--\r\n".encode())
+    return f"multipart/mixed; boundary={boundary}", b"".join(chunks), {}
@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# Keep the shared analysis cache's disk tier out of the working tree.
+os.environ.setdefault("LUXEPLAN_CACHE_DIR", tempfile.mkdtemp(prefix="vision-tests-"))
@@ -0,0 +1,81 @@
+import io
+import json
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from main import app
+from payloads import EncodeOptions, NotAcceptable, negotiate
+
+
+@pytest.mark.parametrize(
+    "accept, query, expected",
+    [
+        ("", {}, ("json", "png")),
+        ("image/webp", {}, ("raw", "webp")),
+        ("image/png;q=0.5, multipart/mixed", {}, ("multipart", "png")),
+        ("text/html, image/png;q=0.9", {"image_format": "webp"}, ("raw", "png")),
+        ("application/json", {"image_format": "WEBP"}, ("json", "webp")),
+    ],
+)
+def test_negotiate(accept, query, expected):
+    mode, options = negotiate(accept, query)
+    assert (mode, options.image_format) == expected
+
+
+def test_negotiate_rejects_bad_options():
+    with pytest.raises(ValueError):
+        negotiate("", {"image_format": "gif"})
+    with pytest.raises(ValueError):
+        negotiate("", {"compress_level": "max"})
+    assert negotiate("", {"compress_level": "42"})[1].compress_level == 9
+
+
+def test_16_bit_depth_round_trips_as_png_and_refuses_webp():
+    depth = (np.arange(64 * 48, dtype=np.uint16) * 21).reshape(48, 64)
+    image = Image.fromarray(depth)
+
+    data, media_type = EncodeOptions("png").encode(image)
+    assert media_type == "image/png"
+    assert np.array_equal(np.asarray(Image.open(io.BytesIO(data))), depth)
+
+    with pytest.raises(NotAcceptable):
+        EncodeOptions("webp").encode(image)
+
+
+@pytest.mark.parametrize("mode", ["L", "RGB", "RGBA"])
+def test_webp_is_lossless_for_8_bit_images(mode):
+    rng = np.random.default_rng(0)
+    channels = {"L": (), "RGB": (3,), "RGBA": (4,)}[mode]
+    pixels = rng.integers(0, 256, (32, 40, *channels), dtype=np.uint8)
+    data, _ = EncodeOptions("webp").encode(Image.fromarray(pixels, mode))
+    decoded = np.asarray(Image.open(io.BytesIO(data)).convert(mode))
+    assert np.array_equal(decoded, pixels)
+
+
+def _upload() -> dict:
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48), (120, 110, 100)).save(buffer, format="PNG")
+    return {"image": ("room.png", buffer.getvalue(), "image/png")}
+
+
+def test_depth_endpoint_never_truncates_16_bit_depth():
+    client = TestClient(app)
+    form = {"dtype": "uint16"}
+
+    response = client.post("/vision/depth?image_format=webp", files=_upload(), data=form)
+    assert response.status_code == 406
+    response = client.post(
+        "/vision/depth", files=_upload(), data=form, headers={"Accept": "image/webp"}
+    )
+    assert response.status_code == 406
+
+    response = client.post(
+        "/vision/depth", files=_upload(), data=form, headers={"Accept": "image/png"}
+    )
+    assert response.status_code == 200
+    depth = np.asarray(Image.open(io.BytesIO(response.content)))
+    assert depth.dtype == np.uint16 and depth.max() > 255
+    assert json.loads(response.headers["X-Vision-Metadata"])["dtype"] == "uint16"
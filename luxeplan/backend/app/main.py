@@ -3,15 +3,43 @@ LUXEPLAN Vision & Compositing Microservice
 FastAPI backend for image analysis, placement engine, and AI rendering.
 """
 
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.routes import vision, placement, gemini, assets
+from app.routes import vision, placement, gemini, assets, models, ingestion
+from app.services.model_registry import model_registry, preload_names
+from app.services.executors import cpu_pools
+from app.services.artifact_store import artifact_store
+from app.services.asset_dedup import asset_dedup
+from app.services.batching import batching_metrics
+from app.services.depth_maps import depth_maps
+from app.services.http_client import http_pool
+from app.services.rate_limit import rate_limit_metrics
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Models load lazily on first use; only LUXEPLAN_PRELOAD_MODELS load here.
+    preload = preload_names()
+    if preload:
+        await asyncio.to_thread(model_registry.warmup, preload)
+    await http_pool.open()
+    # Also sweeps render jobs left unfinished by a stopped worker.
+    await gemini.render_jobs.start()
+    yield
+    await gemini.render_jobs.close()
+    await http_pool.close()
+    cpu_pools.shutdown()
+
 
 app = FastAPI(
     title="LUXEPLAN Vision API",
     version="1.0.0",
     description="AI vision pipeline for luxury kitchen & bath design",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -26,8 +54,64 @@ app.include_router(vision.router, prefix="/api/vision", tags=["Vision Pipeline"]
 app.include_router(placement.router, prefix="/api/placement", tags=["Placement Engine"])
 app.include_router(gemini.router, prefix="/api/gemini", tags=["Gemini AI"])
 app.include_router(assets.router, prefix="/api/assets", tags=["Asset Preparation"])
+app.include_router(models.router, prefix="/api/models", tags=["Models"])
+app.include_router(ingestion.router, prefix="/api/ingestion", tags=["Product Ingestion"])
 
 
 @app.get("/health")
 async def health():
     return {"status": "ok", "service": "luxeplan-vision"}
+
+
+@app.get("/metrics/executors")
+async def executor_metrics():
+    """Queue depth and wait/run times of the CPU worker pools."""
+    return cpu_pools.metrics()
+
+
+@app.get("/metrics/batching")
+async def batch_metrics():
+    """Batch-size histograms and wait/run times of the model micro-batchers."""
+    return batching_metrics()
+
+
+@app.get("/metrics/depth-maps")
+async def depth_map_metrics():
+    """Hits, loads and resident bytes of the shared depth-map cache."""
+    return depth_maps.stats()
+
+
+@app.get("/metrics/artifacts")
+async def artifact_metrics():
+    """Writes, opens and disk usage of the local scene-artifact store."""
+    return artifact_store.stats()
+
+
+@app.get("/metrics/asset-dedup")
+async def asset_dedup_metrics():
+    """Exact and near-duplicate hit rates of the asset-prep dedup cache."""
+    return asset_dedup.stats()
+
+
+@app.get("/metrics/guidance-cache")
+async def guidance_cache_metrics():
+    """Hit, coalesce and eviction counts of the Gemini guidance cache."""
+    return gemini.gemini.guidance_cache.stats()
+
+
+@app.get("/metrics/render-jobs")
+async def render_job_metrics():
+    """Submitted, deduplicated and rejected renders, and queue occupancy."""
+    return gemini.render_jobs.stats()
+
+
+@app.get("/metrics/rate-limits")
+async def upstream_rate_limits():
+    """Concurrency window, throttles, retries and queue times per upstream."""
+    return rate_limit_metrics()
+
+
+@app.get("/metrics/http")
+async def http_metrics():
+    """Per-host connection reuse and latency of the shared HTTP client."""
+    return http_pool.stats()
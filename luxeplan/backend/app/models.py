@@ -1,6 +1,6 @@
 """Pydantic models for the LUXEPLAN Vision API."""
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 
 
@@ -15,18 +15,29 @@ class AnchorPoint(BaseModel):
     plane: str  # wall, floor, countertop, ceiling
 
 
+class MaskRLE(BaseModel):
+    """COCO-style run-length encoded mask (column-major, compressed counts)."""
+
+    size: list[int]  # [height, width]
+    counts: str
+
+
 class SegmentationMask(BaseModel):
     label: str
     mask_url: str
-    polygon: list[list[float]]
+    polygon: list[list[float]]  # largest outer ring
     area: float
+    polygons: list[list[list[float]]] = []  # every outer ring
+    bounds: Optional[dict] = None  # {x, y, width, height}
+    rle: Optional[MaskRLE] = None  # at inference resolution, see rle.size
 
 
 class PlaneInfo(BaseModel):
     label: str
-    normal: list[float]  # [x, y, z]
-    distance: float
-    bounds: dict  # {x, y, width, height}
+    normal: list[float]  # [x, y, z], camera space, facing the camera
+    distance: float  # camera-to-plane distance (m)
+    bounds: dict  # {x, y, width, height} of the inliers
+    inlier_ratio: Optional[float] = None
 
 
 class VisionAnalysisResponse(BaseModel):
@@ -42,15 +53,30 @@ class VisionAnalysisResponse(BaseModel):
 
 class PlacementRequest(BaseModel):
     category: str
-    asset_width: int
-    asset_height: int
+    asset_width: int = Field(gt=0)
+    asset_height: int = Field(gt=0)
     anchors: list[AnchorPoint]
     depth_map_url: str
-    image_width: int
-    image_height: int
+    image_width: int = Field(gt=0)
+    image_height: int = Field(gt=0)
+    target_anchor_label: Optional[str] = None
+
+
+class PlacementBatchItem(BaseModel):
+    category: str
+    asset_width: int = Field(gt=0)
+    asset_height: int = Field(gt=0)
     target_anchor_label: Optional[str] = None
 
 
+class PlacementBatchRequest(BaseModel):
+    anchors: list[AnchorPoint]
+    depth_map_url: str
+    image_width: int = Field(gt=0)
+    image_height: int = Field(gt=0)
+    items: list[PlacementBatchItem]
+
+
 class PlacementResult(BaseModel):
     x: float
     y: float
@@ -58,7 +84,13 @@ class PlacementResult(BaseModel):
     rotation: float
     z_order: int
     shadow_plane: str
+    # COCO RLE counts over occlusion_bounds (column-major, height x width)
     occlusion_mask: Optional[str] = None
+    occlusion_bounds: Optional[dict] = None  # {x, y, width, height}
+
+
+class PlacementBatchResponse(BaseModel):
+    results: list[PlacementResult]
 
 
 class GeminiGuidanceRequest(BaseModel):
@@ -87,13 +119,64 @@ class ConceptRenderResponse(BaseModel):
     changes_summary: list[str]
 
 
+class RenderJobStatus(BaseModel):
+    job_id: str
+    status: str  # pending, running, completed, failed
+    progress: float = 0.0  # 0-1
+    stage: Optional[str] = None
+    result: Optional[ConceptRenderResponse] = None
+    error: Optional[str] = None
+
+
+class IngestedProduct(BaseModel):
+    source_id: str
+    source_platform: str
+    name: str
+    brand: str
+    category: str
+    price: float
+    image_url: str
+    description: str
+    material: Optional[str] = None
+    finish: Optional[str] = None
+    color: Optional[str] = None
+    dimensions: Optional[dict] = None
+    room_types: Optional[list[str]] = None
+    style_tags: Optional[list[str]] = None
+    alpha_png_url: Optional[str] = None
+    pose_rating: Optional[int] = None
+    is_insertion_ready: bool = False
+
+
+class IngestionSourceResult(BaseModel):
+    source: str
+    status: str  # ok, error, timeout
+    elapsed_ms: float  # since the search started
+    products: list[IngestedProduct] = []
+    error: Optional[str] = None
+    assets_ready: bool = False  # a later line repeats the source once prepared
+
+
 class AssetPrepRequest(BaseModel):
     image_url: str
     product_id: str
 
 
+class AssetPrepBatchRequest(BaseModel):
+    items: list[AssetPrepRequest]
+
+
 class AssetPrepResponse(BaseModel):
     alpha_png_url: str
     pose_rating: int
     is_insertion_ready: bool
     rejection_reason: Optional[str] = None
+    # "exact" or "near" when an earlier prepared asset was reused
+    reused: Optional[str] = None
+
+
+class AssetPrepBatchItem(BaseModel):
+    index: int  # position in the request
+    product_id: str
+    result: Optional[AssetPrepResponse] = None
+    error: Optional[str] = None
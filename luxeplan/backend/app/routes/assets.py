@@ -3,9 +3,11 @@ Asset Preparation Routes
 Background removal, edge cleaning, pose quality assessment.
 """
 
-from fastapi import APIRouter, UploadFile, File
-from app.models import AssetPrepResponse
+from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi.responses import StreamingResponse
+from app.models import AssetPrepBatchRequest, AssetPrepResponse
 from app.services.asset_prep import AssetPrepService
+from app.services.http_client import FetchRefused, check_fetch_url
 
 router = APIRouter()
 prep_service = AssetPrepService()
@@ -26,3 +28,25 @@ async def prepare_asset(product_id: str, file: UploadFile = File(...)):
         image_data=contents,
         product_id=product_id,
     )
+
+
+@router.post("/prepare-batch")
+async def prepare_assets(request: AssetPrepBatchRequest):
+    """
+    Run the preparation pipeline over many product images (http(s) URLs
+    on the allowed image hosts) across the worker processes. Streams one
+    AssetPrepBatchItem per line (NDJSON) as each finishes, so `index` maps
+    results back to `items`.
+    """
+    for item in request.items:
+        try:
+            check_fetch_url(item.image_url, prep_service.allowed_hosts)
+        except FetchRefused as exc:
+            raise HTTPException(status_code=422, detail=str(exc))
+
+    async def lines():
+        pairs = ((item.product_id, item.image_url) for item in request.items)
+        async for result in prep_service.prepare_many(pairs):
+            yield result.model_dump_json() + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -1,21 +1,39 @@
 """
 Gemini AI Integration Routes
 Design guidance and concept render modes.
+Concept renders run as jobs: submit, then poll or stream progress (SSE).
 """
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from app.models import (
     GeminiGuidanceRequest,
     GeminiGuidanceResponse,
     ConceptRenderRequest,
     ConceptRenderResponse,
+    RenderJobStatus,
 )
-from app.services.gemini_service import GeminiService
+from app.services.gemini_service import GeminiError, GeminiService
+from app.services.http_client import FetchRefused
+from app.services.render_jobs import TERMINAL, QueueFull, RenderJobQueue, backend_from_env
 
 router = APIRouter()
 gemini = GeminiService()
 
 
+async def _render(request: ConceptRenderRequest, on_progress) -> ConceptRenderResponse:
+    return await gemini.generate_concept_render(
+        original_image_url=request.original_image_url,
+        segmentation_masks=request.segmentation_masks,
+        current_design_state=request.current_design_state,
+        requested_change=request.requested_change,
+        on_progress=on_progress,
+    )
+
+
+render_jobs = RenderJobQueue(_render, backend_from_env())
+
+
 @router.post("/guidance", response_model=GeminiGuidanceResponse)
 async def get_design_guidance(request: GeminiGuidanceRequest):
     """
@@ -23,12 +41,17 @@ async def get_design_guidance(request: GeminiGuidanceRequest):
     Returns structured JSON with style summary, color palette,
     recommended products, and budget warnings.
     """
-    return await gemini.get_guidance(
-        image_url=request.image_url,
-        room_type=request.room_type,
-        current_selections=request.current_selections,
-        style_preferences=request.style_preferences,
-    )
+    try:
+        return await gemini.get_guidance(
+            image_url=request.image_url,
+            room_type=request.room_type,
+            current_selections=request.current_selections,
+            style_preferences=request.style_preferences,
+        )
+    except FetchRefused as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    except GeminiError as exc:
+        raise HTTPException(status_code=502, detail=str(exc))
 
 
 @router.post("/concept-render", response_model=ConceptRenderResponse)
@@ -37,10 +60,64 @@ async def generate_concept_render(request: ConceptRenderRequest):
     Concept Render Mode:
     Generates a high-end photoreal image using Gemini when live
     compositing isn't sufficient for credible insertion.
+
+    Blocks until the render finishes (504 after LUXEPLAN_RENDER_WAIT_S);
+    prefer /concept-render/jobs. Runs through the job queue, so it shares
+    its concurrency limit and dedup.
     """
-    return await gemini.generate_concept_render(
-        original_image_url=request.original_image_url,
-        segmentation_masks=request.segmentation_masks,
-        current_design_state=request.current_design_state,
-        requested_change=request.requested_change,
+    job = await _submit(request)
+    final = await render_jobs.wait(job.job_id)
+    if final is not None and final.status not in TERMINAL:
+        raise HTTPException(
+            status_code=504, detail=f"Render {job.job_id} still {final.status}; poll the job"
+        )
+    if final is None or final.status != "completed":
+        raise HTTPException(status_code=502, detail=final.error if final else "Render lost")
+    return final.result
+
+
+@router.post("/concept-render/jobs", response_model=RenderJobStatus, status_code=202)
+async def submit_concept_render(request: ConceptRenderRequest):
+    """
+    Queue a concept render and return its job at once. An identical
+    request (same image, masks, design state and change) that is queued,
+    running or recently finished returns that job instead.
+    """
+    return await _submit(request)
+
+
+@router.get("/concept-render/jobs/{job_id}", response_model=RenderJobStatus)
+async def get_concept_render(job_id: str):
+    """Poll a render job; `result` is set once status is completed."""
+    status = await render_jobs.get(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return status
+
+
+@router.get("/concept-render/jobs/{job_id}/events")
+async def stream_concept_render(job_id: str):
+    """
+    Server-sent events: one `event: <status>` per change (progress and
+    stage while running), ending after completed or failed, or after
+    LUXEPLAN_RENDER_WAIT_S (reconnect to keep watching).
+    """
+    if await render_jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+
+    async def events():
+        async for status in render_jobs.events(job_id):
+            yield f"event: {status.status}\ndata: {status.model_dump_json()}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
+
+
+async def _submit(request: ConceptRenderRequest) -> RenderJobStatus:
+    try:
+        return await render_jobs.submit(request)
+    except QueueFull as exc:
+        raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "10"})
@@ -0,0 +1,41 @@
+"""
+Product Ingestion Routes
+Cross-source catalog search, streamed as each source answers.
+"""
+
+from dataclasses import asdict
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from app.models import IngestionSourceResult
+from app.services.ingestion import ProductIngestionService
+
+router = APIRouter()
+ingestion_service = ProductIngestionService()
+
+
+@router.get("/search")
+async def search_all_sources(
+    query: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+    sources: Optional[list[str]] = Query(None),
+):
+    """
+    Search every product source (or just `sources`) in parallel. Streams
+    one IngestionSourceResult per line (NDJSON) as each source's search
+    returns, fastest first; a source that fails or times out reports its
+    error in its own line and the others still arrive. Each source with
+    products is sent again with assets_ready=true once its alpha PNGs and
+    insertion readiness are filled in.
+    """
+    unknown = [name for name in sources or [] if name not in ingestion_service.adapters]
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown source: {', '.join(unknown)}")
+
+    async def lines():
+        async for result in ingestion_service.stream_all_sources(query, limit, sources):
+            line = IngestionSourceResult.model_validate(asdict(result))
+            yield line.model_dump_json() + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
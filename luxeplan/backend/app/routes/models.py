@@ -0,0 +1,31 @@
+"""
+Model Registry Routes
+Inspect and warm the lazily loaded vision models.
+"""
+
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from app.services.model_registry import model_registry
+
+router = APIRouter()
+
+
+@router.get("")
+async def list_models():
+    """Load state, load time and resident memory for every registered model."""
+    return {"models": model_registry.stats()}
+
+
+@router.post("/warmup")
+async def warmup_models(names: Optional[list[str]] = Query(None)):
+    """
+    Load the given models (default: all) so the first real request
+    doesn't pay the load cost. Already loaded models return immediately.
+    """
+    try:
+        stats = await asyncio.to_thread(model_registry.warmup, names)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=str(exc.args[0]))
+    return {"models": stats}
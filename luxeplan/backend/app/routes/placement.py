@@ -4,7 +4,13 @@ Auto-placement of products based on vision analysis results.
 """
 
 from fastapi import APIRouter
-from app.models import PlacementRequest, PlacementResult
+from app.models import (
+    PlacementRequest,
+    PlacementResult,
+    PlacementBatchRequest,
+    PlacementBatchResponse,
+)
+from app.services.executors import cpu_pools
 from app.services.placement_engine import PlacementEngine
 
 router = APIRouter()
@@ -17,7 +23,8 @@ async def compute_placement(request: PlacementRequest):
     Compute optimal placement for a product given the scene analysis.
     Returns position, scale, rotation, z-order, shadow plane, and occlusion mask.
     """
-    result = engine.compute(
+    result = await cpu_pools.run_in_thread(
+        engine.compute,
         category=request.category,
         asset_width=request.asset_width,
         asset_height=request.asset_height,
@@ -28,3 +35,22 @@ async def compute_placement(request: PlacementRequest):
         target_anchor_label=request.target_anchor_label,
     )
     return result
+
+
+@router.post("/compute-batch", response_model=PlacementBatchResponse)
+async def compute_placement_batch(request: PlacementBatchRequest):
+    """
+    Compute placements for a whole design state in one call.
+    The scene (anchors, image size, depth map) is sent and validated once;
+    results are returned in the order of `items`, with occlusion computed
+    against one shared decode of the depth map.
+    """
+    results = await cpu_pools.run_in_thread(
+        engine.compute_batch,
+        items=request.items,
+        anchors=request.anchors,
+        depth_map_url=request.depth_map_url,
+        image_width=request.image_width,
+        image_height=request.image_height,
+    )
+    return PlacementBatchResponse(results=results)
@@ -3,10 +3,8 @@ Vision Pipeline Routes
 Handles image analysis: segmentation, object detection, depth estimation, plane inference.
 """
 
-import uuid
-from fastapi import APIRouter, UploadFile, File
-from PIL import Image
-import io
+from fastapi import APIRouter, UploadFile, File, Response
+from pydantic import TypeAdapter
 import numpy as np
 
 from app.models import (
@@ -18,6 +16,11 @@ from app.models import (
 from app.services.segmentation import SegmentationService
 from app.services.detection import ObjectDetectionService
 from app.services.depth import DepthEstimationService
+from app.services.pipeline import Stage, StageGraph
+from app.services.analysis_cache import analysis_cache, content_hash, image_id_for
+from app.services.depth_maps import depth_maps
+from app.services.image_context import INFERENCE_MAX_SIDE, ImageContext, ScaledImage
+from app.services.plane_fitting import infer_planes
 
 router = APIRouter()
 
@@ -25,111 +28,130 @@ segmentation_service = SegmentationService()
 detection_service = ObjectDetectionService()
 depth_service = DepthEstimationService()
 
+# Bump when infer_planes changes; keys cached plane results.
+PLANE_MODEL_VERSION = "ransac-v1"
+
+# Model outputs depend on the input resolution as well as the model.
+_RESOLUTION = f"@{INFERENCE_MAX_SIDE}"
+
+# Cached stage outputs: stage name -> (codec, model version).
+CACHED_STAGES: dict[str, tuple[TypeAdapter, str]] = {
+    "size": (TypeAdapter(tuple[int, int]), "1"),
+    "segments": (
+        TypeAdapter(list[SegmentationMask]),
+        segmentation_service.model_version + _RESOLUTION,
+    ),
+    "anchors": (TypeAdapter(list[AnchorPoint]), detection_service.model_version + _RESOLUTION),
+    "depth": (TypeAdapter(str), depth_service.model_version + _RESOLUTION),
+    "planes": (
+        TypeAdapter(list[PlaneInfo]),
+        f"{PLANE_MODEL_VERSION}+{segmentation_service.model_version}"
+        f"+{depth_service.model_version}{_RESOLUTION}",
+    ),
+}
+
 
 @router.post("/analyze", response_model=VisionAnalysisResponse)
-async def analyze_image(file: UploadFile = File(...)):
+async def analyze_image(response: Response, file: UploadFile = File(...)):
     """
     Full vision pipeline:
     1. Segmentation (walls, floor, cabinets, countertop, backsplash, etc.)
     2. Object detection (sink, faucet, stove, fridge, etc.)
     3. Monocular depth estimation
-    4. Planar surface inference
+    4. Plane fitting: depth inside each surface mask, back-projected and
+       fitted with RANSAC (see plane_fitting)
+
+    Segmentation, detection and depth are independent and run concurrently,
+    each batched with other in-flight requests' forward passes;
+    plane inference and room classification start as soon as their own
+    inputs are ready. Per-stage timings are returned in `Server-Timing`.
+
+    Models see the upload at inference resolution (see ImageContext); JPEGs
+    are decoded straight at that scale and results are mapped back to
+    original coordinates.
+
+    Results are cached by content hash, so re-uploading the same photo skips
+    decoding and every cached stage. The depth map is pruned separately
+    from the cache; a cached depth URL whose depth is gone is recomputed
+    and re-published.
     """
     contents = await file.read()
-    img = Image.open(io.BytesIO(contents)).convert("RGB")
-    width, height = img.size
-    image_id = str(uuid.uuid4())
-
-    # Run segmentation
-    segments = await segmentation_service.segment(img, image_id)
-
-    # Run object detection
-    anchors = await detection_service.detect(img, image_id)
-
-    # Run depth estimation
-    depth_map_url = await depth_service.estimate(img, image_id)
-
-    # Infer planes from segments and depth
-    planes = infer_planes(segments, width, height)
-
-    # Classify room type
-    room_type = classify_room(anchors)
-
+    image_hash = content_hash(contents)
+    image_id = image_id_for(image_hash)
+
+    seed = {}
+    for name, (codec, version) in CACHED_STAGES.items():
+        payload = analysis_cache.get(image_hash, name, version)
+        if payload is not None:
+            seed[name] = codec.validate_json(payload)
+    if "depth" in seed and not depth_maps.available(seed["depth"]):
+        del seed["depth"]
+
+    def open_image() -> ImageContext:
+        # Reads the header only; the first stage that needs pixels decodes
+        # the shared inference-resolution pyramid level once.
+        return ImageContext(contents)
+
+    def size(image: ImageContext) -> tuple[int, int]:
+        return image.size
+
+    def inference_input(image: ImageContext) -> ScaledImage:
+        return image.for_inference()
+
+    # The services micro-batch their forward passes across concurrent
+    # requests on this event loop, so they are awaited inline.
+    async def segments(inference_input: ScaledImage) -> list[SegmentationMask]:
+        return await segmentation_service.segment(inference_input, image_id)
+
+    async def anchors(inference_input: ScaledImage) -> list[AnchorPoint]:
+        return await detection_service.detect(inference_input, image_id)
+
+    async def depth_map(inference_input: ScaledImage) -> np.ndarray:
+        return await depth_service.predict(inference_input)
+
+    async def depth(depth_map: np.ndarray, inference_input: ScaledImage) -> str:
+        return await depth_service.publish(depth_map, inference_input, image_id)
+
+    def planes(
+        segments: list[SegmentationMask], depth_map: np.ndarray, inference_input: ScaledImage
+    ) -> list[PlaneInfo]:
+        return infer_planes(segments, depth_map, inference_input)
+
+    def room_type(anchors: list[AnchorPoint]) -> str:
+        return classify_room(anchors)
+
+    graph = StageGraph([
+        Stage("image", open_image),
+        Stage("size", size, deps=("image",), inline=True),
+        Stage("inference_input", inference_input, deps=("image",)),
+        Stage("segments", segments, deps=("inference_input",), inline=True),
+        Stage("anchors", anchors, deps=("inference_input",), inline=True),
+        Stage("depth_map", depth_map, deps=("inference_input",), inline=True),
+        Stage("depth", depth, deps=("depth_map", "inference_input"), inline=True),
+        Stage("planes", planes, deps=("segments", "depth_map", "inference_input")),
+        Stage("room_type", room_type, deps=("anchors",), inline=True),
+    ])
+    targets = ["size", "segments", "anchors", "depth", "planes", "room_type"]
+    run = await graph.run(targets=targets, seed=seed)
+    response.headers["Server-Timing"] = run.server_timing()
+
+    for name, (codec, version) in CACHED_STAGES.items():
+        if name not in seed:
+            analysis_cache.put(image_hash, name, version, codec.dump_json(run.outputs[name]))
+
+    width, height = run.outputs["size"]
     return VisionAnalysisResponse(
         image_id=image_id,
         width=width,
         height=height,
-        segments=segments,
-        anchors=anchors,
-        depth_map_url=depth_map_url,
-        planes=planes,
-        room_type=room_type,
+        segments=run.outputs["segments"],
+        anchors=run.outputs["anchors"],
+        depth_map_url=run.outputs["depth"],
+        planes=run.outputs["planes"],
+        room_type=run.outputs["room_type"],
     )
 
 
-def infer_planes(
-    segments: list[SegmentationMask], width: int, height: int
-) -> list[PlaneInfo]:
-    """Infer planar surfaces from segmentation masks."""
-    planes = []
-
-    segment_labels = {s.label for s in segments}
-
-    if "wall" in segment_labels:
-        wall_seg = next(s for s in segments if s.label == "wall")
-        planes.append(
-            PlaneInfo(
-                label="wall",
-                normal=[0.0, 0.0, 1.0],
-                distance=1.0,
-                bounds={"x": 0, "y": 0, "width": width, "height": int(height * 0.6)},
-            )
-        )
-
-    if "floor" in segment_labels:
-        planes.append(
-            PlaneInfo(
-                label="floor",
-                normal=[0.0, 1.0, 0.0],
-                distance=0.0,
-                bounds={
-                    "x": 0,
-                    "y": int(height * 0.65),
-                    "width": width,
-                    "height": int(height * 0.35),
-                },
-            )
-        )
-
-    if "countertop" in segment_labels:
-        counter_seg = next(s for s in segments if s.label == "countertop")
-        planes.append(
-            PlaneInfo(
-                label="countertop",
-                normal=[0.0, 1.0, 0.0],
-                distance=0.85,
-                bounds={
-                    "x": 0,
-                    "y": int(height * 0.4),
-                    "width": width,
-                    "height": int(height * 0.15),
-                },
-            )
-        )
-
-    if "ceiling" in segment_labels:
-        planes.append(
-            PlaneInfo(
-                label="ceiling",
-                normal=[0.0, -1.0, 0.0],
-                distance=2.4,
-                bounds={"x": 0, "y": 0, "width": width, "height": int(height * 0.1)},
-            )
-        )
-
-    return planes
-
-
 def classify_room(anchors: list[AnchorPoint]) -> str:
     """Classify room type based on detected objects."""
     kitchen_anchors = {"stove", "fridge", "oven", "dishwasher", "range_hood"}
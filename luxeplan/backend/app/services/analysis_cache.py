@@ -0,0 +1,163 @@
+"""
+Analysis Cache
+Content-addressed cache for vision results, shared by the LuxePlan backend
+and the apps/vision microservice.
+
+Entries are keyed by (BLAKE2b hash of the raw upload, result kind, model
+version), so a re-uploaded photo is answered from the cache without being
+decoded, and a model upgrade naturally misses. Payloads are opaque bytes
+(usually JSON). Two tiers:
+
+- memory: LRU bounded by total payload bytes
+- disk: one file per entry under a shared directory, bounded by total bytes
+  and pruned least recently used first (see disk_budget)
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from app.services.disk_budget import DiskBudget, file_size
+
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "luxeplan-analysis-cache")
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+DEFAULT_DISK_BUDGET = 2 * 1024 * 1024 * 1024
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9._=+-]")
+
+
+def content_hash(data: bytes) -> str:
+    """Hex BLAKE2b-256 digest of raw bytes."""
+    return hashlib.blake2b(data, digest_size=32).hexdigest()
+
+
+def image_id_for(image_hash: str) -> str:
+    """Stable UUID-shaped image id derived from a content hash."""
+    return str(uuid.UUID(hex=image_hash[:32]))
+
+
+class AnalysisCache:
+    def __init__(
+        self,
+        memory_budget: int = DEFAULT_MEMORY_BUDGET,
+        disk_dir: Optional[str] = DEFAULT_CACHE_DIR,
+        disk_budget: int = DEFAULT_DISK_BUDGET,
+    ):
+        self.memory_budget = memory_budget
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_budget = disk_budget
+        self._disk = DiskBudget(self.disk_dir, "*.bin", disk_budget) if self.disk_dir else None
+
+        self._memory: OrderedDict[tuple[str, str, str], bytes] = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+    @classmethod
+    def from_env(cls) -> "AnalysisCache":
+        """
+        Build from LUXEPLAN_CACHE_DIR (empty disables the disk tier),
+        LUXEPLAN_CACHE_MEMORY_BYTES and LUXEPLAN_CACHE_DISK_BYTES.
+        """
+        return cls(
+            memory_budget=int(os.getenv("LUXEPLAN_CACHE_MEMORY_BYTES", DEFAULT_MEMORY_BUDGET)),
+            disk_dir=os.getenv("LUXEPLAN_CACHE_DIR", DEFAULT_CACHE_DIR) or None,
+            disk_budget=int(os.getenv("LUXEPLAN_CACHE_DISK_BYTES", DEFAULT_DISK_BUDGET)),
+        )
+
+    # ── Public API ──
+
+    def get(self, image_hash: str, kind: str, version: str) -> Optional[bytes]:
+        key = (image_hash, kind, version)
+        with self._lock:
+            payload = self._memory.get(key)
+            if payload is not None:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return payload
+
+        payload = self._read_disk(key)
+        with self._lock:
+            if payload is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["disk_hits"] += 1
+            self._remember(key, payload)
+        return payload
+
+    def put(self, image_hash: str, kind: str, version: str, payload: bytes) -> None:
+        key = (image_hash, kind, version)
+        with self._lock:
+            self._remember(key, payload)
+        self._write_disk(key, payload)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._stats,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk.bytes if self._disk else None,
+            }
+
+    # ── Memory tier ──
+
+    def _remember(self, key: tuple[str, str, str], payload: bytes) -> None:
+        if len(payload) > self.memory_budget:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = payload
+        self._memory_bytes += len(payload)
+
+        while self._memory_bytes > self.memory_budget:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self._stats["evictions"] += 1
+
+    # ── Disk tier ──
+
+    def _path(self, key: tuple[str, str, str]) -> Path:
+        image_hash, kind, version = key
+        name = f"{_UNSAFE.sub('_', kind)}@{_UNSAFE.sub('_', version)}.bin"
+        return self.disk_dir / image_hash[:2] / image_hash / name
+
+    def _read_disk(self, key: tuple[str, str, str]) -> Optional[bytes]:
+        if self.disk_dir is None:
+            return None
+        path = self._path(key)
+        try:
+            payload = path.read_bytes()
+            os.utime(path)  # refresh recency for pruning
+        except OSError:
+            return None
+        return payload
+
+    def _write_disk(self, key: tuple[str, str, str], payload: bytes) -> None:
+        if self.disk_dir is None or len(payload) > self.disk_budget:
+            return
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            replaced = file_size(path)
+            os.replace(tmp, path)
+        except OSError:
+            return
+
+        evicted = self._disk.record(len(payload), replaced)
+        if evicted:
+            with self._lock:
+                self._stats["evictions"] += evicted
+
+
+analysis_cache = AnalysisCache.from_env()
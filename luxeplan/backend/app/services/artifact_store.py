@@ -0,0 +1,122 @@
+"""
+Artifact Store
+Per-image scene arrays (depth, label map) as raw .npy files on local disk.
+
+Artifacts are written once when an image is analysed and opened read-only
+with np.load(mmap_mode="r"), so consumers (placement, occlusion, plane
+fitting) page in only the rows and tiles they touch instead of fetching and
+decoding a whole encoded map. Files live under one directory, keyed by
+image_id, shared by every worker on the host:
+
+    <dir>/<image_id[:2]>/<image_id>/<kind>.npy
+
+The directory is bounded by total bytes and pruned least recently opened
+first (see disk_budget). Unlinking a file that is still mapped is safe;
+readers keep their view until they drop it. The analysis cache is pruned
+separately, so a cached result can outlive the artifact it refers to;
+callers check `exists` before relying on one.
+"""
+
+import os
+import re
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from app.services.disk_budget import DiskBudget, file_size
+
+DEFAULT_ARTIFACT_DIR = os.path.join(tempfile.gettempdir(), "luxeplan-artifacts")
+DEFAULT_DISK_BUDGET = 4 * 1024 * 1024 * 1024
+
+# Artifact kinds and their on-disk dtypes. Half precision keeps depth to
+# ~1 mm at 2 m and ~4 mm at 8 m, well inside occlusion margins.
+DEPTH = "depth"
+LABELS = "labels"
+DTYPES = {DEPTH: np.float16, LABELS: np.uint8}
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9._=+-]")
+
+
+class ArtifactStore:
+    def __init__(self, root: Optional[str] = DEFAULT_ARTIFACT_DIR, disk_budget: int = DEFAULT_DISK_BUDGET):
+        self.root = Path(root) if root else None
+        self.disk_budget = disk_budget
+        self._disk = DiskBudget(self.root, "*.npy", disk_budget) if self.root else None
+        self._lock = threading.Lock()
+        self._stats = {"writes": 0, "opens": 0, "misses": 0, "evictions": 0}
+
+    @classmethod
+    def from_env(cls) -> "ArtifactStore":
+        """
+        Build from LUXEPLAN_ARTIFACT_DIR (empty disables the store) and
+        LUXEPLAN_ARTIFACT_DISK_BYTES.
+        """
+        return cls(
+            root=os.getenv("LUXEPLAN_ARTIFACT_DIR", DEFAULT_ARTIFACT_DIR) or None,
+            disk_budget=int(os.getenv("LUXEPLAN_ARTIFACT_DISK_BYTES", DEFAULT_DISK_BUDGET)),
+        )
+
+    # ── Public API ──
+
+    def put(self, image_id: str, kind: str, array: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Write an artifact (converted to the kind's dtype) and return it
+        memory-mapped, or None if the store is disabled or the write failed.
+        """
+        if self.root is None:
+            return None
+        array = np.ascontiguousarray(array, dtype=DTYPES[kind])
+        if array.nbytes > self.disk_budget:
+            return None
+        path = self.path(image_id, kind)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, array, allow_pickle=False)
+            replaced = file_size(path)
+            os.replace(tmp, path)
+        except OSError:
+            return None
+
+        written = file_size(path)
+        with self._lock:
+            self._stats["writes"] += 1
+        evicted = self._disk.record(written, replaced)
+        if evicted:
+            with self._lock:
+                self._stats["evictions"] += evicted
+        return self.open(image_id, kind)
+
+    def open(self, image_id: str, kind: str) -> Optional[np.ndarray]:
+        """The artifact as a read-only memory map, or None if not stored."""
+        if self.root is None:
+            return None
+        path = self.path(image_id, kind)
+        try:
+            array = np.load(path, mmap_mode="r", allow_pickle=False)
+            os.utime(path)  # refresh recency for pruning
+        except (OSError, ValueError):
+            with self._lock:
+                self._stats["misses"] += 1
+            return None
+        with self._lock:
+            self._stats["opens"] += 1
+        return array
+
+    def exists(self, image_id: str, kind: str) -> bool:
+        return self.root is not None and self.path(image_id, kind).is_file()
+
+    def path(self, image_id: str, kind: str) -> Path:
+        image_id = _UNSAFE.sub("_", image_id)
+        return self.root / image_id[:2] / image_id / f"{_UNSAFE.sub('_', kind)}.npy"
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "disk_bytes": self._disk.bytes if self._disk else None}
+
+
+artifact_store = ArtifactStore.from_env()
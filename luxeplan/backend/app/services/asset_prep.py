@@ -1,19 +1,188 @@
 """
 Asset Preparation Service
 Processes raw product images into insertion-ready alpha PNGs.
+
+`prepare` handles one upload on the thread pool. `prepare_many` runs a
+catalog import across the worker pool named by LUXEPLAN_ASSET_PREP_POOL
+(default "process"; "thread" suits hosts where the background-removal model
+releases the GIL and memory is tight): sources are pulled from the input
+lazily, at most LUXEPLAN_ASSET_PREP_IN_FLIGHT are held at once, and results
+are yielded as they finish. Sources may be raw bytes, a local path (read in
+the worker, so the bytes never cross the process boundary) or an http(s)
+URL, downloaded here first over the shared keep-alive client with
+http_client.fetch_limited: allowed hosts only, no redirects, and at most
+LUXEPLAN_ASSET_MAX_BYTES per image. An unknown pool name falls back to
+"process" with a warning.
+
+Before any preparation, inputs are fingerprinted and checked against the
+asset_dedup cache; a repeat or near-identical photo reuses the earlier
+alpha PNG and pose rating, and concurrent requests for the same bytes share
+one preparation.
 """
 
+import asyncio
 import io
+import logging
+import os
 import uuid
+from pathlib import Path
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, Optional, Union
+
+import httpx
 from PIL import Image
-from app.models import AssetPrepResponse
+from app.models import AssetPrepBatchItem, AssetPrepResponse
+from app.services.asset_dedup import AssetDedupCache, Fingerprint, asset_dedup, fingerprint
+from app.services.model_registry import model_registry
+from app.services.executors import cpu_pools
+from app.services.http_client import HttpClientPool, fetch_hosts_from_env, fetch_limited, http_pool
+
+logger = logging.getLogger(__name__)
+
+ImageSource = Union[bytes, str, os.PathLike]
+
+PREP_POOLS = ("process", "thread")
+
+
+def prep_pool_from_env() -> str:
+    pool = os.getenv("LUXEPLAN_ASSET_PREP_POOL", "process")
+    if pool not in PREP_POOLS:
+        logger.warning("Unknown LUXEPLAN_ASSET_PREP_POOL %r; using the process pool", pool)
+        return "process"
+    return pool
+
+
+PREP_POOL = prep_pool_from_env()
+# Default: keep every worker busy with one more item queued behind it.
+PREP_IN_FLIGHT = int(
+    os.getenv("LUXEPLAN_ASSET_PREP_IN_FLIGHT", 2 * getattr(cpu_pools, PREP_POOL).max_workers)
+)
+FETCH_TIMEOUT_S = 30.0
+MAX_ASSET_BYTES = int(os.getenv("LUXEPLAN_ASSET_MAX_BYTES", 25 * 1024 * 1024))
+
+
+def _load_model():
+    # In production: load rembg session for background removal
+    # from rembg import new_session
+    # return new_session("u2net")
+    return None
+
+
+model_registry.register("background_removal", _load_model)
+
+
+def _is_url(source: ImageSource) -> bool:
+    return isinstance(source, str) and source.startswith(("http://", "https://"))
+
+
+def _open_image(source: ImageSource) -> Image.Image:
+    if isinstance(source, bytes):
+        return Image.open(io.BytesIO(source))
+    return Image.open(Path(source))
+
+
+def _fingerprint_in_worker(source: ImageSource) -> Fingerprint:
+    return fingerprint(source if isinstance(source, bytes) else Path(source).read_bytes())
+
+
+def _prepare_in_worker(source: ImageSource, product_id: str) -> AssetPrepResponse:
+    """Worker entry point; each worker process loads its own session once."""
+    session = model_registry.get(AssetPrepService.model_name)
+    return prepare_image(source, product_id, session)
+
+
+def prepare_image(source: ImageSource, product_id: str, session) -> AssetPrepResponse:
+    img = _open_image(source)
+
+    # Step 1: Background removal
+    # In production: alpha_img = remove(img, session=session)
+
+    # Step 2: Crop to content
+    # bbox = alpha_img.getbbox()
+    # if bbox:
+    #     padding = 20
+    #     alpha_img = alpha_img.crop((
+    #         max(0, bbox[0] - padding),
+    #         max(0, bbox[1] - padding),
+    #         min(alpha_img.width, bbox[2] + padding),
+    #         min(alpha_img.height, bbox[3] + padding),
+    #     ))
+
+    # Step 3: Clean edges (alpha matting refinement)
+    # Apply Gaussian blur to alpha channel edges for smooth compositing
+
+    # Step 4: Pose quality assessment
+    pose_rating = assess_pose(img)
+    is_ready = pose_rating >= 6
+
+    # Step 5: Save alpha PNG
+    asset_id = str(uuid.uuid4())
+    alpha_url = f"/api/assets/{product_id}/{asset_id}_alpha.png"
+
+    rejection_reason = None
+    if not is_ready:
+        if pose_rating <= 3:
+            rejection_reason = "Lifestyle or environmental shot detected"
+        elif pose_rating <= 5:
+            rejection_reason = "Suboptimal angle for compositing"
+
+    return AssetPrepResponse(
+        alpha_png_url=alpha_url,
+        pose_rating=pose_rating,
+        is_insertion_ready=is_ready,
+        rejection_reason=rejection_reason,
+    )
+
+
+def assess_pose(img: Image.Image) -> int:
+    """
+    Assess pose quality of a product image.
+
+    Production implementation:
+    - Check aspect ratio (too extreme = lifestyle shot)
+    - Analyze background uniformity (solid bg = product shot)
+    - Edge complexity (simple silhouette = good product shot)
+    - Check for multiple objects (YOLO count)
+    - Analyze centering and framing
+    """
+    width, height = img.size
+    aspect = width / height
+
+    # Simple heuristic: square-ish images with uniform bg score higher
+    if 0.7 <= aspect <= 1.4:
+        return 8  # Good product shot aspect
+    elif 0.5 <= aspect <= 2.0:
+        return 6  # Acceptable
+    else:
+        return 4  # Likely lifestyle/wide shot
+
+
+async def _aiter(
+    items: Union[Iterable[tuple[str, ImageSource]], AsyncIterable[tuple[str, ImageSource]]],
+) -> AsyncIterator[tuple[str, ImageSource]]:
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
 
 
 class AssetPrepService:
-    def __init__(self):
-        # In production: load rembg model for background removal
-        # from rembg import remove
-        pass
+    model_name = "background_removal"
+
+    def __init__(
+        self,
+        dedup: AssetDedupCache = asset_dedup,
+        http: HttpClientPool = http_pool,
+        allowed_hosts: Optional[Iterable[str]] = None,
+    ):
+        self.dedup = dedup
+        self.http = http
+        # Hosts URL sources may be downloaded from; see http_client.
+        self.allowed_hosts = frozenset(
+            fetch_hosts_from_env() if allowed_hosts is None else allowed_hosts
+        )
+        self._in_flight: dict[str, asyncio.Future] = {}
 
     async def prepare(
         self, image_data: bytes, product_id: str
@@ -32,66 +201,106 @@ class AssetPrepService:
         - 5-6: Usable but imperfect (slight angle, partial crop)
         - 1-4: Rejected (lifestyle shot, multiple products, unusable angle)
         """
-        img = Image.open(io.BytesIO(image_data))
-
-        # Step 1: Background removal
-        # In production: alpha_img = remove(img)
-        alpha_img = img.convert("RGBA")
-
-        # Step 2: Crop to content
-        # bbox = alpha_img.getbbox()
-        # if bbox:
-        #     padding = 20
-        #     alpha_img = alpha_img.crop((
-        #         max(0, bbox[0] - padding),
-        #         max(0, bbox[1] - padding),
-        #         min(alpha_img.width, bbox[2] + padding),
-        #         min(alpha_img.height, bbox[3] + padding),
-        #     ))
-
-        # Step 3: Clean edges (alpha matting refinement)
-        # Apply Gaussian blur to alpha channel edges for smooth compositing
-
-        # Step 4: Pose quality assessment
-        pose_rating = self._assess_pose(img)
-        is_ready = pose_rating >= 6
-
-        # Step 5: Save alpha PNG
-        asset_id = str(uuid.uuid4())
-        alpha_url = f"/api/assets/{product_id}/{asset_id}_alpha.png"
-
-        rejection_reason = None
-        if not is_ready:
-            if pose_rating <= 3:
-                rejection_reason = "Lifestyle or environmental shot detected"
-            elif pose_rating <= 5:
-                rejection_reason = "Suboptimal angle for compositing"
-
-        return AssetPrepResponse(
-            alpha_png_url=alpha_url,
-            pose_rating=pose_rating,
-            is_insertion_ready=is_ready,
-            rejection_reason=rejection_reason,
-        )
+        fp = await cpu_pools.run_in_thread(fingerprint, image_data)
+
+        async def work() -> AssetPrepResponse:
+            session = await model_registry.get_async(self.model_name)
+            return await cpu_pools.run_in_thread(
+                prepare_image, image_data, product_id, session
+            )
+
+        return await self._prepared(fp, work)
 
-    def _assess_pose(self, img: Image.Image) -> int:
+    async def prepare_many(
+        self,
+        items: Union[Iterable[tuple[str, ImageSource]], AsyncIterable[tuple[str, ImageSource]]],
+        max_in_flight: Optional[int] = None,
+        pool: str = PREP_POOL,
+    ) -> AsyncIterator[AssetPrepBatchItem]:
         """
-        Assess pose quality of a product image.
-
-        Production implementation:
-        - Check aspect ratio (too extreme = lifestyle shot)
-        - Analyze background uniformity (solid bg = product shot)
-        - Edge complexity (simple silhouette = good product shot)
-        - Check for multiple objects (YOLO count)
-        - Analyze centering and framing
+        Run the preparation pipeline over (product_id, source) pairs on the
+        given worker pool ("process" or "thread"), yielding results in
+        completion order. `index` on each result is the item's position in
+        the input. A failed item yields an error instead of ending the
+        stream.
         """
-        width, height = img.size
-        aspect = width / height
-
-        # Simple heuristic: square-ish images with uniform bg score higher
-        if 0.7 <= aspect <= 1.4:
-            return 8  # Good product shot aspect
-        elif 0.5 <= aspect <= 2.0:
-            return 6  # Acceptable
-        else:
-            return 4  # Likely lifestyle/wide shot
+        run = cpu_pools.run_in_process if pool == "process" else cpu_pools.run_in_thread
+        limit = max(1, max_in_flight or PREP_IN_FLIGHT)
+        pending: set[asyncio.Task] = set()
+        client = self.http.client
+        try:
+            index = 0
+            async for product_id, source in _aiter(items):
+                if len(pending) >= limit:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        yield task.result()
+                pending.add(
+                    asyncio.create_task(
+                        self._prepare_one(run, index, product_id, source, client)
+                    )
+                )
+                index += 1
+
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield task.result()
+        finally:
+            # Consumer went away (e.g. client disconnect): stop waiting.
+            for task in pending:
+                task.cancel()
+
+    async def _prepare_one(
+        self,
+        run: Callable[..., Awaitable[AssetPrepResponse]],
+        index: int,
+        product_id: str,
+        source: ImageSource,
+        client: httpx.AsyncClient,
+    ) -> AssetPrepBatchItem:
+        try:
+            if _is_url(source):
+                source, _ = await fetch_limited(
+                    client, source, self.allowed_hosts, MAX_ASSET_BYTES, FETCH_TIMEOUT_S
+                )
+            fp = await run(_fingerprint_in_worker, source)
+            result = await self._prepared(
+                fp, lambda: run(_prepare_in_worker, source, product_id)
+            )
+        except Exception as exc:
+            return AssetPrepBatchItem(
+                index=index, product_id=product_id, error=f"{type(exc).__name__}: {exc}"
+            )
+        return AssetPrepBatchItem(index=index, product_id=product_id, result=result)
+
+    async def _prepared(
+        self, fp: Fingerprint, work: Callable[[], Awaitable[AssetPrepResponse]]
+    ) -> AssetPrepResponse:
+        """A reused result for fp if there is one, else the result of work()."""
+        while True:
+            hit = self.dedup.lookup(fp)
+            if hit is not None:
+                response, kind = hit
+                return response.model_copy(update={"reused": kind})
+            pending = self._in_flight.get(fp.exact)
+            if pending is None:
+                break
+            # Same bytes already being prepared: wait, then look again. If
+            # that preparation failed, another waiter may have taken over.
+            await asyncio.wait([pending])
+
+        done = asyncio.get_running_loop().create_future()
+        self._in_flight[fp.exact] = done
+        try:
+            response = await work()
+            self.dedup.add(fp, response)
+            return response
+        finally:
+            if self._in_flight.get(fp.exact) is done:
+                del self._in_flight[fp.exact]
+            done.set_result(None)
@@ -0,0 +1,180 @@
+"""
+Micro-Batching
+Coalesce concurrent inference calls into batched forward passes.
+
+A `MicroBatcher` wraps a batch function (list of inputs -> list of outputs,
+same order). Callers `await submit(item)`; items are collected until the
+batch is full or the oldest item has waited `max_wait_ms`, then one forward
+pass runs on the CPU worker pool and every caller's future is resolved.
+Batched inference amortizes per-call overhead and keeps SIMD lanes full.
+
+Limits come from LUXEPLAN_BATCH_MAX_SIZE / LUXEPLAN_BATCH_MAX_WAIT_MS, or
+per model from LUXEPLAN_<NAME>_BATCH_MAX_SIZE / LUXEPLAN_<NAME>_BATCH_MAX_WAIT_MS.
+Batch-size histograms and wait/run times are exposed via `metrics()`.
+"""
+
+import asyncio
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Generic, Optional, TypeVar
+
+from app.services.executors import cpu_pools
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass(frozen=True)
+class BatchConfig:
+    max_batch_size: int = 8
+    max_wait_ms: float = 5.0
+
+    @classmethod
+    def from_env(cls, name: str) -> "BatchConfig":
+        prefix = f"LUXEPLAN_{name.upper()}_BATCH"
+        size = os.getenv(f"{prefix}_MAX_SIZE", os.getenv("LUXEPLAN_BATCH_MAX_SIZE", "8"))
+        wait = os.getenv(f"{prefix}_MAX_WAIT_MS", os.getenv("LUXEPLAN_BATCH_MAX_WAIT_MS", "5"))
+        return cls(max_batch_size=max(1, int(size)), max_wait_ms=max(0.0, float(wait)))
+
+
+@dataclass
+class _Pending:
+    """Items collected on one event loop, waiting to be flushed."""
+
+    items: list = field(default_factory=list)
+    futures: list[asyncio.Future] = field(default_factory=list)
+    first_at: float = 0.0
+    timer: Optional[asyncio.TimerHandle] = None
+
+
+class MicroBatcher(Generic[T, R]):
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[list[T]], list[R]],
+        config: Optional[BatchConfig] = None,
+        executor: Optional[Executor] = None,
+    ):
+        self.name = name
+        self.fn = fn
+        self.config = config or BatchConfig.from_env(name)
+        self.executor = executor or cpu_pools.thread
+        # Futures belong to a loop, so pending items are kept per loop.
+        self._pending: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _Pending]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._failed = 0
+        self._wait_total_ms = 0.0
+        self._wait_max_ms = 0.0
+        self._run_total_ms = 0.0
+        self._size_histogram = [0] * self.config.max_batch_size
+
+    async def submit(self, item: T) -> R:
+        """Queue one input and wait for its output from a batched call."""
+        loop = asyncio.get_running_loop()
+        pending = self._pending.get(loop)
+        if pending is None:
+            pending = self._pending[loop] = _Pending()
+
+        future = loop.create_future()
+        if not pending.items:
+            pending.first_at = time.perf_counter()
+        pending.items.append(item)
+        pending.futures.append(future)
+
+        if len(pending.items) >= self.config.max_batch_size:
+            self._flush(loop)
+        elif pending.timer is None:
+            pending.timer = loop.call_later(
+                self.config.max_wait_ms / 1000, self._flush, loop
+            )
+        return await future
+
+    def _flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        pending = self._pending.get(loop)
+        if pending is None or not pending.items:
+            return
+        if pending.timer is not None:
+            pending.timer.cancel()
+        self._pending[loop] = _Pending()
+
+        wait_ms = (time.perf_counter() - pending.first_at) * 1000
+        loop.create_task(self._run(pending, wait_ms), name=f"batch:{self.name}")
+
+    async def _run(self, pending: _Pending, wait_ms: float) -> None:
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            results = await loop.run_in_executor(self.executor, self.fn, pending.items)
+            if len(results) != len(pending.items):
+                raise RuntimeError(
+                    f"{self.name}: batch of {len(pending.items)} returned {len(results)} outputs"
+                )
+        except Exception as exc:
+            self._record(len(pending.items), wait_ms, None)
+            for future in pending.futures:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        self._record(len(pending.items), wait_ms, (time.perf_counter() - started) * 1000)
+        for future, result in zip(pending.futures, results):
+            # A caller may have been cancelled while the batch ran.
+            if not future.done():
+                future.set_result(result)
+
+    def _record(self, size: int, wait_ms: float, run_ms: Optional[float]) -> None:
+        with self._lock:
+            self._batches += 1
+            self._items += size
+            self._size_histogram[size - 1] += 1
+            self._wait_total_ms += wait_ms
+            self._wait_max_ms = max(self._wait_max_ms, wait_ms)
+            if run_ms is None:
+                self._failed += 1
+            else:
+                self._run_total_ms += run_ms
+
+    def metrics(self) -> dict:
+        with self._lock:
+            batches = self._batches or 1
+            return {
+                "max_batch_size": self.config.max_batch_size,
+                "max_wait_ms": self.config.max_wait_ms,
+                "batches": self._batches,
+                "items": self._items,
+                "failed_batches": self._failed,
+                "avg_batch_size": round(self._items / batches, 3),
+                "wait_avg_ms": round(self._wait_total_ms / batches, 3),
+                "wait_max_ms": round(self._wait_max_ms, 3),
+                "run_avg_ms": round(self._run_total_ms / max(1, self._batches - self._failed), 3),
+                "batch_size_histogram": {
+                    str(size): count
+                    for size, count in enumerate(self._size_histogram, start=1)
+                    if count
+                },
+            }
+
+
+# Every batcher created through `batcher()`, for /metrics/batching.
+_batchers: dict[str, MicroBatcher] = {}
+
+
+def batcher(name: str, fn: Callable[[list[Any]], list[Any]], **kwargs: Any) -> MicroBatcher:
+    """Create and register a named batcher."""
+    if name in _batchers:
+        raise ValueError(f"Batcher already registered: {name}")
+    _batchers[name] = MicroBatcher(name, fn, **kwargs)
+    return _batchers[name]
+
+
+def batching_metrics() -> dict:
+    return {name: b.metrics() for name, b in _batchers.items()}
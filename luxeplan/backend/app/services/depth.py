@@ -3,33 +3,117 @@ Depth Estimation Service
 Monocular depth estimation using MiDaS or DPT for occlusion logic.
 """
 
+from typing import Any
+import numpy as np
 from PIL import Image
+from app.services.artifact_store import DEPTH, artifact_store
+from app.services.batching import batcher
+from app.services.depth_maps import depth_map_url, depth_maps
+from app.services.executors import cpu_pools
+from app.services.image_context import ScaledImage
+from app.services.plane_fitting import focal_length_px
+from app.services.model_registry import model_registry
+
+
+def _load_model():
+    # In production: load MiDaS or DPT model
+    # model = DPTForDepthEstimation.from_pretrained("Intel/dpt-large")
+    # processor = DPTImageProcessor.from_pretrained("Intel/dpt-large")
+    # return model, processor
+    return None
+
+
+model_registry.register("depth", _load_model)
+
+
+def _forward(images: list[Image.Image]) -> list[Any]:
+    """One batched forward pass; returns per-image depth in input order."""
+    # In production:
+    # model = model_registry.get("depth")
+    # inputs = processor(images=images, return_tensors="pt")
+    # with torch.inference_mode():
+    #     return list(model(**inputs).predicted_depth)
+    model_registry.get("depth")  # loaded, but unused by the stub
+    return [None] * len(images)
+
+
+_batcher = batcher("depth", _forward)
+
+
+# Development stub room: a level camera facing a back wall, which meets the
+# floor and ceiling at the rows where the segmentation stub puts them.
+_STUB_CAMERA_HEIGHT_M = 1.5
+_STUB_FLOOR_ROW = 0.7
+_STUB_CEILING_ROW = 0.08
+
+
+def _stub_depth(width: int, height: int) -> np.ndarray:
+    """
+    Metric depth of the stub room. Inverse depth of a horizontal plane is
+    linear in the row's offset from the horizon (the optical centre for a
+    level camera); the back wall caps depth.
+    """
+    focal = focal_length_px(width)
+    back_wall = focal * _STUB_CAMERA_HEIGHT_M / ((_STUB_FLOOR_ROW - 0.5) * height)
+    ceiling_above_camera = back_wall * (0.5 - _STUB_CEILING_ROW) * height / focal
+
+    rows = np.arange(height, dtype=np.float32) + 0.5 - height / 2
+    inv_depth = np.where(
+        rows >= 0,
+        rows / (focal * _STUB_CAMERA_HEIGHT_M),
+        -rows / (focal * ceiling_above_camera),
+    )
+    depth = 1.0 / np.maximum(inv_depth, 1.0 / back_wall)
+    return np.broadcast_to(depth[:, np.newaxis], (height, width))
 
 
 class DepthEstimationService:
-    def __init__(self):
-        # In production: load MiDaS or DPT model
-        # self.model = DPTForDepthEstimation.from_pretrained("Intel/dpt-large")
-        # self.processor = DPTImageProcessor.from_pretrained("Intel/dpt-large")
-        self._model_loaded = False
+    # Bump when the model or post-processing changes; keys cached results.
+    model_version = "heuristic-v2"
+    model_name = "depth"
 
-    async def estimate(self, image: Image.Image, image_id: str) -> str:
+    async def predict(self, image: ScaledImage) -> np.ndarray:
         """
-        Run monocular depth estimation.
-        Returns URL to the depth map image.
+        Run monocular depth estimation (at inference resolution).
+        Returns float32 metric depth (metres along the optical axis) with
+        the inference image's shape; read-only.
 
         Production implementation:
         1. Preprocess image through DPT processor
-        2. Run inference to get depth prediction
-        3. Normalize depth values to 0-255 range
-        4. Save as grayscale PNG
-        5. Upload to Supabase storage
-        6. Return public URL
+        2. Run inference to get depth prediction (batched with concurrent
+           requests)
+        3. Resize to the inference size; convert relative inverse depth to
+           metres (metric model, or scale from a known surface)
+        """
+        await _batcher.submit(image.image)
+
+        # Development stub: depth of a box-shaped room
+        return await cpu_pools.run_in_thread(_stub_depth, *image.image.size)
+
+    async def publish(self, depth: np.ndarray, image: ScaledImage, image_id: str) -> str:
+        """
+        Store a depth map for clients. Returns URL to the depth map image.
+
+        Production implementation:
+        1. Upsample to the original size with image.to_original_array()
+           and normalize depth values to 0-255 range
+        2. Save as grayscale PNG
+        3. Upload to Supabase storage
+        4. Return public URL
 
         The depth map is used by:
         - PlacementEngine for z-ordering
         - RenderingEngine for occlusion masking
         - Before/after compositing
         """
-        # Development stub: return placeholder URL
-        return f"/api/depth/{image_id}/depth_map.png"
+        # Development stub: placeholder URL
+        url = depth_map_url(image_id)
+        # Consumers on this host read the stored array (memory-mapped),
+        # not the PNG; other workers resolve the same URL to the same file.
+        stored = await cpu_pools.run_in_thread(artifact_store.put, image_id, DEPTH, depth)
+        depth_maps.put(url, depth if stored is None else stored)
+        return url
+
+    async def estimate(self, image: ScaledImage, image_id: str) -> str:
+        """Predict and publish in one call. Returns the depth map URL."""
+        return await self.publish(await self.predict(image), image, image_id)
@@ -0,0 +1,172 @@
+"""
+Depth Maps
+Decoded scene depth, loaded once per scene and shared by its consumers.
+
+`DepthMapCache` maps a depth_map_url to a read-only float array, kept in an
+LRU bounded by LUXEPLAN_DEPTH_CACHE_BYTES. Depth published on this host is
+a memory map of its artifact_store file (resolved from the local
+/api/depth/{image_id}/... URL), so consumers page in only the tiles they
+read and mapped entries don't count against the budget. Remote depth is
+fetched on first use, with concurrent requests for the same URL sharing one
+load. The URL comes from the client, so only http(s) URLs on the allowed
+hosts (http_client.fetch_hosts_from_env) are fetched, without following
+redirects; anything else is refused.
+
+Accepted encodings: .npy (metric float), 16-bit PNG (millimetres), float
+TIFF/PNG (metres), and 8-bit PNG in the legacy display convention
+(brighter = closer), which only preserves depth order. Consumers compare
+depths within one map, so order is all occlusion needs.
+"""
+
+import io
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+import httpx
+import numpy as np
+from PIL import Image
+
+from app.services.artifact_store import DEPTH, artifact_store
+from app.services.http_client import check_fetch_url, fetch_hosts_from_env
+
+DEFAULT_MEMORY_BUDGET = 128 * 1024 * 1024
+FETCH_TIMEOUT_S = 10.0
+
+_NPY_MAGIC = b"\x93NUMPY"
+# image ids are UUID-shaped; nothing that could step out of the artifact root.
+_LOCAL_DEPTH_URL = re.compile(r"^/api/depth/(?P<image_id>[A-Za-z0-9-]+)/depth_map\.png$")
+
+
+def depth_map_url(image_id: str) -> str:
+    return f"/api/depth/{image_id}/depth_map.png"
+
+
+def decode_depth(data: bytes) -> np.ndarray:
+    """Decode an encoded depth map to (H, W) float32 depth (larger = farther)."""
+    if data.startswith(_NPY_MAGIC):
+        return np.load(io.BytesIO(data), allow_pickle=False).astype(np.float32, copy=False)
+
+    image = Image.open(io.BytesIO(data))
+    if image.mode in ("I;16", "I;16B", "I"):
+        return np.asarray(image, dtype=np.float32) / 1000.0
+    if image.mode == "F":
+        return np.asarray(image, dtype=np.float32)
+    closeness = np.asarray(image.convert("L"), dtype=np.float32)
+    return 255.0 / np.maximum(closeness, 1.0)
+
+
+class DepthMapCache:
+    def __init__(
+        self, memory_budget: int = DEFAULT_MEMORY_BUDGET, allowed_hosts: Iterable[str] = ()
+    ):
+        self.memory_budget = memory_budget
+        self.allowed_hosts = {host.lower() for host in allowed_hosts}
+        self._maps: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._bytes = 0
+        self._loading: dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "loads": 0, "unavailable": 0, "evictions": 0}
+
+    @classmethod
+    def from_env(cls) -> "DepthMapCache":
+        return cls(
+            int(os.getenv("LUXEPLAN_DEPTH_CACHE_BYTES", DEFAULT_MEMORY_BUDGET)),
+            fetch_hosts_from_env(),
+        )
+
+    def put(self, url: str, depth: np.ndarray) -> None:
+        # A read-only view: consumers share it, and the caller's array is untouched.
+        if depth.dtype not in (np.float16, np.float32):
+            depth = depth.astype(np.float32)
+        depth = depth.view()
+        depth.flags.writeable = False
+        with self._lock:
+            self._remember(url, depth)
+
+    def get(self, url: str) -> Optional[np.ndarray]:
+        """
+        The decoded depth for url, loading it on a miss (blocking). None if
+        the URL only names depth from another process that isn't reachable
+        from here.
+        """
+        while True:
+            with self._lock:
+                depth = self._maps.get(url)
+                if depth is not None:
+                    self._maps.move_to_end(url)
+                    self._stats["hits"] += 1
+                    return depth
+                pending = self._loading.get(url)
+                if pending is None:
+                    self._loading[url] = threading.Event()
+                    break
+            pending.wait()
+            with self._lock:
+                if url not in self._maps:
+                    # The other load found nothing (or failed); don't retry in a loop.
+                    self._stats["unavailable"] += 1
+                    return None
+
+        try:
+            depth = self._load(url)
+            with self._lock:
+                if depth is None:
+                    self._stats["unavailable"] += 1
+                else:
+                    self._stats["loads"] += 1
+                    self._remember(url, depth)
+            return depth
+        finally:
+            with self._lock:
+                self._loading.pop(url).set()
+
+    def available(self, url: str) -> bool:
+        """
+        Whether get(url) can still find depth without it being re-published:
+        held here, stored on this host, or remote (not checked).
+        """
+        with self._lock:
+            if url in self._maps:
+                return True
+        local = _LOCAL_DEPTH_URL.match(url)
+        return local is None or artifact_store.exists(local["image_id"], DEPTH)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "entries": len(self._maps), "bytes": self._bytes}
+
+    def _remember(self, url: str, depth: np.ndarray) -> None:
+        if _resident_bytes(depth) > self.memory_budget:
+            return
+        previous = self._maps.pop(url, None)
+        if previous is not None:
+            self._bytes -= _resident_bytes(previous)
+        self._maps[url] = depth
+        self._bytes += _resident_bytes(depth)
+        while self._bytes > self.memory_budget:
+            _, evicted = self._maps.popitem(last=False)
+            self._bytes -= _resident_bytes(evicted)
+            self._stats["evictions"] += 1
+
+    def _load(self, url: str) -> Optional[np.ndarray]:
+        local = _LOCAL_DEPTH_URL.match(url)
+        if local:
+            return artifact_store.open(local["image_id"], DEPTH)
+
+        check_fetch_url(url, self.allowed_hosts)
+        response = httpx.get(url, timeout=FETCH_TIMEOUT_S, follow_redirects=False)
+        response.raise_for_status()
+        depth = decode_depth(response.content)
+        depth.flags.writeable = False
+        return depth
+
+
+def _resident_bytes(depth: np.ndarray) -> int:
+    # Mapped pages belong to the OS page cache, not this process's budget.
+    return 0 if isinstance(depth, np.memmap) else depth.nbytes
+
+
+depth_maps = DepthMapCache.from_env()
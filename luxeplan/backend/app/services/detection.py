@@ -5,8 +5,12 @@ trained on kitchen/bathroom fixtures.
 """
 
 import uuid
+from typing import Any
 from PIL import Image
 from app.models import AnchorPoint
+from app.services.batching import batcher
+from app.services.image_context import ScaledImage
+from app.services.model_registry import model_registry
 
 
 DETECTABLE_OBJECTS = [
@@ -28,24 +32,46 @@ DETECTABLE_OBJECTS = [
 ]
 
 
+def _load_model():
+    # In production: load YOLO or Faster R-CNN model fine-tuned
+    # on kitchen/bathroom fixtures dataset
+    # return YOLO("luxeplan-fixtures.pt")
+    return None
+
+
+model_registry.register("detection", _load_model)
+
+
+def _forward(images: list[Image.Image]) -> list[Any]:
+    """One batched forward pass; returns per-image detections in input order."""
+    # In production: YOLO letterboxes and stacks the batch itself
+    # model = model_registry.get("detection")
+    # return list(model.predict(images, verbose=False))
+    model_registry.get("detection")  # loaded, but unused by the stub
+    return [None] * len(images)
+
+
+_batcher = batcher("detection", _forward)
+
+
 class ObjectDetectionService:
-    def __init__(self):
-        # In production: load YOLO or Faster R-CNN model fine-tuned
-        # on kitchen/bathroom fixtures dataset
-        # self.model = YOLO("luxeplan-fixtures.pt")
-        self._model_loaded = False
+    # Bump when the model or post-processing changes; keys cached results.
+    model_version = "heuristic-v1"
+    model_name = "detection"
 
     async def detect(
-        self, image: Image.Image, image_id: str
+        self, image: ScaledImage, image_id: str
     ) -> list[AnchorPoint]:
         """
-        Run object detection on the input image.
-        Returns list of anchor points with bounding boxes and confidence.
+        Run object detection on the input image (at inference resolution).
+        Returns list of anchor points with bounding boxes and confidence, in
+        original image coordinates.
         """
-        width, height = image.size
+        width, height = image.image.size
+        await _batcher.submit(image.image)
 
         # Production implementation:
-        # 1. Run YOLO/RCNN inference
+        # 1. Run YOLO/RCNN inference (batched with concurrent requests)
         # 2. Filter by confidence threshold (> 0.5)
         # 3. Map detected classes to anchor labels
         # 4. Determine which plane each anchor sits on
@@ -151,4 +177,10 @@ class ObjectDetectionService:
             )
         )
 
-        return anchors
+        return [_to_original(anchor, image) for anchor in anchors]
+
+
+def _to_original(anchor: AnchorPoint, image: ScaledImage) -> AnchorPoint:
+    x, y = image.to_original(anchor.x, anchor.y)
+    width, height = image.to_original(anchor.width, anchor.height)
+    return anchor.model_copy(update={"x": x, "y": y, "width": width, "height": height})
@@ -0,0 +1,84 @@
+"""
+Disk Budget
+Byte accounting and pruning for a directory of cache files, shared by the
+analysis cache and the artifact store.
+
+The running total is seeded by one scan on first use and then updated per
+write. Once it exceeds the budget, files are deleted least recently used
+first (by mtime; readers touch files they open) until the directory is at
+90% of the budget. The directory may be shared by several processes, so a
+file can vanish between listing and stat; it then simply counts as gone.
+"""
+
+import threading
+from pathlib import Path
+from typing import Optional
+
+PRUNE_TARGET = 0.9
+
+
+def file_size(path: Path) -> int:
+    """Size of path in bytes, 0 if it doesn't exist (or no longer does)."""
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+class DiskBudget:
+    def __init__(self, root: Path, pattern: str, budget: int):
+        self.root = root
+        self.pattern = pattern
+        self.budget = budget
+        self._bytes: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def bytes(self) -> Optional[int]:
+        """Bytes on disk as last counted; None before the first write."""
+        return self._bytes
+
+    def record(self, written: int, replaced: int = 0) -> int:
+        """
+        Account for a file of `written` bytes that replaced one of
+        `replaced` bytes, pruning if that puts the directory over budget.
+        Returns the number of files evicted.
+        """
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = self.scan()
+            else:
+                self._bytes += written - replaced
+            over_budget = self._bytes > self.budget
+        return self.prune() if over_budget else 0
+
+    def scan(self) -> int:
+        return sum(file_size(path) for path in self.root.rglob(self.pattern))
+
+    def prune(self) -> int:
+        """Delete least recently used files until at PRUNE_TARGET of budget."""
+        entries = []
+        for path in self.root.rglob(self.pattern):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        target = int(self.budget * PRUNE_TARGET)
+        evicted = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+
+        with self._lock:
+            self._bytes = total
+        return evicted
@@ -0,0 +1,177 @@
+"""
+CPU Worker Pools
+Executors that keep PIL/NumPy work off the event loop, shared by the
+LuxePlan backend and the apps/vision microservice.
+
+- thread pool: PIL decode/filter/encode and NumPy release the GIL, so
+  threads scale for most image work without pickling overhead
+- process pool: pure-Python CPU work that holds the GIL; created on first
+  use so workers that never need it don't fork
+
+Each pool reports queue depth and submit-to-start wait times so it can be
+sized from production traffic. Configure with LUXEPLAN_CPU_THREADS and
+LUXEPLAN_CPU_PROCESSES.
+"""
+
+import asyncio
+import bisect
+import functools
+import os
+import threading
+import time
+from concurrent.futures import (
+    Executor,
+    Future,
+    InvalidStateError,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from typing import Any, Callable, Optional
+
+
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+def _run_timed(fn: Callable, args: tuple, kwargs: dict) -> tuple[Any, float, float]:
+    """Run fn and report wall-clock start/end, comparable across processes."""
+    started = time.time()
+    result = fn(*args, **kwargs)
+    return result, started, time.time()
+
+
+def _settle(future: Future, setter: Callable[[Any], None], value: Any) -> None:
+    # The awaiting side may have cancelled the future in the meantime.
+    if future.cancelled():
+        return
+    try:
+        setter(value)
+    except InvalidStateError:
+        pass
+
+
+class InstrumentedExecutor(Executor):
+    """Executor wrapper that records queue depth, wait and run times."""
+
+    def __init__(self, name: str, factory: Callable[[], Executor], max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self._factory = factory
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+        self._in_flight = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._wait_total_ms = 0.0
+        self._wait_max_ms = 0.0
+        self._run_total_ms = 0.0
+        self._wait_histogram = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def submit(self, fn: Callable, /, *args: Any, **kwargs: Any) -> Future:
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._factory()
+            self._in_flight += 1
+            self._submitted += 1
+            executor = self._executor
+
+        submitted_at = time.time()
+        inner = executor.submit(_run_timed, fn, args, kwargs)
+        outer: Future = Future()
+
+        def done(f: Future) -> None:
+            try:
+                result, started, finished = f.result()
+            except BaseException as exc:
+                self._record(None, None)
+                _settle(outer, outer.set_exception, exc)
+                return
+            self._record((started - submitted_at) * 1000, (finished - started) * 1000)
+            _settle(outer, outer.set_result, result)
+
+        inner.add_done_callback(done)
+        return outer
+
+    def _record(self, wait_ms: Optional[float], run_ms: Optional[float]) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if wait_ms is None:
+                self._failed += 1
+                return
+            wait_ms = max(0.0, wait_ms)
+            self._completed += 1
+            self._wait_total_ms += wait_ms
+            self._wait_max_ms = max(self._wait_max_ms, wait_ms)
+            self._run_total_ms += run_ms
+            self._wait_histogram[bisect.bisect_left(WAIT_BUCKETS_MS, wait_ms)] += 1
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            completed = self._completed or 1
+            histogram = {
+                f"le_{bound}ms": count
+                for bound, count in zip(WAIT_BUCKETS_MS, self._wait_histogram)
+            }
+            histogram["gt_max"] = self._wait_histogram[-1]
+            return {
+                "max_workers": self.max_workers,
+                "started": self._executor is not None,
+                "in_flight": self._in_flight,
+                "queue_depth": max(0, self._in_flight - self.max_workers),
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "wait_avg_ms": round(self._wait_total_ms / completed, 3),
+                "wait_max_ms": round(self._wait_max_ms, 3),
+                "run_avg_ms": round(self._run_total_ms / completed, 3),
+                "wait_histogram": histogram,
+            }
+
+
+class WorkerPools:
+    def __init__(self, threads: int, processes: int):
+        self.thread = InstrumentedExecutor(
+            "thread",
+            lambda: ThreadPoolExecutor(max_workers=threads, thread_name_prefix="cpu"),
+            threads,
+        )
+        self.process = InstrumentedExecutor(
+            "process",
+            lambda: ProcessPoolExecutor(max_workers=processes),
+            processes,
+        )
+
+    @classmethod
+    def from_env(cls) -> "WorkerPools":
+        cpus = os.cpu_count() or 2
+        return cls(
+            # Same default as ThreadPoolExecutor: threads also overlap I/O waits.
+            threads=int(os.getenv("LUXEPLAN_CPU_THREADS", min(32, cpus + 4))),
+            processes=int(os.getenv("LUXEPLAN_CPU_PROCESSES", cpus)),
+        )
+
+    async def run_in_thread(self, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.thread, functools.partial(fn, *args, **kwargs))
+
+    async def run_in_process(self, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        """fn and its arguments must be picklable (module-level functions)."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.process, functools.partial(fn, *args, **kwargs))
+
+    def metrics(self) -> dict:
+        return {"thread": self.thread.metrics(), "process": self.process.metrics()}
+
+    def shutdown(self) -> None:
+        self.thread.shutdown(wait=False)
+        self.process.shutdown(wait=False)
+
+
+cpu_pools = WorkerPools.from_env()
@@ -1,20 +1,130 @@
 """
 Gemini AI Service
 Two modes: Design Guidance (structured JSON) and Concept Render (photoreal image).
+
+Guidance calls the generateContent REST endpoint (GEMINI_API_BASE, so tests
+can point it at a local fake) and is answered from a response cache keyed on
+(image, room type, selections, preferences, model): users toggle selections
+back and forth, and each repeat would otherwise be paid for and waited on
+again. The image part of the key is the URL for http(s) images, so a hit
+never downloads the photo (a photo replaced in place is picked up once its
+entry expires); inline data: images are keyed by content hash. Identical
+concurrent requests share one upstream call. http(s) images are fetched
+with http_client.fetch_limited: allowed hosts only, no redirects, and at
+most LUXEPLAN_GUIDANCE_IMAGE_MAX_BYTES. A refused URL raises FetchRefused
+before the cache is consulted.
+Without GEMINI_API_KEY the development stub is returned. generateContent
+calls go through the "gemini" rate limiter (see rate_limit), which queues
+bursts and retries 429/503 with backoff. Requests use the shared
+keep-alive client (http_client.http_pool) unless one is injected.
+
+Cache: LUXEPLAN_GUIDANCE_CACHE_TTL_S, LUXEPLAN_GUIDANCE_CACHE_ENTRIES.
 """
 
+import base64
+import binascii
 import os
 import json
-from typing import Optional
+from typing import Awaitable, Callable, Iterable, Optional
+
+import httpx
+from pydantic import ValidationError
+
 from app.models import GeminiGuidanceResponse, ConceptRenderResponse
+from app.services.analysis_cache import content_hash
+from app.services.http_client import (
+    HttpClientPool,
+    check_fetch_url,
+    fetch_hosts_from_env,
+    fetch_limited,
+    http_pool,
+)
+from app.services.rate_limit import Throttled, limiter, parse_retry_after
+from app.services.response_cache import ResponseCache, canonical_key
+
+DEFAULT_API_BASE = "https://generativelanguage.googleapis.com/v1beta"
+DEFAULT_MODEL = "gemini-2.0-flash"
+REQUEST_TIMEOUT_S = 60.0
+MAX_IMAGE_BYTES = int(os.getenv("LUXEPLAN_GUIDANCE_IMAGE_MAX_BYTES", 20 * 1024 * 1024))
+
+GUIDANCE_PROMPT = """Analyze this {room_type} photo. Current selections: {selections}.
+Style preferences: {preferences}.
+Return ONLY valid JSON with:
+- style_summary: 2-sentence design direction
+- color_palette: array of 5 hex colors that complement the space
+- recommended_product_ids: array of product IDs from catalog
+- budget_warnings: array of cost concerns"""
+
+
+class GeminiError(RuntimeError):
+    """Upstream call failed or returned an unusable response."""
+
+
+def image_ref(image_url: str) -> str:
+    """Cache identity of an image: content hash for data: URLs, else the URL."""
+    if image_url.startswith("data:"):
+        return content_hash(image_url.partition(",")[2].encode())
+    return f"url:{image_url}"
+
+
+def guidance_key(
+    image_ref: str,
+    room_type: str,
+    current_selections: list[dict],
+    style_preferences: Optional[list[str]],
+    model: str,
+) -> str:
+    """Cache key; selection and preference order don't change the answer."""
+    return canonical_key(
+        image=image_ref,
+        room_type=room_type,
+        selections=sorted(
+            json.dumps(s, sort_keys=True, separators=(",", ":")) for s in current_selections
+        ),
+        preferences=sorted(set(style_preferences or [])),
+        model=model,
+    )
+
+
+def _parse_json_text(data: dict) -> dict:
+    try:
+        text = data["candidates"][0]["content"]["parts"][0]["text"].strip()
+    except (KeyError, IndexError, TypeError):
+        raise GeminiError("No response from Gemini")
+    # Strip markdown code fences if present
+    if text.startswith("```"):
+        text = text.split("\n", 1)[-1].rsplit("```", 1)[0]
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as exc:
+        raise GeminiError(f"Gemini returned invalid JSON: {exc}")
 
 
 class GeminiService:
-    def __init__(self):
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient] = None,
+        http: HttpClientPool = http_pool,
+        allowed_hosts: Optional[Iterable[str]] = None,
+    ):
         self.api_key = os.getenv("GEMINI_API_KEY", "")
-        # In production: initialize google.generativeai
-        # genai.configure(api_key=self.api_key)
-        # self.model = genai.GenerativeModel("gemini-2.0-flash")
+        self.api_base = os.getenv("GEMINI_API_BASE", DEFAULT_API_BASE).rstrip("/")
+        self.model_name = os.getenv("GEMINI_MODEL", DEFAULT_MODEL)
+        self._client = client
+        self.http = http
+        # Hosts room photos may be downloaded from; see http_client.
+        self.allowed_hosts = frozenset(
+            fetch_hosts_from_env() if allowed_hosts is None else allowed_hosts
+        )
+        self.limiter = limiter("gemini")
+        self.guidance_cache: ResponseCache[GeminiGuidanceResponse] = ResponseCache(
+            ttl_s=float(os.getenv("LUXEPLAN_GUIDANCE_CACHE_TTL_S", "900")),
+            max_entries=int(os.getenv("LUXEPLAN_GUIDANCE_CACHE_ENTRIES", "1024")),
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._client or self.http.client
 
     async def get_guidance(
         self,
@@ -25,18 +135,89 @@ class GeminiService:
     ) -> GeminiGuidanceResponse:
         """
         Design Guidance Mode.
-        Sends room photo and current state to Gemini.
-        Returns structured JSON with recommendations.
-
-        Production prompt:
-        "Analyze this {room_type} photo. Current selections: {selections}.
-         Style preferences: {preferences}.
-         Return ONLY valid JSON with:
-         - style_summary: 2-sentence design direction
-         - color_palette: array of 5 hex colors that complement the space
-         - recommended_product_ids: array of product IDs from catalog
-         - budget_warnings: array of cost concerns"
+        Sends room photo and current state to Gemini (GUIDANCE_PROMPT).
+        Returns structured JSON with recommendations; repeats of an earlier
+        request within the TTL are served from the cache.
         """
+        if not self.api_key:
+            return self._stub_guidance()
+        if not image_url.startswith("data:"):
+            check_fetch_url(image_url, self.allowed_hosts)
+
+        key = guidance_key(
+            image_ref(image_url), room_type, current_selections, style_preferences, self.model_name
+        )
+
+        async def call() -> GeminiGuidanceResponse:
+            # Only a miss pays for the download.
+            image, mime_type = await self._fetch_image(image_url)
+            prompt = GUIDANCE_PROMPT.format(
+                room_type=room_type,
+                selections=json.dumps(current_selections),
+                preferences=", ".join(style_preferences or []) or "none",
+            )
+            data = await self._generate(
+                [
+                    {"inlineData": {"mimeType": mime_type, "data": base64.b64encode(image).decode()}},
+                    {"text": prompt},
+                ]
+            )
+            try:
+                return GeminiGuidanceResponse.model_validate(_parse_json_text(data))
+            except ValidationError as exc:
+                raise GeminiError(f"Gemini response missing fields: {exc}")
+
+        response = await self.guidance_cache.get_or_compute(key, call)
+        return response.model_copy(deep=True)
+
+    async def _fetch_image(self, image_url: str) -> tuple[bytes, str]:
+        """Image bytes and MIME type from a data: or http(s) URL."""
+        if image_url.startswith("data:"):
+            header, _, payload = image_url.partition(",")
+            try:
+                return base64.b64decode(payload), header[5:].split(";")[0] or "image/jpeg"
+            except binascii.Error as exc:
+                raise GeminiError(f"Invalid data URL: {exc}")
+        try:
+            image, content_type = await fetch_limited(
+                self.client, image_url, self.allowed_hosts, MAX_IMAGE_BYTES
+            )
+        except httpx.HTTPError as exc:
+            raise GeminiError(f"Could not fetch image: {exc}")
+        return image, content_type.split(";")[0] or "image/jpeg"
+
+    async def _generate(self, parts: list[dict]) -> dict:
+        """One generateContent call with a JSON response, within the rate limit."""
+
+        async def post() -> httpx.Response:
+            response = await self.client.post(
+                f"{self.api_base}/models/{self.model_name}:generateContent",
+                headers={"x-goog-api-key": self.api_key},
+                timeout=REQUEST_TIMEOUT_S,
+                json={
+                    "contents": [{"role": "user", "parts": parts}],
+                    "generationConfig": {"responseMimeType": "application/json"},
+                },
+            )
+            if response.status_code in (429, 503):
+                raise Throttled(
+                    f"Gemini API throttled: {response.status_code}",
+                    parse_retry_after(response.headers.get("retry-after")),
+                )
+            return response
+
+        try:
+            response = await self.limiter.call(post)
+        except Throttled as exc:
+            raise GeminiError(f"{exc} (gave up after retries)")
+        except httpx.HTTPError as exc:
+            raise GeminiError(f"Gemini API unreachable: {exc}")
+        if response.status_code != 200:
+            raise GeminiError(f"Gemini API failed: {response.status_code} {response.text[:500]}")
+        return response.json()
+
+    @staticmethod
+    def _stub_guidance() -> GeminiGuidanceResponse:
         # Development stub
         return GeminiGuidanceResponse(
             style_summary=(
@@ -64,18 +245,28 @@ class GeminiService:
         segmentation_masks: list[dict],
         current_design_state: dict,
         requested_change: str,
+        on_progress: Optional[Callable[[float, str], Awaitable[None]]] = None,
     ) -> ConceptRenderResponse:
         """
         Concept Render Mode.
         When live compositing can't credibly insert a product, generate
         a cinematic photoreal render using Gemini's image generation.
+        Takes tens of seconds; run it through render_jobs, which passes
+        on_progress(fraction, stage) to report each step.
 
         Production flow:
         1. Send original image + masks + design state to Gemini
         2. Prompt for photorealistic interior design rendering
         3. Return the generated image URL and change summary
         """
+        async def progress(fraction: float, stage: str) -> None:
+            if on_progress is not None:
+                await on_progress(fraction, stage)
+
+        await progress(0.1, "Preparing inputs")
+        await progress(0.3, "Rendering")
         # Development stub
+        await progress(0.9, "Uploading render")
         return ConceptRenderResponse(
             render_url="/api/renders/concept_placeholder.jpg",
             changes_summary=[
@@ -0,0 +1,253 @@
+"""
+Shared HTTP Client
+One pooled, keep-alive httpx.AsyncClient for all outbound calls (Gemini,
+ingestion adapters, asset downloads), so repeat calls to a host reuse an
+open connection instead of paying a TCP + TLS handshake each time.
+
+The lifespan opens the client and closes it on shutdown; outside the app
+(scripts, benchmarks) it is opened on first use. Services take the pool by
+injection and read `.client` per call.
+
+- HTTP/2 when the h2 package is installed (LUXEPLAN_HTTP2=0 disables)
+- LUXEPLAN_HTTP_MAX_CONNECTIONS / LUXEPLAN_HTTP_MAX_KEEPALIVE: pool size
+- LUXEPLAN_HTTP_MAX_PER_HOST: concurrent requests per host; the rest queue
+  here rather than opening more connections to one upstream
+- LUXEPLAN_HTTP_CONNECT_TIMEOUT_S / LUXEPLAN_HTTP_TIMEOUT_S: timeouts
+  (callers may pass a longer per-request timeout)
+
+Per host, the transport records requests, new vs reused connections,
+errors and time to response headers.
+
+URLs that come from clients (product photos, room photos, depth maps) go
+through `fetch_limited`: only http(s) on an allowed host (SUPABASE_URL's
+host plus LUXEPLAN_FETCH_HOSTS, comma-separated), no redirects, and the
+body is streamed with a cap of LUXEPLAN_FETCH_MAX_BYTES, so a request can
+neither reach internal addresses nor pin unbounded memory.
+"""
+
+import asyncio
+import bisect
+import os
+import time
+from importlib.util import find_spec
+from typing import AsyncIterator, Callable, Iterable, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from app.services.executors import WAIT_BUCKETS_MS
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response body that frees the host slot once it is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+class HostStats:
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self.errors = 0
+        self.latency_total_ms = 0.0
+        self.latency_max_ms = 0.0
+        self.latency_histogram = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def record(self, latency_ms: float, new_connection: bool) -> None:
+        self.requests += 1
+        self.new_connections += new_connection
+        self.latency_total_ms += latency_ms
+        self.latency_max_ms = max(self.latency_max_ms, latency_ms)
+        self.latency_histogram[bisect.bisect_left(WAIT_BUCKETS_MS, latency_ms)] += 1
+
+    def snapshot(self) -> dict:
+        requests = self.requests or 1
+        histogram = {
+            f"le_{bound}ms": count
+            for bound, count in zip(WAIT_BUCKETS_MS, self.latency_histogram)
+        }
+        histogram["gt_max"] = self.latency_histogram[-1]
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reuse_rate": round(1 - self.new_connections / requests, 4) if self.requests else 0.0,
+            "errors": self.errors,
+            "latency_avg_ms": round(self.latency_total_ms / requests, 3),
+            "latency_max_ms": round(self.latency_max_ms, 3),
+            "latency_histogram": histogram,
+        }
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """Per-host concurrency cap and connection-reuse/latency metrics."""
+
+    def __init__(
+        self, inner: httpx.AsyncBaseTransport, max_per_host: int, stats: dict[str, HostStats]
+    ):
+        self._inner = inner
+        self._max_per_host = max_per_host
+        self._slots: dict[str, asyncio.Semaphore] = {}
+        self._stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = f"{request.url.host}:{request.url.port or (443 if request.url.scheme == 'https' else 80)}"
+        stats = self._stats.setdefault(host, HostStats())
+        slot = self._slots.setdefault(host, asyncio.Semaphore(self._max_per_host))
+        new_connection = False
+        outer_trace = request.extensions.get("trace")
+
+        async def trace(event: str, info: dict) -> None:
+            nonlocal new_connection
+            if event == "connection.connect_tcp.complete":
+                new_connection = True
+            if outer_trace is not None:
+                await outer_trace(event, info)
+
+        request.extensions = {**request.extensions, "trace": trace}
+        await slot.acquire()
+        started = time.perf_counter()
+        try:
+            response = await self._inner.handle_async_request(request)
+        except BaseException:
+            slot.release()
+            stats.errors += 1
+            raise
+        stats.record((time.perf_counter() - started) * 1000, new_connection)
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_ReleasingStream(response.stream, slot.release),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+class HttpClientPool:
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive: int = 20,
+        max_per_host: int = 20,
+        keepalive_expiry_s: float = 30.0,
+        connect_timeout_s: float = 5.0,
+        timeout_s: float = 30.0,
+        http2: bool = True,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry_s,
+        )
+        self.max_per_host = max_per_host
+        self.timeout = httpx.Timeout(timeout_s, connect=connect_timeout_s)
+        self.http2 = http2 and find_spec("h2") is not None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._hosts: dict[str, HostStats] = {}
+
+    @classmethod
+    def from_env(cls) -> "HttpClientPool":
+        return cls(
+            max_connections=int(os.getenv("LUXEPLAN_HTTP_MAX_CONNECTIONS", "100")),
+            max_keepalive=int(os.getenv("LUXEPLAN_HTTP_MAX_KEEPALIVE", "20")),
+            max_per_host=int(os.getenv("LUXEPLAN_HTTP_MAX_PER_HOST", "20")),
+            connect_timeout_s=float(os.getenv("LUXEPLAN_HTTP_CONNECT_TIMEOUT_S", "5")),
+            timeout_s=float(os.getenv("LUXEPLAN_HTTP_TIMEOUT_S", "30")),
+            http2=os.getenv("LUXEPLAN_HTTP2", "1") != "0",
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            transport = httpx.AsyncHTTPTransport(limits=self.limits, http2=self.http2)
+            self._client = httpx.AsyncClient(
+                transport=InstrumentedTransport(transport, self.max_per_host, self._hosts),
+                timeout=self.timeout,
+            )
+        return self._client
+
+    async def open(self) -> httpx.AsyncClient:
+        return self.client
+
+    async def close(self) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    def stats(self) -> dict:
+        return {
+            "open": self._client is not None and not self._client.is_closed,
+            "http2": self.http2,
+            "max_per_host": self.max_per_host,
+            "hosts": {host: stats.snapshot() for host, stats in self._hosts.items()},
+        }
+
+
+http_pool = HttpClientPool.from_env()
+
+
+# ── Client-supplied URLs ──
+
+MAX_FETCH_BYTES = int(os.getenv("LUXEPLAN_FETCH_MAX_BYTES", 32 * 1024 * 1024))
+
+
+class FetchRefused(ValueError):
+    """A client-supplied URL that is not fetched: off the allow-list, a redirect, or too large."""
+
+
+def fetch_hosts_from_env() -> frozenset[str]:
+    hosts = {h.strip().lower() for h in os.getenv("LUXEPLAN_FETCH_HOSTS", "").split(",")}
+    supabase_host = urlparse(os.getenv("SUPABASE_URL", "")).hostname
+    if supabase_host:
+        hosts.add(supabase_host)
+    hosts.discard("")
+    return frozenset(hosts)
+
+
+def check_fetch_url(url: str, allowed_hosts: Iterable[str]) -> None:
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or (parsed.hostname or "") not in allowed_hosts:
+        raise FetchRefused(f"URL not on an allowed host: {url}")
+
+
+async def fetch_limited(
+    client: httpx.AsyncClient,
+    url: str,
+    allowed_hosts: Iterable[str],
+    max_bytes: int = MAX_FETCH_BYTES,
+    timeout_s: Optional[float] = None,
+) -> tuple[bytes, str]:
+    """
+    (body, content type) of a client-supplied URL; timeout_s defaults to
+    the client's. Raises FetchRefused for a URL off the allow-list, a
+    redirect or a body over max_bytes, and httpx.HTTPError for transport
+    and status errors.
+    """
+    check_fetch_url(url, allowed_hosts)
+    timeout = httpx.USE_CLIENT_DEFAULT if timeout_s is None else timeout_s
+    async with client.stream("GET", url, timeout=timeout, follow_redirects=False) as response:
+        if response.is_redirect:
+            raise FetchRefused(f"Redirects are not followed: {url}")
+        response.raise_for_status()
+        declared = response.headers.get("content-length", "")
+        if declared.isdigit() and int(declared) > max_bytes:
+            raise FetchRefused(f"Body over {max_bytes} bytes: {url}")
+        body = bytearray()
+        async for chunk in response.aiter_bytes():
+            body += chunk
+            if len(body) > max_bytes:
+                raise FetchRefused(f"Body over {max_bytes} bytes: {url}")
+        return bytes(body), response.headers.get("content-type", "")
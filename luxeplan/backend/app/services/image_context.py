@@ -0,0 +1,205 @@
+"""
+Image Context
+Decode an upload once and share it across vision stages.
+
+`ImageContext` reads only the header up front, so stages that need just the
+image size never decode pixels. Pixel views (RGB, RGBA, grayscale, NumPy
+arrays, downscaled pyramid levels) are derived lazily from a single decode
+and cached; NumPy channel views are zero-copy slices of that decode where
+the source mode allows it. All lazy views are guarded by one lock, so
+concurrent stages on worker threads never decode twice.
+
+Models don't need sensor resolution. `for_inference()` picks the pyramid
+level whose long side fits LUXEPLAN_INFERENCE_MAX_SIDE (default 1024, so
+inputs land between 512 and 1024 px), and JPEG pyramid levels are decoded
+straight at 1/2, 1/4 or 1/8 scale via libjpeg's draft mode, so a 48MP upload
+never materializes at full size unless a stage asks for it. The returned
+`ScaledImage` maps results back to original coordinates.
+"""
+
+import io
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import numpy as np
+from PIL import Image
+
+INFERENCE_MAX_SIDE = int(os.getenv("LUXEPLAN_INFERENCE_MAX_SIDE", "1024"))
+
+# libjpeg can scale by 1/2, 1/4 and 1/8 while decoding.
+_JPEG_MAX_DRAFT_LEVEL = 3
+
+
+@dataclass(frozen=True)
+class ScaledImage:
+    """An inference input plus the mapping back to the original image."""
+
+    image: Image.Image
+    original_size: tuple[int, int]
+
+    @property
+    def scale_x(self) -> float:
+        return self.original_size[0] / self.image.width
+
+    @property
+    def scale_y(self) -> float:
+        return self.original_size[1] / self.image.height
+
+    def to_original(self, x: float, y: float) -> tuple[float, float]:
+        """Map a point (or a width/height pair) to original pixels."""
+        return x * self.scale_x, y * self.scale_y
+
+    def to_original_polygon(self, polygon: list[list[float]]) -> list[list[float]]:
+        return [list(self.to_original(x, y)) for x, y in polygon]
+
+    def to_original_area(self, area: float) -> float:
+        return area * self.scale_x * self.scale_y
+
+    def to_original_array(
+        self, array: np.ndarray, resample: Image.Resampling = Image.Resampling.BILINEAR
+    ) -> np.ndarray:
+        """Resize a per-pixel map (depth, mask) to the original image size."""
+        if array.shape[:2] == (self.original_size[1], self.original_size[0]):
+            return array
+        source = array.astype(np.float32) if array.dtype == np.float16 else array
+        resized = np.asarray(Image.fromarray(source).resize(self.original_size, resample))
+        return resized.astype(array.dtype, copy=False)
+
+
+class ImageContext:
+    def __init__(self, data: bytes):
+        self.data = data
+        self._source = Image.open(io.BytesIO(data))
+        self.size: tuple[int, int] = self._source.size
+        self.format = self._source.format
+        self._views: dict[Any, Any] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def width(self) -> int:
+        return self.size[0]
+
+    @property
+    def height(self) -> int:
+        return self.size[1]
+
+    def _view(self, key: Any, build: Callable[[], Any]) -> Any:
+        view = self._views.get(key)
+        if view is None:
+            with self._lock:
+                view = self._views.get(key)
+                if view is None:
+                    view = build()
+                    self._views[key] = view
+        return view
+
+    # ── PIL views ──
+
+    @property
+    def image(self) -> Image.Image:
+        """The decoded image in its native mode."""
+        def build() -> Image.Image:
+            self._source.load()
+            return self._source
+
+        return self._view("image", build)
+
+    @property
+    def rgb(self) -> Image.Image:
+        return self._view("rgb", lambda: self._convert("RGB"))
+
+    @property
+    def rgba(self) -> Image.Image:
+        return self._view("rgba", lambda: self._convert("RGBA"))
+
+    @property
+    def gray(self) -> Image.Image:
+        return self._view("gray", lambda: self._convert("L"))
+
+    def _convert(self, mode: str) -> Image.Image:
+        image = self.image
+        return image if image.mode == mode else image.convert(mode)
+
+    def pyramid(self, level: int) -> Image.Image:
+        """
+        RGB image downscaled by 2**level (level 0 is full resolution), each
+        side rounded up.
+
+        Until something needs the full decode, JPEG levels are decoded
+        directly at reduced scale; other levels reduce the level above.
+        """
+        if level <= 0:
+            return self.rgb
+        return self._view(("pyramid", level), lambda: self._build_level(level))
+
+    def _build_level(self, level: int) -> Image.Image:
+        if self.format == "JPEG" and "image" not in self._views:
+            # Decode at the deepest draft scale this level allows, then
+            # reduce the rest; bypasses (and never caches) the full decode.
+            draft_level = min(level, _JPEG_MAX_DRAFT_LEVEL)
+            if ("pyramid", draft_level) in self._views and draft_level < level:
+                return self.pyramid(draft_level).reduce(2 ** (level - draft_level))
+            factor = 2 ** draft_level
+            draft = Image.open(io.BytesIO(self.data))
+            # draft() picks the largest scale whose output is at least the
+            # requested size, and returns the scaled source box. A side
+            # shorter than the factor still asks for one pixel, not zero.
+            applied = draft.draft(
+                "RGB", (max(1, self.width // factor), max(1, self.height // factor))
+            )
+            scale = round(self.width / applied[1][2]) if applied else 1
+            decoded = draft.convert("RGB") if draft.mode != "RGB" else draft
+            decoded.load()
+            if scale != factor:
+                decoded = decoded.reduce(factor // scale)
+            if draft_level < level:
+                self._views[("pyramid", draft_level)] = decoded
+                return decoded.reduce(2 ** (level - draft_level))
+            return decoded
+        return self.pyramid(level - 1).reduce(2)
+
+    def inference_level(self, max_side: int = INFERENCE_MAX_SIDE) -> int:
+        """Smallest pyramid level whose long side is at most `max_side`."""
+        level, side = 0, max(self.size)
+        while side > max_side:
+            level += 1
+            side = (side + 1) // 2
+        return level
+
+    def for_inference(self, max_side: int = INFERENCE_MAX_SIDE) -> ScaledImage:
+        """The RGB input for a model, at the input-resolution policy's size."""
+        return ScaledImage(self.pyramid(self.inference_level(max_side)), self.size)
+
+    # ── NumPy views (read-only) ──
+
+    @property
+    def array(self) -> np.ndarray:
+        """Pixels in the native mode; the one copy every other array view slices."""
+        return self._view("array", lambda: np.asarray(self.image))
+
+    @property
+    def rgb_array(self) -> np.ndarray:
+        def build() -> np.ndarray:
+            if self.image.mode == "RGB":
+                return self.array
+            if self.image.mode == "RGBA":
+                return self.array[..., :3]
+            return np.asarray(self.rgb)
+
+        return self._view("rgb_array", build)
+
+    @property
+    def alpha_array(self) -> np.ndarray:
+        """Alpha channel; fully opaque (broadcast, no allocation) if absent."""
+        def build() -> np.ndarray:
+            if self.image.mode == "RGBA":
+                return self.array[..., 3]
+            return np.broadcast_to(np.uint8(255), (self.height, self.width))
+
+        return self._view("alpha_array", build)
+
+    @property
+    def gray_array(self) -> np.ndarray:
+        return self._view("gray_array", lambda: np.asarray(self.gray))
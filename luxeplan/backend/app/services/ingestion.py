@@ -3,11 +3,40 @@ Product Ingestion Service
 Adapters for sourcing products from various platforms.
 All adapters normalize into the product_catalog schema
 and run AssetPrepService before eligibility for Live mode.
+Adapter calls run through each platform's rate limiter (see rate_limit),
+and adapters share the app's keep-alive HTTP client (see http_client).
+
+`stream_all_sources` queries every source at once and yields each one's
+products as soon as its search returns, so the fastest source sets
+time-to-first-result; asset preparation then runs in the background and
+the source's products are yielded again once it finishes. Each source's
+search has its own timeout (LUXEPLAN_INGEST_<SOURCE>_TIMEOUT_S, else
+LUXEPLAN_INGEST_TIMEOUT_S) and reports its own failure without affecting
+the others. Preparation isn't timed out: a slow image host delays the
+second event, not the search result. Product images are only downloaded
+from the allowed hosts (see http_client), so each source's image CDN must
+be listed in LUXEPLAN_FETCH_HOSTS.
 """
 
+import asyncio
+import logging
+import os
+import time
 from abc import ABC, abstractmethod
-from typing import Optional
-from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+from dataclasses import dataclass, field
+
+from app.services.asset_prep import AssetPrepService
+from app.services.http_client import HttpClientPool, http_pool
+from app.services.rate_limit import RateLimiter, limiter
+
+logger = logging.getLogger(__name__)
+
+SOURCE_TIMEOUT_S = float(os.getenv("LUXEPLAN_INGEST_TIMEOUT_S", "15"))
+
+
+def source_timeout(source: str) -> float:
+    return float(os.getenv(f"LUXEPLAN_INGEST_{source.upper()}_TIMEOUT_S", SOURCE_TIMEOUT_S))
 
 
 @dataclass
@@ -28,10 +57,43 @@ class NormalizedProduct:
     dimensions: Optional[dict] = None
     room_types: list[str] | None = None
     style_tags: list[str] | None = None
+    # Set by asset preparation
+    alpha_png_url: Optional[str] = None
+    pose_rating: Optional[int] = None
+    is_insertion_ready: bool = False
+
+
+@dataclass
+class SourceResult:
+    """One source's outcome in a cross-source search."""
+
+    source: str
+    status: str  # ok, error, timeout
+    elapsed_ms: float
+    products: list[NormalizedProduct] = field(default_factory=list)
+    error: Optional[str] = None
+    # False on the search result; True once asset prep has filled in the
+    # products' alpha PNGs and insertion readiness.
+    assets_ready: bool = False
 
 
 class ProductIngestionAdapter(ABC):
-    """Base adapter interface for product ingestion."""
+    """
+    Base adapter interface for product ingestion.
+    Implementations raise rate_limit.Throttled when the platform answers
+    429/503; calls are retried with backoff within the platform's budget.
+    """
+
+    # Rate limiter key; shared by every adapter instance for the platform.
+    upstream: str = ""
+
+    def __init__(self, http: HttpClientPool = http_pool):
+        # Make requests with self.http.client; never open a client per call.
+        self.http = http
+
+    @property
+    def limiter(self) -> RateLimiter:
+        return limiter(self.upstream or type(self).__name__.lower())
 
     @abstractmethod
     async def search(self, query: str, limit: int = 20) -> list[NormalizedProduct]:
@@ -58,9 +120,12 @@ class PinterestAdapter(ProductIngestionAdapter):
     and extract product links from pins.
     """
 
+    upstream = "pinterest"
+
     async def search(self, query: str, limit: int = 20) -> list[NormalizedProduct]:
         # Production: Call Pinterest API
         # GET https://api.pinterest.com/v5/search/pins?query={query}
+        # via self.http.client
         return []
 
     async def get_product(self, product_id: str) -> Optional[NormalizedProduct]:
@@ -79,6 +144,8 @@ class SerpAdapter(ProductIngestionAdapter):
     products with prices and images.
     """
 
+    upstream = "serp"
+
     async def search(self, query: str, limit: int = 20) -> list[NormalizedProduct]:
         # Production: Call SerpAPI
         # GET https://serpapi.com/search?engine=google_shopping&q={query}
@@ -100,6 +167,8 @@ class HomeDepotAdapter(ProductIngestionAdapter):
     pricing, and availability.
     """
 
+    upstream = "homedepot"
+
     async def search(self, query: str, limit: int = 20) -> list[NormalizedProduct]:
         # Production: Call Home Depot API
         return []
@@ -119,11 +188,14 @@ class ProductIngestionService:
     Normalizes data and runs asset preparation.
     """
 
-    def __init__(self):
+    def __init__(
+        self, asset_prep: Optional[AssetPrepService] = None, http: HttpClientPool = http_pool
+    ):
+        self.asset_prep = asset_prep or AssetPrepService(http=http)
         self.adapters: dict[str, ProductIngestionAdapter] = {
-            "pinterest": PinterestAdapter(),
-            "serp": SerpAdapter(),
-            "homedepot": HomeDepotAdapter(),
+            "pinterest": PinterestAdapter(http),
+            "serp": SerpAdapter(http),
+            "homedepot": HomeDepotAdapter(http),
         }
 
     async def ingest_from_source(
@@ -142,34 +214,103 @@ class ProductIngestionService:
         4. Insert into product_catalog with insertion_ready status
         5. Return results
         """
+        products = await self.search_source(source, query, limit)
+        await self.prepare_assets(products)
+        return products
+
+    async def search_source(
+        self, source: str, query: str, limit: int = 20
+    ) -> list[NormalizedProduct]:
+        """Search one source within its rate limit; no asset preparation."""
         adapter = self.adapters.get(source)
         if not adapter:
             raise ValueError(f"Unknown source: {source}")
-
-        products = await adapter.search(query, limit)
-
-        # In production: for each product, run asset prep
-        # for product in products:
-        #     prep_result = await asset_prep.prepare(product.image_url, product.source_id)
-        #     product.is_insertion_ready = prep_result.is_insertion_ready
-
-        return products
+        return await adapter.limiter.call(lambda: adapter.search(query, limit))
+
+    async def prepare_assets(self, products: list[NormalizedProduct]) -> None:
+        """Run asset prep for every product image in one bulk pass."""
+        items = ((product.source_id, product.image_url) for product in products)
+        async for item in self.asset_prep.prepare_many(items):
+            if item.result is None:
+                continue  # left not insertion-ready
+            product = products[item.index]
+            product.alpha_png_url = item.result.alpha_png_url
+            product.pose_rating = item.result.pose_rating
+            product.is_insertion_ready = item.result.is_insertion_ready
 
     async def ingest_all_sources(
         self, query: str, limit: int = 10
     ) -> list[NormalizedProduct]:
         """Search all adapters in parallel and merge results."""
-        import asyncio
-
-        tasks = [
-            self.ingest_from_source(source, query, limit)
-            for source in self.adapters
-        ]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
         all_products = []
-        for result in results:
-            if isinstance(result, list):
-                all_products.extend(result)
-
+        async for result in self.stream_all_sources(query, limit):
+            if not result.assets_ready:
+                # Prepared in place; the later event carries the same objects.
+                all_products.extend(result.products)
         return all_products
+
+    async def stream_all_sources(
+        self,
+        query: str,
+        limit: int = 10,
+        sources: Optional[list[str]] = None,
+        prepare: bool = True,
+    ) -> AsyncIterator[SourceResult]:
+        """
+        Search the given sources (default: all) in parallel, yielding a
+        SourceResult per source as its search returns, in completion order.
+        A source that raises or exceeds its timeout yields an error result;
+        the rest carry on. With prepare=True, each source that found
+        products yields a second result (assets_ready=True) once their
+        assets are prepared.
+        """
+        names = sources or list(self.adapters)
+        unknown = [name for name in names if name not in self.adapters]
+        if unknown:
+            raise ValueError(f"Unknown source: {', '.join(unknown)}")
+
+        started = time.perf_counter()
+
+        def elapsed_ms() -> float:
+            return round((time.perf_counter() - started) * 1000, 1)
+
+        async def search(source: str) -> SourceResult:
+            timeout = source_timeout(source)
+            try:
+                products = await asyncio.wait_for(
+                    self.search_source(source, query, limit), timeout
+                )
+            except asyncio.TimeoutError:
+                status, products, error = "timeout", [], f"No response within {timeout:g}s"
+            except Exception as exc:
+                logger.warning("Ingestion from %s failed", source, exc_info=True)
+                status, products, error = "error", [], f"{type(exc).__name__}: {exc}"
+            else:
+                status, error = "ok", None
+            ready = not (prepare and products)
+            return SourceResult(source, status, elapsed_ms(), products, error, ready)
+
+        async def prepare_source(result: SourceResult) -> SourceResult:
+            error = None
+            try:
+                await self.prepare_assets(result.products)
+            except Exception as exc:
+                logger.warning("Asset prep for %s failed", result.source, exc_info=True)
+                error = f"Asset preparation failed: {type(exc).__name__}: {exc}"
+            return SourceResult(
+                result.source, result.status, elapsed_ms(), result.products, error, True
+            )
+
+        pending = {asyncio.create_task(search(name)) for name in names}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    yield result
+                    if not result.assets_ready:
+                        pending.add(asyncio.create_task(prepare_source(result)))
+        finally:
+            # Consumer went away (e.g. client disconnect): stop the searches.
+            for task in pending:
+                task.cancel()
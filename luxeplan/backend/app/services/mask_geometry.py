@@ -0,0 +1,118 @@
+"""
+Mask Geometry
+Turn a segmentation label map into compact per-class geometry.
+
+One pass over the label map finds every class's pixel count and bounding
+box (NumPy bincounts over rows and columns). Contours are then traced with
+cv2.findContours on each class's crop only, simplified with Douglas-Peucker
+(cv2.approxPolyDP) at LUXEPLAN_POLYGON_TOLERANCE pixels, and bounds are
+taken from the simplified contours. Area is always the class's pixel count.
+A class whose every contour is below LUXEPLAN_POLYGON_MIN_AREA (a tiny
+upload, or a strip one pixel thick) keeps its bounding box as its polygon
+rather than disappearing. Every class is also run-length encoded in a single
+pass (see mask_rle), so the API can return kilobytes of geometry instead of
+full-resolution mask PNGs.
+"""
+
+import os
+from dataclasses import dataclass, field
+
+import cv2
+import numpy as np
+
+from app.services.mask_rle import label_map_counts
+
+# Douglas-Peucker tolerance in pixels (of the label map).
+SIMPLIFY_TOLERANCE = float(os.getenv("LUXEPLAN_POLYGON_TOLERANCE", "1.5"))
+
+# Contours enclosing less than this many pixels (speckle) are dropped.
+MIN_CONTOUR_AREA = float(os.getenv("LUXEPLAN_POLYGON_MIN_AREA", "16"))
+
+
+@dataclass
+class RegionGeometry:
+    """Geometry of one class, in label-map pixel coordinates."""
+
+    label: int
+    pixel_count: int
+    polygons: list[np.ndarray] = field(default_factory=list)  # outer rings, (N, 2) x/y
+    holes: list[np.ndarray] = field(default_factory=list)
+    area: float = 0.0  # pixels
+    bounds: tuple[int, int, int, int] = (0, 0, 0, 0)  # x, y, width, height
+    rle_counts: np.ndarray = field(default_factory=lambda: np.empty(0, np.int64))
+
+    @property
+    def largest_polygon(self) -> np.ndarray:
+        if not self.polygons:
+            return np.empty((0, 2), np.float32)
+        return max(self.polygons, key=lambda ring: abs(cv2.contourArea(ring)))
+
+
+def _class_boxes(label_map: np.ndarray, num_labels: int) -> tuple[np.ndarray, np.ndarray]:
+    """Pixel counts (L,) and [x0, y0, x1, y1) boxes (L, 4) for every label."""
+    h, w = label_map.shape
+    # Unlabeled pixels share one extra bin, so nothing needs masking out.
+    bins = num_labels + 1
+    labels = np.minimum(label_map, num_labels).astype(np.int32)
+
+    rows = np.bincount(
+        (labels + (np.arange(h, dtype=np.int32) * bins)[:, None]).ravel(), minlength=h * bins
+    ).reshape(h, bins)[:, :num_labels]
+    cols = np.bincount(
+        (labels + (np.arange(w, dtype=np.int32) * bins)[None, :]).ravel(), minlength=w * bins
+    ).reshape(w, bins)[:, :num_labels]
+
+    row_hit, col_hit = rows > 0, cols > 0
+    boxes = np.stack([
+        col_hit.argmax(0),
+        row_hit.argmax(0),
+        w - col_hit[::-1].argmax(0),
+        h - row_hit[::-1].argmax(0),
+    ], axis=1)
+    return rows.sum(0), boxes
+
+
+def extract_regions(
+    label_map: np.ndarray,
+    num_labels: int,
+    tolerance: float = SIMPLIFY_TOLERANCE,
+    min_area: float = MIN_CONTOUR_AREA,
+) -> dict[int, RegionGeometry]:
+    """
+    Simplified polygons, area, bounds and RLE for every label present in a
+    (H, W) integer label map. Values >= num_labels are unlabeled. Every
+    present label gets a region with at least one polygon.
+    """
+    pixel_counts, boxes = _class_boxes(label_map, num_labels)
+    rle = label_map_counts(label_map, num_labels)
+
+    regions = {}
+    for label in np.flatnonzero(pixel_counts):
+        x0, y0, x1, y1 = (int(v) for v in boxes[label])
+        crop = (label_map[y0:y1, x0:x1] == label).astype(np.uint8)
+        contours, hierarchy = cv2.findContours(
+            crop, cv2.RETR_CCOMP, cv2.CHAIN_APPROX_SIMPLE, offset=(x0, y0)
+        )
+
+        region = RegionGeometry(
+            label=int(label),
+            pixel_count=int(pixel_counts[label]),
+            area=float(pixel_counts[label]),
+            rle_counts=rle[int(label)],
+        )
+        for contour, (_, _, _, parent) in zip(contours, hierarchy[0]):
+            ring = cv2.approxPolyDP(contour, tolerance, True)
+            if abs(cv2.contourArea(ring)) < min_area:
+                continue
+            ring = ring.reshape(-1, 2).astype(np.float32)
+            (region.polygons if parent < 0 else region.holes).append(ring)
+
+        if region.polygons:
+            region.bounds = cv2.boundingRect(np.concatenate(region.polygons))
+        else:
+            region.polygons.append(
+                np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], np.float32)
+            )
+            region.bounds = (x0, y0, x1 - x0, y1 - y0)
+        regions[region.label] = region
+    return regions
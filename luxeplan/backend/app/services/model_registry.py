@@ -0,0 +1,124 @@
+"""
+Model Registry
+Process-wide, lazily loaded model handles for the vision services.
+
+Services register a loader at import time, which is cheap. Weights are only
+loaded the first time a model is used, so a worker that only serves
+/api/gemini never pays for SegFormer/YOLO/DPT/rembg. A per-model lock
+guarantees concurrent first requests trigger a single load. Models can also
+be warmed explicitly (the /api/models/warmup endpoint) or preloaded at
+startup via LUXEPLAN_PRELOAD_MODELS ("all" or a comma-separated list).
+"""
+
+import asyncio
+import os
+import resource
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+
+def _resident_bytes() -> int:
+    """Current resident set size of this process, in bytes."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # Peak RSS is the best portable fallback (KiB on Linux, bytes on macOS).
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+@dataclass
+class ModelEntry:
+    name: str
+    loader: Callable[[], Any]
+    model: Any = None
+    loaded: bool = False
+    load_time_s: Optional[float] = None
+    resident_bytes: Optional[int] = None
+    error: Optional[str] = None
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "loaded": self.loaded,
+            "load_time_s": self.load_time_s,
+            "resident_bytes": self.resident_bytes,
+            "error": self.error,
+        }
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._entries: dict[str, ModelEntry] = {}
+
+    def register(self, name: str, loader: Callable[[], Any]) -> None:
+        """Register a zero-argument loader. Nothing is loaded until first use."""
+        if name in self._entries:
+            raise ValueError(f"Model already registered: {name}")
+        self._entries[name] = ModelEntry(name=name, loader=loader)
+
+    def names(self) -> list[str]:
+        return list(self._entries)
+
+    def get(self, name: str) -> Any:
+        """Return the model, loading it on first use (blocking)."""
+        entry = self._entry(name)
+        if entry.loaded:
+            return entry.model
+
+        with entry.lock:
+            if not entry.loaded:
+                self._load(entry)
+        return entry.model
+
+    async def get_async(self, name: str) -> Any:
+        """Like get(), but a cold load runs off the event loop."""
+        entry = self._entry(name)
+        if entry.loaded:
+            return entry.model
+        return await asyncio.to_thread(self.get, name)
+
+    def warmup(self, names: Optional[list[str]] = None) -> list[dict]:
+        """Load the given models (default: all) and return their stats."""
+        for name in names or self.names():
+            self.get(name)
+        return self.stats(names)
+
+    def stats(self, names: Optional[list[str]] = None) -> list[dict]:
+        return [self._entry(name).stats() for name in names or self.names()]
+
+    def _entry(self, name: str) -> ModelEntry:
+        try:
+            return self._entries[name]
+        except KeyError:
+            raise KeyError(f"Unknown model: {name}") from None
+
+    def _load(self, entry: ModelEntry) -> None:
+        # RSS delta is approximate when other models load concurrently.
+        rss_before = _resident_bytes()
+        started = time.perf_counter()
+        try:
+            entry.model = entry.loader()
+        except Exception as exc:
+            entry.error = f"{type(exc).__name__}: {exc}"
+            raise
+        entry.load_time_s = round(time.perf_counter() - started, 4)
+        entry.resident_bytes = max(0, _resident_bytes() - rss_before)
+        entry.error = None
+        entry.loaded = True
+
+
+def preload_names() -> list[str]:
+    """Models listed in LUXEPLAN_PRELOAD_MODELS ("all" for every model)."""
+    raw = os.getenv("LUXEPLAN_PRELOAD_MODELS", "").strip()
+    if raw == "all":
+        return model_registry.names()
+    return [name.strip() for name in raw.split(",") if name.strip()]
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,122 @@
+"""
+Occlusion
+Which pixels of a placed asset are hidden by nearer scene geometry.
+
+A standing asset (floor/countertop) is given one depth: where its base
+touches the surface. A wall/ceiling mount lies on its surface, which may
+recede across the footprint, so its depth is that surface's at each pixel:
+a plane is fitted to the footprint's depth (inverse depth is affine in
+image coordinates for a plane), starting from the far half of the pixels,
+since occluders are nearer, and refined on the pixels that lie on it.
+Scene pixels nearer than the asset by more than LUXEPLAN_OCCLUSION_MARGIN
+(relative) occlude it. Only the footprint's crop of the depth buffer is
+read.
+
+The mask is returned as a COCO RLE counts string (see mask_rle) over the
+footprint rectangle in original image pixels.
+"""
+
+import os
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from app.services import mask_rle
+
+OCCLUSION_MARGIN = float(os.getenv("LUXEPLAN_OCCLUSION_MARGIN", "0.03"))
+
+# Surfaces an asset stands on (depth at its base) vs. is mounted on (depth
+# of the surface behind it).
+STANDING_PLANES = ("floor", "countertop")
+
+# Share of the footprint's bottom rows sampled for a standing asset's depth.
+_CONTACT_BAND = 0.05
+# Depth samples used to fit a mounting surface.
+_FIT_POINTS = 4096
+_FIT_ROUNDS = 3
+
+
+def footprint(
+    x: float, y: float, width: float, height: float, image_width: int, image_height: int
+) -> Optional[tuple[int, int, int, int]]:
+    """Centered box (x0, y0, x1, y1) clipped to the image; None if empty."""
+    x0 = max(0, int(np.floor(x - width / 2)))
+    y0 = max(0, int(np.floor(y - height / 2)))
+    x1 = min(image_width, int(np.ceil(x + width / 2)))
+    y1 = min(image_height, int(np.ceil(y + height / 2)))
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return x0, y0, x1, y1
+
+
+def contact_depth(crop: np.ndarray) -> float:
+    """Depth where a standing asset's base meets its surface."""
+    band = max(1, round(crop.shape[0] * _CONTACT_BAND))
+    return float(np.median(crop[-band:]))
+
+
+def mounting_surface(crop: np.ndarray, margin: float = OCCLUSION_MARGIN) -> np.ndarray:
+    """
+    Per-pixel depth of the surface behind a mounted asset: a plane fitted
+    to the crop, ignoring nearer pixels (occluders). Falls back to a flat
+    far depth when too few pixels are usable.
+    """
+    height, width = crop.shape
+    step = max(1, int(np.sqrt(height * width / _FIT_POINTS)))
+    ys, xs = np.mgrid[0:height:step, 0:width:step]
+    z = crop[::step, ::step].astype(np.float64)
+    valid = np.isfinite(z) & (z > 0)
+    if valid.sum() < 3:
+        return np.full(crop.shape, np.nanpercentile(crop, 90), dtype=np.float64)
+
+    inliers = valid & (z >= np.median(z[valid]))
+    coef = None
+    for _ in range(_FIT_ROUNDS):
+        if inliers.sum() < 3:
+            break
+        design = np.stack([xs[inliers], ys[inliers], np.ones(int(inliers.sum()))], axis=1)
+        coef, *_ = np.linalg.lstsq(design, 1.0 / z[inliers], rcond=None)
+        surface = 1.0 / np.maximum(coef[0] * xs + coef[1] * ys + coef[2], 1e-9)
+        inliers = valid & (np.abs(z - surface) <= margin * surface)
+    if coef is None:
+        return np.full(crop.shape, np.percentile(z[valid], 90), dtype=np.float64)
+
+    rows, cols = np.mgrid[0:height, 0:width]
+    return 1.0 / np.maximum(coef[0] * cols + coef[1] * rows + coef[2], 1e-9)
+
+
+def occlusion_mask(
+    depth: np.ndarray,
+    box: tuple[int, int, int, int],
+    image_size: tuple[int, int],
+    align_plane: str,
+    margin: float = OCCLUSION_MARGIN,
+) -> Optional[tuple[str, dict]]:
+    """
+    RLE counts and bounds of the occluded part of `box` (original image
+    pixels), or None if nothing occludes it. `depth` may be at any
+    resolution; it is cropped, never resampled as a whole.
+    """
+    image_width, image_height = image_size
+    depth_height, depth_width = depth.shape
+    x0, y0, x1, y1 = box
+    sx, sy = depth_width / image_width, depth_height / image_height
+    dx0, dy0 = int(x0 * sx), int(y0 * sy)
+    dx1 = min(depth_width, max(dx0 + 1, int(np.ceil(x1 * sx))))
+    dy1 = min(depth_height, max(dy0 + 1, int(np.ceil(y1 * sy))))
+
+    crop = depth[dy0:dy1, dx0:dx1]
+    if align_plane in STANDING_PLANES:
+        reference = contact_depth(crop)
+    else:
+        reference = mounting_surface(crop, margin)
+    occluded = crop < reference * (1.0 - margin)
+    if not occluded.any():
+        return None
+
+    mask = cv2.resize(
+        occluded.astype(np.uint8), (x1 - x0, y1 - y0), interpolation=cv2.INTER_NEAREST
+    )
+    bounds = {"x": x0, "y": y0, "width": x1 - x0, "height": y1 - y0}
+    return mask_rle.counts_to_string(mask_rle.encode(mask)), bounds
@@ -0,0 +1,153 @@
+"""
+Vision Pipeline Executor
+Runs pipeline stages as a dependency graph so independent stages overlap.
+
+Each stage names the stages it depends on. A stage starts as soon as all of
+its inputs are ready, and blocking work runs on the shared CPU thread pool so the
+event loop stays free while segmentation, detection and depth run side by side.
+"""
+
+import asyncio
+import inspect
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from app.services.executors import cpu_pools
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    A single pipeline stage.
+
+    `fn` receives the outputs of `deps` as keyword arguments, in the order
+    given. Plain functions and coroutine functions are both run on the worker
+    pool (coroutines get their own short-lived event loop there). Set
+    `inline=True` for cheap or I/O-bound coroutines that should be awaited
+    directly on the caller's event loop instead.
+    """
+
+    name: str
+    fn: Callable[..., Any]
+    deps: tuple[str, ...] = ()
+    inline: bool = False
+
+
+@dataclass
+class PipelineRun:
+    """Outputs and wall-clock timings (ms) of one graph execution."""
+
+    outputs: dict[str, Any] = field(default_factory=dict)
+    timings: dict[str, float] = field(default_factory=dict)
+    total_ms: float = 0.0
+
+    def server_timing(self) -> str:
+        """Format timings as an HTTP `Server-Timing` header value."""
+        metrics = [f"{name};dur={ms:.1f}" for name, ms in self.timings.items()]
+        metrics.append(f"total;dur={self.total_ms:.1f}")
+        return ", ".join(metrics)
+
+
+class StageGraph:
+    """Dependency graph of pipeline stages."""
+
+    def __init__(self, stages: list[Stage], executor: Optional[Executor] = None):
+        self.stages = {s.name: s for s in stages}
+        self.executor = executor or cpu_pools.thread
+
+        for stage in stages:
+            for dep in stage.deps:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+        self._check_acyclic()
+
+    def _check_acyclic(self) -> None:
+        visiting: set[str] = set()
+        done: set[str] = set()
+
+        def visit(name: str) -> None:
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Cycle detected at stage '{name}'")
+            visiting.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+    async def run(
+        self,
+        targets: Optional[list[str]] = None,
+        seed: Optional[dict[str, Any]] = None,
+    ) -> PipelineRun:
+        """
+        Execute the stages needed for `targets` (default: all), starting
+        each one as soon as its deps resolve.
+
+        `seed` supplies already-known stage outputs (e.g. cache hits); seeded
+        stages are not run, and neither are stages only they depended on.
+        """
+        run = PipelineRun(outputs=dict(seed or {}))
+        started = time.perf_counter()
+        tasks: dict[str, asyncio.Task] = {}
+
+        async def execute(stage: Stage) -> Any:
+            pending = [tasks[d] for d in stage.deps if d in tasks]
+            if pending:
+                await asyncio.gather(*pending)
+            kwargs = {d: run.outputs[d] for d in stage.deps}
+
+            t0 = time.perf_counter()
+            result = await self._call(stage, kwargs)
+            run.timings[stage.name] = (time.perf_counter() - t0) * 1000
+            run.outputs[stage.name] = result
+            return result
+
+        for name in self._required(targets or list(self.stages), run.outputs):
+            tasks[name] = asyncio.create_task(execute(self.stages[name]), name=name)
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+
+        run.total_ms = (time.perf_counter() - started) * 1000
+        return run
+
+    def _required(self, targets: list[str], known: dict[str, Any]) -> list[str]:
+        """Stages that must run to produce `targets`, in dependency order."""
+        order: list[str] = []
+        seen: set[str] = set()
+
+        def visit(name: str) -> None:
+            if name in seen or name in known:
+                return
+            seen.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            order.append(name)
+
+        for name in targets:
+            visit(name)
+        return order
+
+    async def _call(self, stage: Stage, kwargs: dict[str, Any]) -> Any:
+        is_coroutine = inspect.iscoroutinefunction(stage.fn)
+        if stage.inline:
+            result = stage.fn(**kwargs)
+            return await result if is_coroutine else result
+
+        loop = asyncio.get_running_loop()
+        if is_coroutine:
+            return await loop.run_in_executor(
+                self.executor, lambda: asyncio.run(stage.fn(**kwargs))
+            )
+        return await loop.run_in_executor(self.executor, lambda: stage.fn(**kwargs))
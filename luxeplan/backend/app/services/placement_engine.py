@@ -2,11 +2,53 @@
 PlacementEngine
 Computes optimal placement for products based on vision analysis.
 Each category has a PlacementPolicy defining snapping, alignment, shadows.
+Occlusion masks come from the scene depth map, decoded once per scene.
 """
 
-import math
-from typing import Optional
-from app.models import AnchorPoint, PlacementResult
+import logging
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Iterable, Mapping, Optional
+
+import numpy as np
+
+from app.models import AnchorPoint, PlacementBatchItem, PlacementResult
+from app.services.depth_maps import DepthMapCache, depth_maps
+from app.services.occlusion import footprint, occlusion_mask
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class AnchorIndex:
+    """
+    Immutable per-scene anchor lookup: the highest-confidence anchor for each
+    label and for each plane. Built once per scene so policies resolve
+    anchors in O(1) instead of rescanning the detector output.
+    """
+
+    by_label: Mapping[str, AnchorPoint]
+    by_plane: Mapping[str, AnchorPoint]
+
+    @classmethod
+    def from_anchors(cls, anchors: Iterable[AnchorPoint]) -> "AnchorIndex":
+        by_label: dict[str, AnchorPoint] = {}
+        by_plane: dict[str, AnchorPoint] = {}
+        for anchor in anchors:
+            # Strictly greater keeps the first of equally confident anchors.
+            current = by_label.get(anchor.label)
+            if current is None or anchor.confidence > current.confidence:
+                by_label[anchor.label] = anchor
+            current = by_plane.get(anchor.plane)
+            if current is None or anchor.confidence > current.confidence:
+                by_plane[anchor.plane] = anchor
+        return cls(MappingProxyType(by_label), MappingProxyType(by_plane))
+
+    def best(self, label: str) -> Optional[AnchorPoint]:
+        return self.by_label.get(label)
+
+    def best_on_plane(self, plane: str) -> Optional[AnchorPoint]:
+        return self.by_plane.get(plane)
 
 
 class PlacementPolicy:
@@ -17,10 +59,13 @@ class PlacementPolicy:
     shadow_plane: str = "floor"
     default_z_order: int = 5
     scale_factor: float = 1.0
+    # Surface treatments (flooring, countertops...) are clipped by their
+    # segmentation mask instead of depth occlusion.
+    occludable: bool = True
 
     def compute(
         self,
-        anchors: list[AnchorPoint],
+        index: AnchorIndex,
         asset_width: int,
         asset_height: int,
         image_width: int,
@@ -28,7 +73,8 @@ class PlacementPolicy:
         target_anchor_label: Optional[str] = None,
     ) -> PlacementResult:
         target_label = target_anchor_label or self.snap_to
-        anchor = self._find_anchor(anchors, target_label)
+        # Without its anchor, land on the surface the product mounts on.
+        anchor = index.best(target_label) or index.best_on_plane(self.align_plane)
 
         if anchor:
             x = anchor.x
@@ -53,14 +99,6 @@ class PlacementPolicy:
             occlusion_mask=None,
         )
 
-    def _find_anchor(
-        self, anchors: list[AnchorPoint], label: str
-    ) -> Optional[AnchorPoint]:
-        matching = [a for a in anchors if a.label == label]
-        if matching:
-            return max(matching, key=lambda a: a.confidence)
-        return None
-
 
 class FaucetPolicy(PlacementPolicy):
     """Snap to sink anchor, align to countertop plane, add contact shadow."""
@@ -71,10 +109,10 @@ class FaucetPolicy(PlacementPolicy):
     default_z_order = 6
     scale_factor = 0.6
 
-    def compute(self, anchors, asset_width, asset_height, image_width, image_height, target_anchor_label=None):
-        result = super().compute(anchors, asset_width, asset_height, image_width, image_height, target_anchor_label)
+    def compute(self, index, asset_width, asset_height, image_width, image_height, target_anchor_label=None):
+        result = super().compute(index, asset_width, asset_height, image_width, image_height, target_anchor_label)
         # Offset faucet above sink center
-        sink = self._find_anchor(anchors, "sink")
+        sink = index.best("sink")
         if sink:
             result.y = sink.y - sink.height * 0.6
         return result
@@ -118,8 +156,9 @@ class FlooringPolicy(PlacementPolicy):
     shadow_plane = "floor"
     default_z_order = 0
     scale_factor = 1.0
+    occludable = False
 
-    def compute(self, anchors, asset_width, asset_height, image_width, image_height, target_anchor_label=None):
+    def compute(self, index, asset_width, asset_height, image_width, image_height, target_anchor_label=None):
         # Flooring covers the entire floor plane
         return PlacementResult(
             x=image_width / 2,
@@ -140,6 +179,7 @@ class CabinetPolicy(PlacementPolicy):
     shadow_plane = "wall"
     default_z_order = 1
     scale_factor = 1.0
+    occludable = False
 
 
 class CountertopPolicy(PlacementPolicy):
@@ -150,8 +190,9 @@ class CountertopPolicy(PlacementPolicy):
     shadow_plane = "countertop"
     default_z_order = 2
     scale_factor = 1.0
+    occludable = False
 
-    def compute(self, anchors, asset_width, asset_height, image_width, image_height, target_anchor_label=None):
+    def compute(self, index, asset_width, asset_height, image_width, image_height, target_anchor_label=None):
         return PlacementResult(
             x=image_width / 2,
             y=image_height * 0.5,
@@ -185,8 +226,9 @@ class BacksplashPolicy(PlacementPolicy):
     shadow_plane = "wall"
     default_z_order = 1
     scale_factor = 1.0
+    occludable = False
 
-    def compute(self, anchors, asset_width, asset_height, image_width, image_height, target_anchor_label=None):
+    def compute(self, index, asset_width, asset_height, image_width, image_height, target_anchor_label=None):
         return PlacementResult(
             x=image_width / 2,
             y=image_height * 0.38,
@@ -254,9 +296,14 @@ CATEGORY_POLICIES: dict[str, PlacementPolicy] = {
 class PlacementEngine:
     """
     Main placement engine.
-    Routes to category-specific policies for optimal placement.
+    Routes to category-specific policies for optimal placement, then masks
+    each placement by the scene depth. Blocking (the depth map may be
+    fetched on first use); call from a worker thread.
     """
 
+    def __init__(self, depth_cache: DepthMapCache = depth_maps):
+        self.depth_cache = depth_cache
+
     def compute(
         self,
         category: str,
@@ -267,13 +314,85 @@ class PlacementEngine:
         image_width: int,
         image_height: int,
         target_anchor_label: Optional[str] = None,
+    ) -> PlacementResult:
+        return self._place(
+            category=category,
+            asset_width=asset_width,
+            asset_height=asset_height,
+            index=AnchorIndex.from_anchors(anchors),
+            depth=self._depth(depth_map_url),
+            image_width=image_width,
+            image_height=image_height,
+            target_anchor_label=target_anchor_label,
+        )
+
+    def compute_batch(
+        self,
+        items: list[PlacementBatchItem],
+        anchors: list[AnchorPoint],
+        depth_map_url: str,
+        image_width: int,
+        image_height: int,
+    ) -> list[PlacementResult]:
+        """Place every item of a design state against one scene index and depth buffer."""
+        index = AnchorIndex.from_anchors(anchors)
+        depth = self._depth(depth_map_url)
+        return [
+            self._place(
+                category=item.category,
+                asset_width=item.asset_width,
+                asset_height=item.asset_height,
+                index=index,
+                depth=depth,
+                image_width=image_width,
+                image_height=image_height,
+                target_anchor_label=item.target_anchor_label,
+            )
+            for item in items
+        ]
+
+    def _depth(self, url: str) -> Optional[np.ndarray]:
+        # Placement stays usable without occlusion if depth can't be loaded.
+        try:
+            return self.depth_cache.get(url)
+        except Exception:
+            logger.warning("Depth map unavailable: %s", url, exc_info=True)
+            return None
+
+    def _place(
+        self,
+        category: str,
+        asset_width: int,
+        asset_height: int,
+        index: AnchorIndex,
+        depth: Optional[np.ndarray],
+        image_width: int,
+        image_height: int,
+        target_anchor_label: Optional[str] = None,
     ) -> PlacementResult:
         policy = CATEGORY_POLICIES.get(category, PlacementPolicy())
-        return policy.compute(
-            anchors=anchors,
+        result = policy.compute(
+            index=index,
             asset_width=asset_width,
             asset_height=asset_height,
             image_width=image_width,
             image_height=image_height,
             target_anchor_label=target_anchor_label,
         )
+        if depth is None or not policy.occludable:
+            return result
+
+        box = footprint(
+            result.x,
+            result.y,
+            asset_width * result.scale,
+            asset_height * result.scale,
+            image_width,
+            image_height,
+        )
+        occlusion = box and occlusion_mask(
+            depth, box, (image_width, image_height), policy.align_plane
+        )
+        if occlusion:
+            result.occlusion_mask, result.occlusion_bounds = occlusion
+        return result
@@ -0,0 +1,177 @@
+"""
+Plane Fitting
+Fit real planes to segmented surfaces from a metric depth map.
+
+For each planar segment, pixels are sampled straight from the mask's RLE
+(no raster is expanded), back-projected through a pinhole camera with an
+assumed field of view, and fitted with RANSAC: every hypothesis is scored
+at once as one (iterations x points) NumPy product, and the best consensus
+set is refined by least squares (SVD). The number of sampled points is
+capped per image, so the stage runs in a fixed budget whatever the upload
+resolution.
+
+Planes are in camera space (metres; x right, y up, z forward) as
+n . X + d = 0, with the unit normal facing the camera, so `distance` (d) is
+the perpendicular distance from the camera to the plane.
+
+Configure with LUXEPLAN_ASSUMED_HFOV_DEG, LUXEPLAN_PLANE_POINT_BUDGET,
+LUXEPLAN_PLANE_RANSAC_ITERATIONS and LUXEPLAN_PLANE_INLIER_M.
+"""
+
+import math
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from app.models import PlaneInfo, SegmentationMask
+from app.services import mask_rle
+from app.services.image_context import ScaledImage
+
+# Typical phone main camera; used until EXIF focal length is plumbed through.
+ASSUMED_HFOV_DEG = float(os.getenv("LUXEPLAN_ASSUMED_HFOV_DEG", "65"))
+
+# Depth samples shared by all segments of one image.
+POINT_BUDGET = int(os.getenv("LUXEPLAN_PLANE_POINT_BUDGET", "8192"))
+RANSAC_ITERATIONS = int(os.getenv("LUXEPLAN_PLANE_RANSAC_ITERATIONS", "64"))
+INLIER_THRESHOLD_M = float(os.getenv("LUXEPLAN_PLANE_INLIER_M", "0.03"))
+
+MIN_POINTS = 32
+MIN_INLIER_RATIO = 0.3
+
+PLANAR_LABELS = ("wall", "floor", "ceiling", "countertop", "backsplash", "cabinet_faces", "vanity")
+
+
+def focal_length_px(width: int, hfov_deg: float = ASSUMED_HFOV_DEG) -> float:
+    return (width / 2) / math.tan(math.radians(hfov_deg) / 2)
+
+
+def back_project(
+    xs: np.ndarray, ys: np.ndarray, depth: np.ndarray, size: tuple[int, int], focal: float
+) -> np.ndarray:
+    """Pixel coordinates and depths (metres) to (N, 3) camera-space points."""
+    width, height = size
+    x = (xs + 0.5 - width / 2) * depth / focal
+    y = (height / 2 - ys - 0.5) * depth / focal
+    return np.stack([x, y, depth], axis=1)
+
+
+def sample_mask(
+    counts: np.ndarray, size: tuple[int, int], k: int, rng: np.random.Generator
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Up to k distinct pixels (xs, ys) drawn uniformly from an RLE mask, in
+    O(runs + k log runs) without decoding it. size is (height, width).
+    """
+    height = size[0]
+    area = mask_rle.area(counts)
+    if area == 0:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    ranks = np.sort(rng.choice(area, size=min(k, area), replace=False))
+
+    # Map the i-th set pixel to its flat (column-major) position.
+    ones = counts[1::2]
+    run_starts = (np.cumsum(counts) - counts)[1::2]
+    ones_before = np.cumsum(ones) - ones
+    run = np.searchsorted(ones_before, ranks, side="right") - 1
+    flat = run_starts[run] + (ranks - ones_before[run])
+    return flat // height, flat % height
+
+
+@dataclass
+class PlaneFit:
+    normal: np.ndarray  # (3,), unit, facing the camera
+    distance: float
+    inliers: np.ndarray  # (N,) bool over the fitted points
+
+
+def _refine(points: np.ndarray) -> tuple[np.ndarray, float]:
+    """Least-squares plane through points: normal = least singular vector."""
+    centroid = points.mean(axis=0)
+    _, _, vt = np.linalg.svd(points - centroid, full_matrices=False)
+    normal = vt[-1]
+    return normal, -float(normal @ centroid)
+
+
+def fit_plane(
+    points: np.ndarray,
+    rng: np.random.Generator,
+    iterations: int = RANSAC_ITERATIONS,
+    threshold: float = INLIER_THRESHOLD_M,
+) -> Optional[PlaneFit]:
+    """RANSAC over all hypotheses at once, then a least-squares refit."""
+    if len(points) < MIN_POINTS:
+        return None
+
+    triples = points[rng.integers(0, len(points), size=(iterations, 3))]
+    normals = np.cross(triples[:, 1] - triples[:, 0], triples[:, 2] - triples[:, 0])
+    norms = np.linalg.norm(normals, axis=1)
+    valid = norms > 1e-9
+    if not valid.any():
+        return None
+    normals = normals[valid] / norms[valid, None]
+    offsets = -np.einsum("ij,ij->i", normals, triples[valid, 0])
+
+    residuals = np.abs(points @ normals.T + offsets)  # (N, hypotheses)
+    scores = (residuals < threshold).sum(axis=0)
+    inliers = residuals[:, scores.argmax()] < threshold
+    if inliers.mean() < MIN_INLIER_RATIO:
+        return None
+
+    normal, offset = _refine(points[inliers])
+    inliers = np.abs(points @ normal + offset) < threshold
+    if offset < 0:  # face the camera (origin), so the offset is a distance
+        normal, offset = -normal, -offset
+    return PlaneFit(normal=normal, distance=offset, inliers=inliers)
+
+
+def infer_planes(
+    segments: list[SegmentationMask],
+    depth: np.ndarray,
+    image: ScaledImage,
+    seed: int = 0,
+) -> list[PlaneInfo]:
+    """
+    Fit one plane per planar segment. `depth` is metric depth at inference
+    resolution (the size segment RLEs are encoded at); bounds are in
+    original image pixels.
+    """
+    size = image.image.size
+    focal = focal_length_px(size[0])
+    rng = np.random.default_rng(seed)
+
+    planar = [s for s in segments if s.label in PLANAR_LABELS and s.rle is not None]
+    per_segment = POINT_BUDGET // max(1, len(planar))
+
+    planes = []
+    for segment in planar:
+        counts, rle_size = mask_rle.unpack(segment.rle)
+        if rle_size != depth.shape:
+            continue
+        xs, ys = sample_mask(counts, rle_size, per_segment, rng)
+        z = depth[ys, xs].astype(np.float64)
+        keep = np.isfinite(z) & (z > 0)
+        xs, ys = xs[keep], ys[keep]
+        fit = fit_plane(back_project(xs, ys, z[keep], size, focal), rng)
+        if fit is None:
+            continue
+
+        ix, iy = xs[fit.inliers], ys[fit.inliers]
+        x0, y0 = image.to_original(int(ix.min()), int(iy.min()))
+        x1, y1 = image.to_original(int(ix.max()) + 1, int(iy.max()) + 1)
+        planes.append(
+            PlaneInfo(
+                label=segment.label,
+                normal=[round(float(v), 4) + 0.0 for v in fit.normal],  # no -0.0
+                distance=round(fit.distance, 4),
+                bounds={
+                    "x": round(x0),
+                    "y": round(y0),
+                    "width": round(x1 - x0),
+                    "height": round(y1 - y0),
+                },
+                inlier_ratio=round(float(fit.inliers.mean()), 3),
+            )
+        )
+    return planes
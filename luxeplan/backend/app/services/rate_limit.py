@@ -0,0 +1,343 @@
+"""
+Outbound Rate Limits
+Per-upstream budget for calls to rate-limited external APIs (Gemini,
+Pinterest, SerpAPI, Home Depot), so bursts from many workers queue here
+instead of turning into 429 storms and retry amplification upstream.
+
+Each upstream gets a RateLimiter combining:
+
+- token bucket: a sustained requests/second with a burst allowance. Callers
+  reserve a token and sleep until it is due, so waiting costs no requests.
+- AIMD concurrency window: in-flight calls are capped by a window that grows
+  by ~1 per window of successful calls and halves when the upstream
+  throttles (429/503, raised by the caller as Throttled).
+- retries: throttled calls back off exponentially with full jitter (or for
+  Retry-After when given), and pause the bucket so other callers hold off
+  too.
+
+With LUXEPLAN_RATE_LIMIT_DIR set, bucket state lives in one small file per
+upstream under that directory, updated under an exclusive file lock, so
+every worker process on the host shares one budget and one pause. The
+concurrency window stays per process. Lock waits and file I/O for shared
+state run on the thread pool, so a contended lock never stalls the event
+loop.
+
+Configure per upstream with LUXEPLAN_RATE_<UPSTREAM>_RPS (0 disables the
+bucket), LUXEPLAN_RATE_<UPSTREAM>_BURST and
+LUXEPLAN_RATE_<UPSTREAM>_CONCURRENCY; retries with LUXEPLAN_RATE_MAX_RETRIES.
+"""
+
+import asyncio
+import bisect
+import os
+import random
+import struct
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from app.services.executors import WAIT_BUCKETS_MS, cpu_pools
+
+T = TypeVar("T")
+
+MAX_RETRIES = int(os.getenv("LUXEPLAN_RATE_MAX_RETRIES", "4"))
+BACKOFF_BASE_S = 0.5
+BACKOFF_MAX_S = 30.0
+# A burst of 429s from one window only halves it once.
+DECREASE_COOLDOWN_S = 1.0
+
+
+@dataclass(frozen=True)
+class UpstreamLimit:
+    rate: float  # requests/second; 0 = unlimited
+    burst: float
+    max_concurrency: int
+    min_concurrency: int = 1
+
+
+DEFAULT_LIMITS = {
+    "gemini": UpstreamLimit(rate=5.0, burst=10.0, max_concurrency=16),
+    "pinterest": UpstreamLimit(rate=1.0, burst=5.0, max_concurrency=4),
+    "serp": UpstreamLimit(rate=1.0, burst=3.0, max_concurrency=4),
+    "homedepot": UpstreamLimit(rate=2.0, burst=5.0, max_concurrency=4),
+}
+
+
+def limit_from_env(upstream: str) -> UpstreamLimit:
+    default = DEFAULT_LIMITS.get(upstream, UpstreamLimit(rate=0.0, burst=1.0, max_concurrency=8))
+    prefix = f"LUXEPLAN_RATE_{upstream.upper()}"
+    return UpstreamLimit(
+        rate=float(os.getenv(f"{prefix}_RPS", default.rate)),
+        burst=float(os.getenv(f"{prefix}_BURST", default.burst)),
+        max_concurrency=int(os.getenv(f"{prefix}_CONCURRENCY", default.max_concurrency)),
+    )
+
+
+class Throttled(Exception):
+    """Raised by a limited call when the upstream answers 429/503."""
+
+    def __init__(self, message: str = "Upstream throttled", retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds form only)."""
+    try:
+        return max(0.0, float(value)) if value else None
+    except ValueError:
+        return None
+
+
+# ── Bucket state ──
+
+def _take(
+    tokens: float, updated: float, rate: float, burst: float, now: float
+) -> tuple[float, float, float]:
+    """Reserve one token: (tokens, updated, seconds until it is due)."""
+    if now > updated:
+        tokens = min(burst, tokens + (now - updated) * rate)
+        updated = now
+    tokens -= 1
+    # updated is in the future while paused; refill restarts from there.
+    due = updated + max(0.0, -tokens) / rate
+    return tokens, updated, max(0.0, due - now)
+
+
+def _pause(tokens: float, updated: float, until: float) -> tuple[float, float]:
+    return min(tokens, 0.0), max(updated, until)
+
+
+class BucketState(ABC):
+    # True when take/pause can block (file locks); the limiter then runs them
+    # on the thread pool instead of the event loop.
+    blocking = False
+
+    @abstractmethod
+    def take(self, rate: float, burst: float) -> float:
+        """Reserve a token; seconds the caller must wait before using it."""
+
+    @abstractmethod
+    def pause(self, seconds: float) -> None:
+        """Hand out no tokens for the next `seconds` (upstream throttled)."""
+
+
+class LocalBucketState(BucketState):
+    """Bucket shared by the threads and tasks of one process."""
+
+    def __init__(self, burst: float):
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self, rate: float, burst: float) -> float:
+        with self._lock:
+            self._tokens, self._updated, wait = _take(
+                self._tokens, self._updated, rate, burst, time.monotonic()
+            )
+            return wait
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._tokens, self._updated = _pause(
+                self._tokens, self._updated, time.monotonic() + seconds
+            )
+
+
+class FileBucketState(BucketState):
+    """
+    Bucket shared by every process on the host: (tokens, updated) packed in
+    a 16-byte file and read-modify-written under flock. CLOCK_MONOTONIC is
+    system-wide on Linux, so timestamps compare across processes.
+    """
+
+    _FORMAT = "=dd"
+    blocking = True
+
+    def __init__(self, path: Path, burst: float):
+        self.path = path
+        self.burst = burst
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+    def take(self, rate: float, burst: float) -> float:
+        wait = 0.0
+
+        def update(tokens: float, updated: float) -> tuple[float, float]:
+            nonlocal wait
+            tokens, updated, wait = _take(tokens, updated, rate, burst, time.monotonic())
+            return tokens, updated
+
+        self._update(update)
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        until = time.monotonic() + seconds
+        self._update(lambda tokens, updated: _pause(tokens, updated, until))
+
+    def _update(self, fn: Callable[[float, float], tuple[float, float]]) -> None:
+        import fcntl
+
+        size = struct.calcsize(self._FORMAT)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            raw = os.pread(fd, size, 0)
+            now = time.monotonic()
+            tokens, updated = struct.unpack(self._FORMAT, raw) if len(raw) == size else (self.burst, now)
+            if updated > now + BACKOFF_MAX_S * 2:
+                tokens, updated = self.burst, now  # left over from before a reboot
+            os.pwrite(fd, struct.pack(self._FORMAT, *fn(tokens, updated)), 0)
+        finally:
+            os.close(fd)  # releases the lock
+
+
+# ── Limiter ──
+
+class RateLimiter:
+    def __init__(self, name: str, limit: UpstreamLimit, state: Optional[BucketState] = None):
+        self.name = name
+        self.limit = limit
+        self.state = state or LocalBucketState(limit.burst)
+        self.max_retries = MAX_RETRIES
+        self.window = float(limit.max_concurrency)
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._waiters: list[asyncio.Future] = []
+
+        self._stats = {"calls": 0, "throttled": 0, "retries": 0, "gave_up": 0, "errors": 0}
+        self._wait_total_ms = 0.0
+        self._wait_max_ms = 0.0
+        self._wait_histogram = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run fn within the budget. Throttled is retried with jittered
+        backoff and re-raised once retries run out; other errors pass
+        straight through.
+        """
+        for attempt in range(self.max_retries + 1):
+            await self._acquire()
+            try:
+                result = await fn()
+            except Throttled as exc:
+                self._release("throttled")
+                if attempt == self.max_retries:
+                    self._stats["gave_up"] += 1
+                    raise
+                delay = self._backoff(attempt, exc.retry_after)
+                await self._on_state(self.state.pause, delay)
+                self._stats["retries"] += 1
+                await asyncio.sleep(delay)
+            except BaseException:
+                self._release("error")
+                raise
+            else:
+                self._release("ok")
+                return result
+        raise AssertionError("unreachable")
+
+    def stats(self) -> dict:
+        acquired = self._stats["calls"] or 1
+        histogram = {
+            f"le_{bound}ms": count for bound, count in zip(WAIT_BUCKETS_MS, self._wait_histogram)
+        }
+        histogram["gt_max"] = self._wait_histogram[-1]
+        return {
+            "rate": self.limit.rate,
+            "burst": self.limit.burst,
+            "shared": isinstance(self.state, FileBucketState),
+            "window": round(self.window, 2),
+            "in_flight": self._in_flight,
+            **self._stats,
+            "queue_avg_ms": round(self._wait_total_ms / acquired, 3),
+            "queue_max_ms": round(self._wait_max_ms, 3),
+            "queue_histogram": histogram,
+        }
+
+    async def _acquire(self) -> None:
+        started = time.monotonic()
+        while self._in_flight >= int(self.window):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self._in_flight += 1
+        try:
+            if self.limit.rate > 0:
+                wait = await self._on_state(self.state.take, self.limit.rate, self.limit.burst)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+        except BaseException:
+            self._release("error")
+            raise
+        self._record_wait((time.monotonic() - started) * 1000)
+
+    async def _on_state(self, fn: Callable[..., T], *args: float) -> T:
+        if self.state.blocking:
+            return await cpu_pools.run_in_thread(fn, *args)
+        return fn(*args)
+
+    def _release(self, outcome: str) -> None:
+        self._in_flight -= 1
+        limit = self.limit
+        if outcome == "ok":
+            # Additive increase: about +1 per window's worth of successes.
+            self.window = min(limit.max_concurrency, self.window + 1 / self.window)
+        elif outcome == "throttled":
+            self._stats["throttled"] += 1
+            now = time.monotonic()
+            if now - self._last_decrease >= DECREASE_COOLDOWN_S:
+                self.window = max(limit.min_concurrency, self.window / 2)
+                self._last_decrease = now
+        else:
+            self._stats["errors"] += 1
+        # Wake as many waiters as the (possibly shrunk) window has room for;
+        # each re-checks before taking a slot.
+        free = int(self.window) - self._in_flight
+        for waiter in self._waiters[: max(0, free)]:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        if retry_after is not None:
+            return min(BACKOFF_MAX_S, retry_after) + random.uniform(0, BACKOFF_BASE_S)
+        # Full jitter: spreads retries so throttled callers don't return in lockstep.
+        return random.uniform(0, min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2**attempt))
+
+    def _record_wait(self, wait_ms: float) -> None:
+        self._stats["calls"] += 1
+        self._wait_total_ms += wait_ms
+        self._wait_max_ms = max(self._wait_max_ms, wait_ms)
+        self._wait_histogram[bisect.bisect_left(WAIT_BUCKETS_MS, wait_ms)] += 1
+
+
+# ── Registry ──
+
+_limiters: dict[str, RateLimiter] = {}
+_registry_lock = threading.Lock()
+
+
+def limiter(upstream: str) -> RateLimiter:
+    """The process-wide limiter for an upstream, created on first use."""
+    with _registry_lock:
+        if upstream not in _limiters:
+            limit = limit_from_env(upstream)
+            shared_dir = os.getenv("LUXEPLAN_RATE_LIMIT_DIR")
+            state = (
+                FileBucketState(Path(shared_dir) / f"{upstream}.bucket", limit.burst)
+                if shared_dir
+                else None
+            )
+            _limiters[upstream] = RateLimiter(upstream, limit, state)
+        return _limiters[upstream]
+
+
+def rate_limit_metrics() -> dict:
+    with _registry_lock:
+        return {name: lim.stats() for name, lim in _limiters.items()}
@@ -0,0 +1,485 @@
+"""
+Render Jobs
+Asynchronous concept renders. Image generation takes tens of seconds, so
+`submit` returns a job id at once, a fixed number of worker tasks
+(LUXEPLAN_RENDER_CONCURRENCY) run renders from a bounded queue
+(LUXEPLAN_RENDER_QUEUE_MAX), and clients poll the job or subscribe to its
+progress events.
+
+Jobs are deduplicated by a canonical hash of (image, masks, design state,
+change): a submit matching a pending, running or recently completed job
+(within LUXEPLAN_RENDER_JOB_TTL_S) returns that job instead of rendering
+again. Failed jobs are not reused.
+
+Job state lives in a backend chosen by LUXEPLAN_RENDER_JOB_BACKEND:
+"memory" (default, this process only) or "supabase" (the job_queue table,
+so status and dedup hold across workers; needs SUPABASE_URL and
+SUPABASE_SERVICE_ROLE_KEY).
+
+Renders run in the process that queued them, so a shared row outlives a
+process that stops. Each process refreshes its unfinished jobs' locked_at
+every RENDER_HEARTBEAT_S and, from startup on, fails any unfinished row
+not refreshed for LUXEPLAN_RENDER_STALE_S; dedup skips such rows too.
+Watchers give up after LUXEPLAN_RENDER_WAIT_S.
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from app.models import ConceptRenderRequest, ConceptRenderResponse, RenderJobStatus
+from app.services.executors import cpu_pools
+from app.services.response_cache import canonical_key
+
+logger = logging.getLogger(__name__)
+
+RENDER_CONCURRENCY = int(os.getenv("LUXEPLAN_RENDER_CONCURRENCY", "2"))
+RENDER_QUEUE_MAX = int(os.getenv("LUXEPLAN_RENDER_QUEUE_MAX", "100"))
+RENDER_JOB_TTL_S = float(os.getenv("LUXEPLAN_RENDER_JOB_TTL_S", "3600"))
+RENDER_STALE_S = float(os.getenv("LUXEPLAN_RENDER_STALE_S", "120"))
+RENDER_WAIT_S = float(os.getenv("LUXEPLAN_RENDER_WAIT_S", "600"))
+RENDER_HEARTBEAT_S = 30.0
+
+# How often a watcher re-reads a job running in another worker process.
+POLL_INTERVAL_S = 1.0
+
+TERMINAL = ("completed", "failed")
+
+Progress = Callable[[float, str], Awaitable[None]]
+Renderer = Callable[[ConceptRenderRequest, Progress], Awaitable[ConceptRenderResponse]]
+
+
+class QueueFull(RuntimeError):
+    """Too many renders waiting; the client should retry later."""
+
+
+def render_key(request: ConceptRenderRequest) -> str:
+    return canonical_key(
+        image=request.original_image_url,
+        masks=request.segmentation_masks,
+        design_state=request.current_design_state,
+        change=request.requested_change,
+    )
+
+
+@dataclass
+class RenderJob:
+    request: ConceptRenderRequest
+    dedup_key: str
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    status: str = "pending"
+    progress: float = 0.0
+    stage: Optional[str] = None
+    result: Optional[ConceptRenderResponse] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+
+    def snapshot(self) -> RenderJobStatus:
+        return RenderJobStatus(
+            job_id=self.id,
+            status=self.status,
+            progress=self.progress,
+            stage=self.stage,
+            result=self.result,
+            error=self.error,
+        )
+
+
+# ── Backends ──
+
+class JobBackend(ABC):
+    """Store of record for job state."""
+
+    @abstractmethod
+    async def create(self, job: RenderJob) -> None:
+        ...
+
+    @abstractmethod
+    async def update(self, job: RenderJob) -> None:
+        ...
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[RenderJobStatus]:
+        ...
+
+    @abstractmethod
+    async def find_reusable(self, dedup_key: str) -> Optional[RenderJobStatus]:
+        """Newest job with this key that hasn't failed, expired or gone stale."""
+        ...
+
+    async def touch(self, job_ids: list[str]) -> None:
+        """Mark unfinished jobs as still owned by a live process."""
+
+    async def fail_stale(self) -> int:
+        """Fail unfinished jobs whose process stopped; returns how many."""
+        return 0
+
+
+class InMemoryJobBackend(JobBackend):
+    def __init__(self, ttl_s: float = RENDER_JOB_TTL_S):
+        self.ttl_s = ttl_s
+        self._jobs: dict[str, RenderJob] = {}
+        self._by_key: dict[str, str] = {}
+
+    async def create(self, job: RenderJob) -> None:
+        self._prune()
+        self._jobs[job.id] = job
+        self._by_key[job.dedup_key] = job.id
+
+    async def update(self, job: RenderJob) -> None:
+        # Jobs are held by reference; nothing to write.
+        pass
+
+    async def get(self, job_id: str) -> Optional[RenderJobStatus]:
+        job = self._jobs.get(job_id)
+        return job.snapshot() if job else None
+
+    async def find_reusable(self, dedup_key: str) -> Optional[RenderJobStatus]:
+        job = self._jobs.get(self._by_key.get(dedup_key, ""))
+        if job is None or job.status == "failed" or self._expired(job):
+            return None
+        return job.snapshot()
+
+    def _expired(self, job: RenderJob) -> bool:
+        return job.status in TERMINAL and time.time() - job.created_at > self.ttl_s
+
+    def _prune(self) -> None:
+        for job_id in [j.id for j in self._jobs.values() if self._expired(j)]:
+            job = self._jobs.pop(job_id)
+            if self._by_key.get(job.dedup_key) == job_id:
+                del self._by_key[job.dedup_key]
+
+
+class SupabaseJobBackend(JobBackend):
+    """
+    job_queue rows with job_type CONCEPT_RENDER (migration 003). They are
+    run by the backend process that created them; the TS ingestion worker
+    only claims its own job types (WORKER_JOB_TYPES) and leaves them alone.
+    """
+
+    JOB_TYPE = "CONCEPT_RENDER"
+
+    STALE_ERROR = "Render lost: the worker running it stopped"
+
+    def __init__(
+        self, client, ttl_s: float = RENDER_JOB_TTL_S, stale_s: float = RENDER_STALE_S
+    ):
+        self.client = client
+        self.ttl_s = ttl_s
+        self.stale_s = stale_s
+
+    @classmethod
+    def from_env(cls) -> "SupabaseJobBackend":
+        from supabase import create_client
+
+        return cls(create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_SERVICE_ROLE_KEY"]))
+
+    async def create(self, job: RenderJob) -> None:
+        row = {
+            "id": job.id,
+            "job_type": self.JOB_TYPE,
+            "payload": job.request.model_dump(),
+            "dedup_key": job.dedup_key,
+            **self._state(job),
+        }
+        await self._execute(lambda table: table.insert(row))
+
+    async def update(self, job: RenderJob) -> None:
+        state = self._state(job)
+        await self._execute(lambda table: table.update(state).eq("id", job.id))
+
+    async def get(self, job_id: str) -> Optional[RenderJobStatus]:
+        rows = await self._execute(
+            lambda table: table.select("*").eq("id", job_id).eq("job_type", self.JOB_TYPE).limit(1)
+        )
+        return self._status(rows[0]) if rows else None
+
+    async def find_reusable(self, dedup_key: str) -> Optional[RenderJobStatus]:
+        since = (datetime.now(timezone.utc) - timedelta(seconds=self.ttl_s)).isoformat()
+        rows = await self._execute(
+            lambda table: table.select("*")
+            .eq("dedup_key", dedup_key)
+            .neq("status", "failed")
+            .gte("created_at", since)
+            .order("created_at", desc=True)
+            .limit(1)
+        )
+        if not rows or self._stale(rows[0]):
+            return None
+        return self._status(rows[0])
+
+    async def touch(self, job_ids: list[str]) -> None:
+        now = datetime.now(timezone.utc).isoformat()
+        await self._execute(
+            lambda table: table.update({"locked_at": now})
+            .in_("id", job_ids)
+            .in_("status", ["pending", "running"])
+        )
+
+    async def fail_stale(self) -> int:
+        now = datetime.now(timezone.utc)
+        cutoff = (now - timedelta(seconds=self.stale_s)).isoformat()
+        rows = await self._execute(
+            lambda table: table.update(
+                {"status": "failed", "error": self.STALE_ERROR, "completed_at": now.isoformat()}
+            )
+            .eq("job_type", self.JOB_TYPE)
+            .in_("status", ["pending", "running"])
+            .or_(f"locked_at.is.null,locked_at.lt.{cutoff}")
+        )
+        return len(rows)
+
+    async def _execute(self, build) -> list[dict]:
+        # supabase-py is synchronous; keep its round trips off the event loop.
+        response = await cpu_pools.run_in_thread(
+            lambda: build(self.client.table("job_queue")).execute()
+        )
+        return response.data
+
+    @staticmethod
+    def _state(job: RenderJob) -> dict:
+        now = datetime.now(timezone.utc).isoformat()
+        state = {
+            "status": job.status,
+            "progress": job.progress,
+            "stage": job.stage,
+            "result": job.result.model_dump() if job.result else None,
+            "error": job.error,
+        }
+        if job.status not in TERMINAL:
+            state["locked_at"] = now
+        if job.status == "running":
+            state["attempts"] = 1
+        if job.status in TERMINAL:
+            state["completed_at"] = now
+        return state
+
+    def _stale(self, row: dict) -> bool:
+        if row["status"] in TERMINAL:
+            return False
+        locked_at = row.get("locked_at")
+        if not locked_at:
+            return True
+        age = datetime.now(timezone.utc) - datetime.fromisoformat(locked_at)
+        return age.total_seconds() > self.stale_s
+
+    @staticmethod
+    def _status(row: dict) -> RenderJobStatus:
+        return RenderJobStatus(
+            job_id=row["id"],
+            status=row["status"],
+            progress=row["progress"],
+            stage=row["stage"],
+            result=row["result"],
+            error=row["error"],
+        )
+
+
+def backend_from_env() -> JobBackend:
+    if os.getenv("LUXEPLAN_RENDER_JOB_BACKEND", "memory") == "supabase":
+        return SupabaseJobBackend.from_env()
+    return InMemoryJobBackend()
+
+
+# ── Queue ──
+
+class RenderJobQueue:
+    def __init__(
+        self,
+        render: Renderer,
+        backend: Optional[JobBackend] = None,
+        concurrency: int = RENDER_CONCURRENCY,
+        max_pending: int = RENDER_QUEUE_MAX,
+    ):
+        self._render = render
+        self.backend = backend or InMemoryJobBackend()
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+        self._queue: Optional[asyncio.Queue[RenderJob]] = None
+        self._workers: list[asyncio.Task] = []
+        self._heartbeat: Optional[asyncio.Task] = None
+        # Jobs this process is running, until they finish.
+        self._live: dict[str, RenderJob] = {}
+        self._live_by_key: dict[str, RenderJob] = {}
+        self._watchers: dict[str, set[asyncio.Queue]] = {}
+        self._stats = {"submitted": 0, "deduplicated": 0, "rejected": 0, "completed": 0, "failed": 0}
+
+    async def submit(self, request: ConceptRenderRequest) -> RenderJobStatus:
+        """Queue a render, or return the matching job if one is reusable."""
+        key = render_key(request)
+        existing = self._reusable_live(key) or await self.backend.find_reusable(key)
+        # Re-check: another submit may have queued this key while we awaited.
+        existing = self._reusable_live(key) or existing
+        if existing is not None:
+            self._stats["deduplicated"] += 1
+            return existing
+
+        self._start()
+        if self._queue.qsize() >= self.max_pending:
+            self._stats["rejected"] += 1
+            raise QueueFull(f"{self._queue.qsize()} renders already waiting")
+        job = RenderJob(request=request, dedup_key=key)
+        self._live[job.id] = job
+        self._live_by_key[key] = job
+        await self.backend.create(job)
+        self._queue.put_nowait(job)
+        self._stats["submitted"] += 1
+        return job.snapshot()
+
+    async def get(self, job_id: str) -> Optional[RenderJobStatus]:
+        job = self._live.get(job_id)
+        return job.snapshot() if job else await self.backend.get(job_id)
+
+    async def events(
+        self, job_id: str, timeout_s: float = RENDER_WAIT_S
+    ) -> AsyncIterator[RenderJobStatus]:
+        """
+        Current state, then every change until the job finishes or
+        timeout_s passes (the last state yielded is then unfinished).
+        """
+        deadline = time.monotonic() + timeout_s
+        if job_id in self._live:
+            updates: asyncio.Queue[RenderJobStatus] = asyncio.Queue()
+            self._watchers.setdefault(job_id, set()).add(updates)
+            try:
+                status = self._live[job_id].snapshot() if job_id in self._live else await self.backend.get(job_id)
+                while True:
+                    yield status
+                    if status.status in TERMINAL:
+                        return
+                    try:
+                        status = await asyncio.wait_for(
+                            updates.get(), max(0.0, deadline - time.monotonic())
+                        )
+                    except asyncio.TimeoutError:
+                        return
+            finally:
+                watchers = self._watchers.get(job_id)
+                if watchers is not None:
+                    watchers.discard(updates)
+                    if not watchers:
+                        del self._watchers[job_id]
+
+        # Running elsewhere (shared backend) or already finished here.
+        last = None
+        while True:
+            status = await self.backend.get(job_id)
+            if status is None:
+                return
+            if status != last:
+                yield status
+                last = status
+            if status.status in TERMINAL or time.monotonic() >= deadline:
+                return
+            await asyncio.sleep(min(POLL_INTERVAL_S, max(0.0, deadline - time.monotonic())))
+
+    async def wait(
+        self, job_id: str, timeout_s: float = RENDER_WAIT_S
+    ) -> Optional[RenderJobStatus]:
+        """
+        Final state of a job (None if unknown); still pending or running if
+        timeout_s passed first.
+        """
+        status = None
+        async for status in self.events(job_id, timeout_s):
+            pass
+        return status
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "running": sum(j.status == "running" for j in self._live.values()),
+            "concurrency": self.concurrency,
+        }
+
+    async def start(self) -> None:
+        """Start workers and the stale-job sweep (otherwise on first submit)."""
+        self._start()
+
+    async def close(self) -> None:
+        tasks = [*self._workers, *([self._heartbeat] if self._heartbeat else [])]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._heartbeat = None
+        self._queue = None
+
+    # ── Workers ──
+
+    def _reusable_live(self, key: str) -> Optional[RenderJobStatus]:
+        job = self._live_by_key.get(key)
+        return job.snapshot() if job else None
+
+    def _start(self) -> None:
+        # Started on first submit, inside the serving event loop.
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._workers = [
+                asyncio.create_task(self._worker()) for _ in range(self.concurrency)
+            ]
+            self._heartbeat = asyncio.create_task(self._keep_alive())
+
+    async def _keep_alive(self) -> None:
+        while True:
+            try:
+                if self._live:
+                    await self.backend.touch(list(self._live))
+                failed = await self.backend.fail_stale()
+                if failed:
+                    logger.warning("Failed %d render jobs left by a stopped worker", failed)
+            except Exception:
+                logger.warning("Render job heartbeat failed", exc_info=True)
+            await asyncio.sleep(RENDER_HEARTBEAT_S)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: RenderJob) -> None:
+        async def progress(fraction: float, stage: str) -> None:
+            job.progress = round(min(max(fraction, 0.0), 1.0), 3)
+            job.stage = stage
+            await self._publish(job)
+
+        job.status = "running"
+        await self._publish(job)
+        try:
+            job.result = await self._render(job.request, progress)
+            job.status, job.progress, job.stage = "completed", 1.0, None
+            self._stats["completed"] += 1
+        except Exception as exc:
+            job.status, job.error = "failed", f"{type(exc).__name__}: {exc}"
+            self._stats["failed"] += 1
+        finally:
+            # Later submits and watchers are answered by the backend.
+            del self._live[job.id]
+            if self._live_by_key.get(job.dedup_key) is job:
+                del self._live_by_key[job.dedup_key]
+            await self._publish(job)
+
+    async def _publish(self, job: RenderJob) -> None:
+        snapshot = job.snapshot()
+        for updates in self._watchers.get(job.id, ()):
+            updates.put_nowait(snapshot)
+        # A lost progress write is harmless; a lost final state would leave
+        # the stored job running forever, so retry that one.
+        attempts = 3 if job.status in TERMINAL else 1
+        for attempt in range(attempts):
+            try:
+                await self.backend.update(job)
+                return
+            except Exception:
+                if attempt + 1 < attempts:
+                    await asyncio.sleep(0.5 * 2**attempt)
@@ -0,0 +1,77 @@
+"""
+Response Cache
+TTL + LRU cache for paid upstream responses (Gemini), with single-flight.
+
+Keys are canonical hashes of everything that determines the answer (see
+`canonical_key`), so equivalent requests hit regardless of field order.
+Concurrent misses on one key share a single upstream call: it runs as its
+own task, so a requester that disconnects doesn't cancel it for the
+others, and its result is cached when it lands. Failures are not cached.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+def canonical_key(**parts: Any) -> str:
+    """Hex BLAKE2b of parts as canonical JSON (sorted keys, no whitespace)."""
+    encoded = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(encoded.encode(), digest_size=32).hexdigest()
+
+
+class ResponseCache(Generic[T]):
+    def __init__(self, ttl_s: float, max_entries: int):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, T]] = OrderedDict()
+        self._in_flight: dict[str, asyncio.Task] = {}
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "expired": 0, "evictions": 0}
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[T]]) -> T:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return value
+            del self._entries[key]
+            self._stats["expired"] += 1
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self._stats["coalesced"] += 1
+        else:
+            self._stats["misses"] += 1
+            task = asyncio.ensure_future(self._compute(key, compute))
+            # Mark a failure retrieved even if every requester went away.
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._in_flight[key] = task
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        lookups = self._stats["hits"] + self._stats["misses"] + self._stats["coalesced"]
+        saved = self._stats["hits"] + self._stats["coalesced"]
+        return {
+            **self._stats,
+            "hit_rate": round(saved / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "in_flight": len(self._in_flight),
+        }
+
+    async def _compute(self, key: str, compute: Callable[[], Awaitable[T]]) -> T:
+        try:
+            value = await compute()
+        finally:
+            del self._in_flight[key]
+        self._entries[key] = (time.monotonic() + self.ttl_s, value)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+        return value
@@ -4,9 +4,17 @@ Runs semantic segmentation to identify room surfaces and elements.
 Uses a pre-trained model (e.g., SegFormer, Mask2Former) for indoor scenes.
 """
 
-import uuid
+from typing import Any
+import numpy as np
 from PIL import Image
-from app.models import SegmentationMask
+from app.models import MaskRLE, SegmentationMask
+from app.services.artifact_store import LABELS, artifact_store
+from app.services.batching import batcher
+from app.services.executors import cpu_pools
+from app.services.image_context import ScaledImage
+from app.services.mask_geometry import RegionGeometry, extract_regions
+from app.services.mask_rle import counts_to_string
+from app.services.model_registry import model_registry
 
 
 ROOM_SEGMENTS = [
@@ -23,121 +31,111 @@ ROOM_SEGMENTS = [
 ]
 
 
+def _load_model():
+    # In production: load SegFormer or Mask2Former model
+    # model = AutoModelForSemanticSegmentation.from_pretrained(...)
+    # processor = AutoImageProcessor.from_pretrained(...)
+    # return model, processor
+    return None
+
+
+model_registry.register("segmentation", _load_model)
+
+
+def _forward(images: list[Image.Image]) -> list[Any]:
+    """One batched forward pass; returns per-image logits in input order."""
+    # In production: the processor resizes to the model's input size, so
+    # the whole batch stacks into one tensor
+    # model = model_registry.get("segmentation")
+    # inputs = processor(images=images, return_tensors="pt")
+    # with torch.inference_mode():
+    #     return list(model(**inputs).logits)
+    model_registry.get("segmentation")  # loaded, but unused by the stub
+    return [None] * len(images)
+
+
+_batcher = batcher("segmentation", _forward)
+
+# Development stub regions as (x0, y0, x1, y1) fractions of the image;
+# later entries paint over earlier ones.
+_STUB_REGIONS = [
+    ("wall", (0.0, 0.0, 1.0, 0.6)),
+    ("ceiling", (0.0, 0.0, 1.0, 0.08)),
+    ("backsplash", (0.1, 0.3, 0.9, 0.45)),
+    ("countertop", (0.1, 0.45, 0.9, 0.55)),
+    ("cabinet_faces", (0.1, 0.55, 0.9, 0.7)),
+    ("floor", (0.0, 0.7, 1.0, 1.0)),
+]
+
+UNLABELED = 255
+
+
+def _stub_label_map(width: int, height: int) -> np.ndarray:
+    label_map = np.full((height, width), UNLABELED, dtype=np.uint8)
+    for label, (x0, y0, x1, y1) in _STUB_REGIONS:
+        label_map[
+            round(y0 * height):round(y1 * height), round(x0 * width):round(x1 * width)
+        ] = ROOM_SEGMENTS.index(label)
+    return label_map
+
+
 class SegmentationService:
-    def __init__(self):
-        # In production: load SegFormer or Mask2Former model
-        # self.model = AutoModelForSemanticSegmentation.from_pretrained(...)
-        # self.processor = AutoImageProcessor.from_pretrained(...)
-        self._model_loaded = False
+    # Bump when the model or post-processing changes; keys cached results.
+    model_version = "heuristic-v3"
+    model_name = "segmentation"
 
     async def segment(
-        self, image: Image.Image, image_id: str
+        self, image: ScaledImage, image_id: str
     ) -> list[SegmentationMask]:
         """
-        Run segmentation on the input image.
-        Returns list of labeled masks with polygons and areas.
+        Run segmentation on the input image (at inference resolution).
+        Returns list of labeled masks with polygons, areas and bounds in
+        original image coordinates, plus an RLE of each mask at inference
+        resolution.
         """
-        width, height = image.size
+        logits = await _batcher.submit(image.image)
 
         # Production implementation:
-        # 1. Preprocess image through the model's processor
-        # 2. Run inference
-        # 3. Post-process to extract per-class masks
-        # 4. Convert masks to polygons using cv2.findContours
-        # 5. Upload mask images to Supabase storage
-        # 6. Return structured mask data
-
-        # Development stub: generate approximate masks based on image regions
-        segments = []
-
-        # Wall: upper 60% of image
-        segments.append(
-            SegmentationMask(
-                label="wall",
-                mask_url=f"/api/masks/{image_id}/wall.png",
-                polygon=[
-                    [0, 0],
-                    [width, 0],
-                    [width, height * 0.6],
-                    [0, height * 0.6],
-                ],
-                area=width * height * 0.6,
-            )
-        )
+        # 1. Preprocess and run inference (batched with concurrent requests)
+        # 2. Upsample this image's logits to the inference size and argmax
+        #    into a label map
+        # 3. Upload mask images to Supabase storage (mask_url), for clients
+        #    that can't use the RLE
+        return await cpu_pools.run_in_thread(self._postprocess, image, image_id, logits)
 
-        # Floor: lower 30%
-        segments.append(
-            SegmentationMask(
-                label="floor",
-                mask_url=f"/api/masks/{image_id}/floor.png",
-                polygon=[
-                    [0, height * 0.7],
-                    [width, height * 0.7],
-                    [width, height],
-                    [0, height],
-                ],
-                area=width * height * 0.3,
-            )
-        )
-
-        # Countertop: middle band
-        segments.append(
-            SegmentationMask(
-                label="countertop",
-                mask_url=f"/api/masks/{image_id}/countertop.png",
-                polygon=[
-                    [width * 0.1, height * 0.45],
-                    [width * 0.9, height * 0.45],
-                    [width * 0.9, height * 0.55],
-                    [width * 0.1, height * 0.55],
-                ],
-                area=width * 0.8 * height * 0.1,
-            )
-        )
+    def _postprocess(
+        self, image: ScaledImage, image_id: str, logits: Any
+    ) -> list[SegmentationMask]:
+        width, height = image.image.size
+        # Production: label_map = logits.argmax(0).numpy().astype(np.uint8)
+        # Development stub: approximate surfaces as image regions
+        label_map = _stub_label_map(width, height)
+        # Kept on local disk for consumers that read labels by tile.
+        artifact_store.put(image_id, LABELS, label_map)
 
-        # Cabinet faces: below countertop
-        segments.append(
-            SegmentationMask(
-                label="cabinet_faces",
-                mask_url=f"/api/masks/{image_id}/cabinets.png",
-                polygon=[
-                    [width * 0.1, height * 0.55],
-                    [width * 0.9, height * 0.55],
-                    [width * 0.9, height * 0.7],
-                    [width * 0.1, height * 0.7],
-                ],
-                area=width * 0.8 * height * 0.15,
-            )
-        )
+        regions = extract_regions(label_map, len(ROOM_SEGMENTS))
+        return [
+            self._to_mask(region, image, image_id, label_map.shape)
+            for region in regions.values()
+        ]
 
-        # Backsplash: between upper cabinets and countertop
-        segments.append(
-            SegmentationMask(
-                label="backsplash",
-                mask_url=f"/api/masks/{image_id}/backsplash.png",
-                polygon=[
-                    [width * 0.1, height * 0.3],
-                    [width * 0.9, height * 0.3],
-                    [width * 0.9, height * 0.45],
-                    [width * 0.1, height * 0.45],
-                ],
-                area=width * 0.8 * height * 0.15,
-            )
+    @staticmethod
+    def _to_mask(
+        region: RegionGeometry,
+        image: ScaledImage,
+        image_id: str,
+        shape: tuple[int, int],
+    ) -> SegmentationMask:
+        label = ROOM_SEGMENTS[region.label]
+        x, y, w, h = region.bounds
+        x, y = image.to_original(x, y)
+        w, h = image.to_original(w, h)
+        return SegmentationMask(
+            label=label,
+            mask_url=f"/api/masks/{image_id}/{label}.png",
+            polygon=image.to_original_polygon(region.largest_polygon.tolist()),
+            polygons=[image.to_original_polygon(ring.tolist()) for ring in region.polygons],
+            area=image.to_original_area(region.area),
+            bounds={"x": round(x), "y": round(y), "width": round(w), "height": round(h)},
+            rle=MaskRLE(size=list(shape), counts=counts_to_string(region.rle_counts)),
         )
-
-        # Ceiling: top 8%
-        segments.append(
-            SegmentationMask(
-                label="ceiling",
-                mask_url=f"/api/masks/{image_id}/ceiling.png",
-                polygon=[
-                    [0, 0],
-                    [width, 0],
-                    [width, height * 0.08],
-                    [0, height * 0.08],
-                ],
-                area=width * height * 0.08,
-            )
-        )
-
-        return segments
@@ -0,0 +1,78 @@
+"""
+Benchmark how a consumer reads one placement footprint from a scene depth map.
+
+Each consumer (placement, occlusion, compositing) opens the depth map for
+one image and reads a 256x256 crop, as occlusion does:
+
+- png: decode the encoded 16-bit PNG (what every consumer of a
+  storage URL does today)
+- npy: np.load the whole float16 artifact
+- mmap: np.load(mmap_mode="r") and slice the crop; only its pages are read
+
+Run from luxeplan/backend:
+    python benchmarks/bench_artifact_store.py
+"""
+
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from app.services.artifact_store import DEPTH, ArtifactStore  # noqa: E402
+from app.services.depth import _stub_depth  # noqa: E402
+from app.services.depth_maps import decode_depth  # noqa: E402
+
+SIZES = ((1024, 768), (2048, 1536), (4096, 3072))
+CROP = 256
+REPEATS = 20
+
+
+def best_ms(fn) -> float:
+    times = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000)
+    return min(times)
+
+
+def main() -> None:
+    print(f"{'size':>10} {'png ms':>8} {'npy ms':>8} {'mmap ms':>8}")
+    with tempfile.TemporaryDirectory() as root:
+        store = ArtifactStore(root)
+        for width, height in SIZES:
+            depth = _stub_depth(width, height)
+            image_id = f"bench-{width}"
+            store.put(image_id, DEPTH, depth)
+            path = store.path(image_id, DEPTH)
+
+            buf = io.BytesIO()
+            Image.fromarray((depth * 1000).astype(np.uint16)).save(buf, "PNG")
+            png = buf.getvalue()
+
+            y, x = height // 2, width // 2
+            crop = (slice(y, y + CROP), slice(x, x + CROP))
+
+            def from_png():
+                decode_depth(png)[crop].max()
+
+            def from_npy():
+                np.load(path)[crop].max()
+
+            def from_mmap():
+                store.open(image_id, DEPTH)[crop].max()
+
+            print(
+                f"{width}x{height:<5} {best_ms(from_png):>8.2f}"
+                f" {best_ms(from_npy):>8.2f} {best_ms(from_mmap):>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
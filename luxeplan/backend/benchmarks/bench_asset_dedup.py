@@ -0,0 +1,56 @@
+"""
+Benchmark near-duplicate lookup in the asset dedup index.
+
+Random 64-bit hashes stand in for dHashes. Half the queries are stored
+hashes with 3 bits flipped (should match), half are fresh (should miss).
+The multi-index lookup is compared with a vectorized linear scan over all
+stored hashes.
+
+Run from luxeplan/backend:
+    python benchmarks/bench_asset_dedup.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np  # noqa: E402
+
+from app.services.asset_dedup import MAX_DISTANCE, HammingIndex  # noqa: E402
+
+SIZES = (10_000, 100_000, 500_000)
+QUERIES = 2000
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    print(f"max distance {MAX_DISTANCE} bits")
+    print(f"{'assets':>8} {'scan ms':>8} {'index ms':>9} {'matched':>8}")
+    for size in SIZES:
+        hashes = rng.integers(0, 2**64, size, dtype=np.uint64)
+        index: HammingIndex[int] = HammingIndex(MAX_DISTANCE)
+        for row, h in enumerate(hashes.tolist()):
+            index.add(h, row)
+
+        flips = np.uint64(1 << 3 | 1 << 29 | 1 << 58)
+        queries = np.concatenate(
+            (hashes[: QUERIES // 2] ^ flips, rng.integers(0, 2**64, QUERIES // 2, dtype=np.uint64))
+        ).tolist()
+
+        started = time.perf_counter()
+        for q in queries:
+            distances = np.bitwise_count(hashes ^ np.uint64(q))
+            distances.argmin()
+        scan_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+        started = time.perf_counter()
+        matched = sum(index.nearest(q) is not None for q in queries)
+        index_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+        print(f"{size:>8} {scan_ms:>8.3f} {index_ms:>9.3f} {matched:>8}")
+
+
+if __name__ == "__main__":
+    main()
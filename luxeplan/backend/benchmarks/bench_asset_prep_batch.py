@@ -0,0 +1,88 @@
+"""
+Benchmark bulk asset preparation against one-at-a-time prepare().
+
+Writes a synthetic catalog of product JPEGs to a temp directory, then:
+
+- sequential: read each file and await prepare() in turn
+- prepare_many (process / thread): stream (product_id, path) pairs through
+  the worker pool; workers read the files themselves
+
+Reports throughput and time to first result (what a streaming client sees
+first). Pool throughput scales with cores (LUXEPLAN_CPU_PROCESSES /
+LUXEPLAN_CPU_THREADS); on a single core neither pool can beat sequential.
+
+Run from luxeplan/backend:
+    python benchmarks/bench_asset_prep_batch.py [count]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from PIL import Image  # noqa: E402
+
+from app.services.asset_prep import AssetPrepService  # noqa: E402
+from app.services.executors import cpu_pools  # noqa: E402
+
+SIZE = (2000, 2000)
+
+
+def write_catalog(root: str, count: int) -> list[tuple[str, str]]:
+    image = Image.new("RGB", SIZE, (230, 230, 230))
+    image.paste((120, 80, 40), (500, 400, 1500, 1700))
+    items = []
+    for i in range(count):
+        path = os.path.join(root, f"{i}.jpg")
+        image.save(path, quality=90)
+        items.append((f"p{i}", path))
+    return items
+
+
+async def sequential(service: AssetPrepService, items: list) -> tuple[float, float]:
+    started = time.perf_counter()
+    first = None
+    for product_id, path in items:
+        await service.prepare(Path(path).read_bytes(), product_id)
+        first = first or time.perf_counter() - started
+    return time.perf_counter() - started, first
+
+
+async def bulk(service: AssetPrepService, items: list, pool: str) -> tuple[float, float]:
+    started = time.perf_counter()
+    first = None
+    async for result in service.prepare_many(iter(items), pool=pool):
+        assert result.error is None, result.error
+        first = first or time.perf_counter() - started
+    return time.perf_counter() - started, first
+
+
+async def main(count: int) -> None:
+    service = AssetPrepService()
+    with tempfile.TemporaryDirectory() as root:
+        items = write_catalog(root, count)
+        # Start the worker processes outside the timed runs.
+        await bulk(service, items[:cpu_pools.process.max_workers], "process")
+
+        print(
+            f"{count} images at {SIZE[0]}x{SIZE[1]}, {os.cpu_count()} cores,"
+            f" {cpu_pools.process.max_workers} processes / {cpu_pools.thread.max_workers} threads"
+        )
+        print(f"{'mode':>21} {'images/s':>9} {'first ms':>9}")
+        runs = (
+            ("sequential", sequential(service, items)),
+            ("prepare_many process", bulk(service, items, "process")),
+            ("prepare_many thread", bulk(service, items, "thread")),
+        )
+        for name, run in runs:
+            total, first = await run
+            print(f"{name:>21} {count / total:>9.1f} {first * 1000:>9.1f}")
+    cpu_pools.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 64))
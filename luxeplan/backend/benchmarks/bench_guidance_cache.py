@@ -0,0 +1,101 @@
+"""
+Benchmark the Gemini guidance cache against a local fake Gemini server.
+
+The fake answers generateContent after a fixed delay (standing in for model
+latency) and counts calls. Simulated users toggle selections back and
+forth: each step adds or removes one of a few products, and several users
+in the same room fire identical requests at once. Reports upstream calls
+and mean latency with TTL 0 (only concurrent duplicates are coalesced)
+and with the default TTL.
+
+Run from luxeplan/backend:
+    python benchmarks/bench_guidance_cache.py
+"""
+
+import asyncio
+import base64
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+UPSTREAM_DELAY_S = 0.2
+USERS = 4
+STEPS = 30
+PRODUCTS = ["faucet-003", "counter-001", "back-001", "cab-002"]
+
+
+class FakeGemini(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    calls = 0
+    lock = threading.Lock()
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers["content-length"]))
+        with FakeGemini.lock:
+            FakeGemini.calls += 1
+        time.sleep(UPSTREAM_DELAY_S)
+        guidance = {
+            "style_summary": "Warm contemporary.",
+            "color_palette": ["#E8E2DB"],
+            "recommended_product_ids": [],
+            "budget_warnings": [],
+        }
+        body = json.dumps(
+            {"candidates": [{"content": {"parts": [{"text": json.dumps(guidance)}]}}]}
+        ).encode()
+        self.send_response(200)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def selections_at(step: int) -> list[dict]:
+    # Toggle products on and off in a short cycle, as users do.
+    chosen = [p for i, p in enumerate(PRODUCTS) if (step >> (i % 3)) & 1]
+    return [{"product_id": p} for p in chosen]
+
+
+async def run(service, image_url: str) -> float:
+    latencies = []
+
+    async def request(step: int) -> None:
+        started = time.perf_counter()
+        await service.get_guidance(image_url, "kitchen", selections_at(step), ["warm"])
+        latencies.append(time.perf_counter() - started)
+
+    for step in range(STEPS):
+        await asyncio.gather(*(request(step) for _ in range(USERS)))
+    return sum(latencies) / len(latencies)
+
+
+def main() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGemini)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["GEMINI_API_KEY"] = "bench"
+    os.environ["GEMINI_API_BASE"] = f"http://127.0.0.1:{server.server_port}/v1beta"
+
+    from app.services.gemini_service import GeminiService
+
+    image_url = "data:image/jpeg;base64," + base64.b64encode(b"\xff\xd8room").decode()
+    print(f"{USERS} users x {STEPS} toggles, upstream {UPSTREAM_DELAY_S * 1000:.0f} ms")
+    print(f"{'mode':>13} {'upstream calls':>15} {'mean ms':>8}")
+    for name, ttl in (("coalesce only", "0"), ("cache", "900")):
+        os.environ["LUXEPLAN_GUIDANCE_CACHE_TTL_S"] = ttl
+        FakeGemini.calls = 0
+        mean_s = asyncio.run(run(GeminiService(), image_url))
+        print(f"{name:>13} {FakeGemini.calls:>15} {mean_s * 1000:>8.1f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
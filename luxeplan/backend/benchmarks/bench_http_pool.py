@@ -0,0 +1,133 @@
+"""
+Benchmark the shared keep-alive HTTP client against a client per call.
+
+A local HTTPS stand-in server (self-signed certificate made with openssl;
+plain HTTP if openssl is missing) answers small JSON product lookups after
+a fixed delay. Each mode issues REQUESTS lookups, CONCURRENCY at a time:
+
+- client per call: a fresh httpx.AsyncClient per lookup, so every request
+  pays TCP connect + TLS handshake
+- shared pool: one HttpClientPool client, reusing keep-alive connections
+
+Reports throughput, mean latency and the pool's connection reuse.
+
+Run from luxeplan/backend:
+    python benchmarks/bench_http_pool.py
+"""
+
+import asyncio
+import json
+import os
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx  # noqa: E402
+
+from app.services.http_client import HttpClientPool  # noqa: E402
+
+REQUESTS = 400
+CONCURRENCY = 16
+SERVER_DELAY_S = 0.002
+
+
+class FakeCatalog(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        time.sleep(SERVER_DELAY_S)
+        body = json.dumps({"id": self.path.rsplit("/", 1)[-1], "price": 129.0}).encode()
+        self.send_response(200)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def tls_context(workdir: Path) -> ssl.SSLContext | None:
+    cert, key = workdir / "cert.pem", workdir / "key.pem"
+    try:
+        subprocess.run(
+            [
+                "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1",
+                "-keyout", str(key), "-out", str(cert),
+            ],
+            check=True,
+            capture_output=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert, key)
+    # httpx trusts SSL_CERT_FILE when creating its default SSL context.
+    os.environ["SSL_CERT_FILE"] = str(cert)
+    return context
+
+
+async def run(get) -> tuple[float, float]:
+    slots = asyncio.Semaphore(CONCURRENCY)
+    latencies = []
+
+    async def lookup(i: int) -> None:
+        async with slots:
+            started = time.perf_counter()
+            response = await get(f"/products/{i}")
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(lookup(i) for i in range(REQUESTS)))
+    return REQUESTS / (time.perf_counter() - started), sum(latencies) / len(latencies)
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as workdir:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), FakeCatalog)
+        context = tls_context(Path(workdir))
+        if context is not None:
+            server.socket = context.wrap_socket(server.socket, server_side=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        scheme = "https" if context is not None else "http"
+        base = f"{scheme}://127.0.0.1:{server.server_port}"
+
+        async def per_call(path: str) -> httpx.Response:
+            async with httpx.AsyncClient() as client:
+                return await client.get(base + path)
+
+        pool = HttpClientPool(max_per_host=CONCURRENCY)
+
+        async def pooled(path: str) -> httpx.Response:
+            return await pool.client.get(base + path)
+
+        async def pooled_run() -> tuple[float, float]:
+            try:
+                return await run(pooled)
+            finally:
+                await pool.close()
+
+        print(f"{REQUESTS} lookups over {scheme}, {CONCURRENCY} concurrent, http2={pool.http2}")
+        print(f"{'mode':>16} {'req/s':>7} {'mean ms':>8}")
+        for name, fn in (("client per call", lambda: run(per_call)), ("shared pool", pooled_run)):
+            throughput, mean_s = asyncio.run(fn())
+            print(f"{name:>16} {throughput:>7.0f} {mean_s * 1000:>8.1f}")
+        host = next(iter(pool.stats()["hosts"].values()))
+        print(
+            f"pool: {host['requests']} requests on {host['new_connections']} connections "
+            f"(reuse {host['reuse_rate']:.1%})"
+        )
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark inference-resolution decoding against a full-resolution decode.
+
+Each case runs in a fresh subprocess so peak RSS is per decode, not
+cumulative. "full" decodes the upload at sensor resolution and downsizes it
+(the old path); "inference" uses ImageContext.for_inference(), which lets
+libjpeg decode straight at 1/2-1/8 scale.
+
+Run from luxeplan/backend:
+    python benchmarks/bench_inference_decode.py
+"""
+
+import io
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from app.services.image_context import ImageContext  # noqa: E402
+
+SIZES = {"12MP": (4000, 3000), "48MP": (8000, 6000)}
+REPEATS = 3
+
+
+def make_photo(width: int, height: int) -> bytes:
+    """Smooth gradients plus mild noise, so it compresses like a photo."""
+    rng = np.random.default_rng(0)
+    y = np.linspace(0, 1, height, dtype=np.float32)[:, None]
+    x = np.linspace(0, 1, width, dtype=np.float32)[None, :]
+    base = np.stack([180 * y + 40 * x, 150 - 60 * y + 30 * x, 120 + 80 * x * y], axis=-1)
+    noise = rng.normal(0, 4, (height, width, 1)).astype(np.float32)
+    pixels = np.clip(base + noise, 0, 255).astype(np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(pixels).save(buf, "JPEG", quality=90)
+    return buf.getvalue()
+
+
+def peak_rss_kib() -> int:
+    # Not ru_maxrss: Linux carries it over from the parent across fork/exec.
+    for line in Path("/proc/self/status").read_text().splitlines():
+        if line.startswith("VmHWM:"):
+            return int(line.split()[1])
+    raise RuntimeError("VmHWM unavailable (Linux only)")
+
+
+def decode(path: str, mode: str) -> dict:
+    data = Path(path).read_bytes()
+    baseline = peak_rss_kib()
+    started = time.perf_counter()
+    ctx = ImageContext(data)
+    if mode == "full":
+        image = ctx.rgb.reduce(2 ** ctx.inference_level())
+    else:
+        image = ctx.for_inference().image
+    elapsed = time.perf_counter() - started
+    peak = peak_rss_kib()
+    return {"ms": elapsed * 1000, "rss_mib": (peak - baseline) / 1024, "size": image.size}
+
+
+def run_case(path: str, mode: str) -> dict:
+    out = subprocess.run(
+        [sys.executable, __file__, "--child", path, mode],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(out.stdout)
+
+
+def main() -> None:
+    print(f"{'upload':>6} {'mode':>10} {'decode ms':>10} {'peak RSS MiB':>13} {'input':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, (width, height) in SIZES.items():
+            path = str(Path(tmp) / f"{label}.jpg")
+            Path(path).write_bytes(make_photo(width, height))
+            for mode in ("full", "inference"):
+                runs = [run_case(path, mode) for _ in range(REPEATS)]
+                best = min(runs, key=lambda r: r["ms"])
+                size = "x".join(map(str, best["size"]))
+                print(
+                    f"{label:>6} {mode:>10} {best['ms']:>10.1f}"
+                    f" {max(r['rss_mib'] for r in runs):>13.1f} {size:>10}"
+                )
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        print(json.dumps(decode(sys.argv[2], sys.argv[3])))
+    else:
+        main()
@@ -0,0 +1,66 @@
+"""
+Benchmark time-to-first-result of cross-source product search.
+
+Adapter searches and asset preparation are replaced by sleeps standing in
+for each platform's latency and for downloading and matting its images.
+Compares waiting for every source (ingest_all_sources) with streaming per
+source (stream_all_sources), where search results are sent before prep.
+
+Run from luxeplan/backend:
+    python benchmarks/bench_ingestion_stream.py
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.ingestion import NormalizedProduct, ProductIngestionService  # noqa: E402
+
+LATENCY_S = {"serp": 0.3, "homedepot": 0.9, "pinterest": 2.4}
+PREP_S = 1.0
+
+
+def stub_search(source: str):
+    async def search(query: str, limit: int = 20) -> list[NormalizedProduct]:
+        await asyncio.sleep(LATENCY_S[source])
+        return [
+            NormalizedProduct(f"{source}-{i}", source, query, "Brand", "faucet", 199.0, "", "")
+            for i in range(limit)
+        ]
+
+    return search
+
+
+async def main() -> None:
+    service = ProductIngestionService()
+    for source, adapter in service.adapters.items():
+        adapter.search = stub_search(source)
+
+    async def slow_prep(products: list[NormalizedProduct]) -> None:
+        await asyncio.sleep(PREP_S)
+
+    service.prepare_assets = slow_prep
+
+    started = time.perf_counter()
+    products = await service.ingest_all_sources("faucet")
+    gathered = time.perf_counter() - started
+
+    started = time.perf_counter()
+    first = None
+    async for result in service.stream_all_sources("faucet"):
+        if first is None and result.products:
+            first = time.perf_counter() - started
+    streamed = time.perf_counter() - started
+
+    print("source latency (s): " + ", ".join(f"{k} {v}" for k, v in LATENCY_S.items()))
+    print(f"asset prep per source (s): {PREP_S}")
+    print(f"{'mode':>8} {'first result ms':>16} {'all ms':>8}")
+    print(f"{'gather':>8} {gathered * 1000:>16.0f} {gathered * 1000:>8.0f}   ({len(products)} products)")
+    print(f"{'stream':>8} {first * 1000:>16.0f} {streamed * 1000:>8.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+"""
+Benchmark mask_geometry.extract_regions against per-class full-frame
+contour tracing, and compare payload sizes with per-class mask PNGs.
+
+The baseline does the same work the naive way: a full-frame mask, contour
+trace, simplification and RLE per class. The label maps are smooth random
+noise quantized into 10 classes, so regions are irregular blobs rather than
+rectangles.
+
+Run from luxeplan/backend:
+    python benchmarks/bench_mask_geometry.py
+"""
+
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from app.services.mask_geometry import SIMPLIFY_TOLERANCE, extract_regions  # noqa: E402
+from app.services.mask_rle import counts_to_string  # noqa: E402
+
+NUM_LABELS = 10
+SIZES = ((512, 384), (1024, 768), (2048, 1536))
+REPEATS = 5
+
+
+def make_label_map(width: int, height: int) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    noise = rng.random((6, 8), dtype=np.float32)
+    smooth = cv2.resize(noise, (width, height), interpolation=cv2.INTER_CUBIC)
+    edges = np.quantile(smooth, np.linspace(0, 1, NUM_LABELS + 1)[1:-1])
+    return np.digitize(smooth, edges).astype(np.uint8)
+
+
+def per_class_baseline(label_map: np.ndarray) -> list:
+    results = []
+    for label in range(NUM_LABELS):
+        mask = (label_map == label).astype(np.uint8)
+        contours, _ = cv2.findContours(mask, cv2.RETR_CCOMP, cv2.CHAIN_APPROX_NONE)
+        rings = [cv2.approxPolyDP(c, SIMPLIFY_TOLERANCE, True) for c in contours]
+        area = sum(cv2.contourArea(r) for r in rings)
+        flat = mask.ravel(order="F")
+        change = np.flatnonzero(np.diff(flat)) + 1
+        counts = np.diff(np.concatenate(([0], change, [flat.size])))
+        results.append((rings, area, cv2.boundingRect(mask), counts))
+    return results
+
+
+def best_ms(fn, *args) -> float:
+    times = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        fn(*args)
+        times.append((time.perf_counter() - started) * 1000)
+    return min(times)
+
+
+def main() -> None:
+    print(
+        f"{'size':>10} {'baseline ms':>12} {'extract ms':>11}"
+        f" {'PNG KiB':>9} {'polygons KiB':>13} {'RLE KiB':>9}"
+    )
+    for width, height in SIZES:
+        label_map = make_label_map(width, height)
+        regions = extract_regions(label_map, NUM_LABELS)
+
+        png_bytes = 0
+        for label in range(NUM_LABELS):
+            buf = io.BytesIO()
+            Image.fromarray((label_map == label).astype(np.uint8) * 255).save(buf, "PNG")
+            png_bytes += len(buf.getvalue())
+        polygon_bytes = len(json.dumps(
+            [[ring.tolist() for ring in r.polygons + r.holes] for r in regions.values()]
+        ))
+        rle_bytes = sum(len(counts_to_string(r.rle_counts)) for r in regions.values())
+
+        print(
+            f"{width}x{height:<5} {best_ms(per_class_baseline, label_map):>12.1f}"
+            f" {best_ms(extract_regions, label_map, NUM_LABELS):>11.1f}"
+            f" {png_bytes / 1024:>9.1f} {polygon_bytes / 1024:>13.1f} {rle_bytes / 1024:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
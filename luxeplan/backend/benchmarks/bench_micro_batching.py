@@ -0,0 +1,76 @@
+"""
+Benchmark MicroBatcher with a stand-in CPU model.
+
+The stand-in is a small MLP in NumPy: like a real network, one call on a
+batch of N inputs costs far less than N single-input calls. Concurrent
+requests are submitted on one event loop at several max batch sizes; every
+output is checked against the unbatched result.
+
+Run from luxeplan/backend:
+    python benchmarks/bench_micro_batching.py
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np  # noqa: E402
+
+from app.services.batching import BatchConfig, MicroBatcher  # noqa: E402
+
+FEATURES = 2048
+LAYERS = 4
+REQUESTS = 256
+CONCURRENCY = 32
+BATCH_SIZES = (1, 4, 8, 16, 32)
+MAX_WAIT_MS = 2.0
+
+rng = np.random.default_rng(0)
+WEIGHTS = [rng.standard_normal((FEATURES, FEATURES), dtype=np.float32) / 45 for _ in range(LAYERS)]
+
+
+def stand_in_model(batch: list[np.ndarray]) -> list[np.ndarray]:
+    x = np.stack(batch)
+    for w in WEIGHTS:
+        x = np.maximum(x @ w, 0)
+    return list(x)
+
+
+async def run(max_batch_size: int, inputs: list[np.ndarray]) -> tuple[float, list, dict]:
+    batcher = MicroBatcher(
+        f"bench{max_batch_size}",
+        stand_in_model,
+        config=BatchConfig(max_batch_size=max_batch_size, max_wait_ms=MAX_WAIT_MS),
+    )
+    limit = asyncio.Semaphore(CONCURRENCY)
+
+    async def request(x: np.ndarray) -> np.ndarray:
+        async with limit:
+            return await batcher.submit(x)
+
+    started = time.perf_counter()
+    outputs = await asyncio.gather(*(request(x) for x in inputs))
+    return time.perf_counter() - started, outputs, batcher.metrics()
+
+
+def main() -> None:
+    inputs = [rng.standard_normal(FEATURES, dtype=np.float32) for _ in range(REQUESTS)]
+    expected = stand_in_model(inputs)
+
+    print(f"{REQUESTS} requests, {CONCURRENCY} in flight, max_wait {MAX_WAIT_MS} ms")
+    print(f"{'max batch':>9} {'req/s':>9} {'avg batch':>10} {'wait avg ms':>12}  histogram")
+    for size in BATCH_SIZES:
+        elapsed, outputs, metrics = asyncio.run(run(size, inputs))
+        for got, want in zip(outputs, expected):
+            assert np.allclose(got, want, rtol=1e-4, atol=1e-4)
+        print(
+            f"{size:>9} {REQUESTS / elapsed:>9.0f} {metrics['avg_batch_size']:>10.2f}"
+            f" {metrics['wait_avg_ms']:>12.2f}  {metrics['batch_size_histogram']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
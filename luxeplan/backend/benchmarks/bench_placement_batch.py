@@ -0,0 +1,87 @@
+"""
+Benchmark /api/placement/compute-batch against N single /compute calls.
+
+Run from luxeplan/backend:
+    python benchmarks/bench_placement_batch.py
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.services.detection import DETECTABLE_OBJECTS  # noqa: E402
+
+DESIGN_STATE = [
+    ("faucets", 400, 600, None),
+    ("sinks", 800, 500, None),
+    ("countertops", 2000, 1000, None),
+    ("backsplash", 2000, 800, None),
+    ("cabinets", 1800, 1200, None),
+    ("flooring", 2000, 2000, None),
+    ("lighting", 500, 700, None),
+    ("mirrors", 900, 1200, None),
+    ("hardware", 200, 100, None),
+    ("appliances", 900, 900, None),
+    ("vanity", 1200, 900, None),
+    ("shower", 300, 300, None),
+]
+ANCHOR_COUNTS = (10, 100, 500)
+REPEATS = 20
+
+
+def make_anchors(n: int, width: int, height: int) -> list[dict]:
+    rng = random.Random(n)
+    return [
+        {
+            "id": f"a{i}",
+            "label": rng.choice(DETECTABLE_OBJECTS),
+            "x": rng.uniform(0, width),
+            "y": rng.uniform(0, height),
+            "width": rng.uniform(20, 400),
+            "height": rng.uniform(20, 400),
+            "confidence": rng.uniform(0.05, 0.99),
+            "plane": rng.choice(["wall", "floor", "countertop", "ceiling"]),
+        }
+        for i in range(n)
+    ]
+
+
+def main() -> None:
+    client = TestClient(app)
+    width, height = 4032, 3024
+
+    print(f"{'anchors':>8} {'items':>6} {'single ms':>10} {'batch ms':>9} {'speedup':>8}")
+    for n in ANCHOR_COUNTS:
+        scene = {
+            "anchors": make_anchors(n, width, height),
+            "depth_map_url": "/api/depth/bench/depth_map.png",
+            "image_width": width,
+            "image_height": height,
+        }
+        items = [
+            {"category": c, "asset_width": w, "asset_height": h, "target_anchor_label": t}
+            for c, w, h, t in DESIGN_STATE
+        ]
+
+        t0 = time.perf_counter()
+        for _ in range(REPEATS):
+            singles = [client.post("/api/placement/compute", json={**scene, **item}).json() for item in items]
+        single_ms = (time.perf_counter() - t0) * 1000 / REPEATS
+
+        t0 = time.perf_counter()
+        for _ in range(REPEATS):
+            batch = client.post("/api/placement/compute-batch", json={**scene, "items": items}).json()
+        batch_ms = (time.perf_counter() - t0) * 1000 / REPEATS
+
+        assert batch["results"] == singles
+        print(f"{n:>8} {len(items):>6} {single_ms:>10.2f} {batch_ms:>9.2f} {single_ms / batch_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark plane fitting across inference sizes.
+
+Segments and depth come from the development stubs, with 1 cm depth noise
+and 10% outliers added. The budgeted RANSAC fit samples a fixed number of
+points from each segment's RLE; the dense baseline decodes every mask and
+least-squares fits all of its pixels. Time per image should stay flat for
+the budgeted fit as the resolution grows.
+
+Run from luxeplan/backend:
+    python benchmarks/bench_plane_fitting.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from app.services import mask_rle  # noqa: E402
+from app.services.depth import _stub_depth  # noqa: E402
+from app.services.image_context import ScaledImage  # noqa: E402
+from app.services.plane_fitting import (  # noqa: E402
+    PLANAR_LABELS,
+    back_project,
+    focal_length_px,
+    infer_planes,
+)
+from app.services.segmentation import SegmentationService  # noqa: E402
+
+SIZES = ((512, 384), (1024, 768), (2048, 1536), (4096, 3072))
+REPEATS = 5
+
+
+def make_scene(width: int, height: int) -> tuple[ScaledImage, list, np.ndarray]:
+    image = ScaledImage(Image.new("RGB", (width, height)), (width, height))
+    segments = SegmentationService()._postprocess(image, "bench", None)
+    rng = np.random.default_rng(0)
+    depth = _stub_depth(width, height) + rng.normal(0, 0.01, (height, width))
+    outliers = rng.random((height, width)) < 0.1
+    depth[outliers] *= rng.uniform(0.5, 1.5, outliers.sum())
+    return image, segments, depth.astype(np.float32)
+
+
+def dense_fit(segments: list, depth: np.ndarray, image: ScaledImage) -> list:
+    """Baseline: every pixel of every mask, one least-squares fit each."""
+    size = image.image.size
+    focal = focal_length_px(size[0])
+    fits = []
+    for segment in segments:
+        if segment.label not in PLANAR_LABELS:
+            continue
+        counts, rle_size = mask_rle.unpack(segment.rle)
+        ys, xs = np.nonzero(mask_rle.decode(counts, rle_size))
+        points = back_project(xs, ys, depth[ys, xs].astype(np.float64), size, focal)
+        centroid = points.mean(axis=0)
+        fits.append(np.linalg.svd(points - centroid, full_matrices=False)[2][-1])
+    return fits
+
+
+def best_ms(fn, *args) -> float:
+    times = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        fn(*args)
+        times.append((time.perf_counter() - started) * 1000)
+    return min(times)
+
+
+def main() -> None:
+    print(f"{'size':>10} {'dense ms':>9} {'budgeted ms':>12}  floor normal / distance")
+    for width, height in SIZES:
+        image, segments, depth = make_scene(width, height)
+        floor = next(p for p in infer_planes(segments, depth, image) if p.label == "floor")
+        print(
+            f"{width}x{height:<5} {best_ms(dense_fit, segments, depth, image):>9.1f}"
+            f" {best_ms(infer_planes, segments, depth, image):>12.1f}"
+            f"  {floor.normal} / {floor.distance} m"
+        )
+
+
+if __name__ == "__main__":
+    main()
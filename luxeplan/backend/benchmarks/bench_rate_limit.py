@@ -0,0 +1,129 @@
+"""
+Benchmark outbound rate limiting against a local throttling upstream.
+
+The fake upstream admits UPSTREAM_RPS requests/second (token bucket, small
+burst) and answers everything else with 429. WORKERS processes, standing in
+for uvicorn workers, each fire CALLS_PER_WORKER requests at once through a
+RateLimiter and report how many 429s they provoked and how long the batch
+took:
+
+- unlimited: no bucket, only the jittered retry on 429
+- per-process: each worker has its own bucket at the upstream rate, so
+  together they overshoot it WORKERS-fold
+- shared: one file-locked bucket for all workers (LUXEPLAN_RATE_LIMIT_DIR)
+
+Run from luxeplan/backend:
+    python benchmarks/bench_rate_limit.py
+"""
+
+import asyncio
+import multiprocessing
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx  # noqa: E402
+
+from app.services.rate_limit import (  # noqa: E402
+    FileBucketState,
+    RateLimiter,
+    Throttled,
+    UpstreamLimit,
+    parse_retry_after,
+)
+
+UPSTREAM_RPS = 40.0
+UPSTREAM_BURST = 5.0
+UPSTREAM_DELAY_S = 0.02
+WORKERS = 4
+CALLS_PER_WORKER = 40
+
+
+class FakeUpstream(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    lock = threading.Lock()
+    tokens = UPSTREAM_BURST
+    updated = time.monotonic()
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        with FakeUpstream.lock:
+            now = time.monotonic()
+            cls = FakeUpstream
+            cls.tokens = min(UPSTREAM_BURST, cls.tokens + (now - cls.updated) * UPSTREAM_RPS)
+            cls.updated = now
+            admitted = cls.tokens >= 1
+            if admitted:
+                cls.tokens -= 1
+        if admitted:
+            time.sleep(UPSTREAM_DELAY_S)
+            self.send_response(200)
+        else:
+            self.send_response(429)
+            self.send_header("retry-after", "0.5")
+        self.send_header("content-length", "0")
+        self.end_headers()
+
+
+def worker(url: str, mode: str, bucket_dir: str, results) -> None:
+    rate = 0.0 if mode == "unlimited" else UPSTREAM_RPS
+    limit = UpstreamLimit(rate=rate, burst=UPSTREAM_BURST, max_concurrency=16)
+    state = FileBucketState(Path(bucket_dir) / "bench.bucket", limit.burst) if mode == "shared" else None
+    limiter = RateLimiter("bench", limit, state)
+    limiter.max_retries = 20
+
+    async def run() -> None:
+        async with httpx.AsyncClient() as client:
+
+            async def call() -> None:
+                response = await client.get(url)
+                if response.status_code == 429:
+                    raise Throttled(retry_after=parse_retry_after(response.headers.get("retry-after")))
+
+            started = time.perf_counter()
+            await asyncio.gather(*(limiter.call(call) for _ in range(CALLS_PER_WORKER)))
+            stats = limiter.stats()
+            results.put((stats["throttled"], time.perf_counter() - started, stats["queue_avg_ms"]))
+
+    asyncio.run(run())
+
+
+def main() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeUpstream)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/"
+    total = WORKERS * CALLS_PER_WORKER
+    ideal = max(0.0, total - UPSTREAM_BURST) / UPSTREAM_RPS
+
+    print(f"upstream {UPSTREAM_RPS:.0f} rps; {WORKERS} workers x {CALLS_PER_WORKER} calls (ideal {ideal:.1f} s)")
+    print(f"{'mode':>12} {'429s':>6} {'wall s':>7} {'queue avg ms':>13}")
+    ctx = multiprocessing.get_context("fork")
+    for mode in ("unlimited", "per-process", "shared"):
+        with tempfile.TemporaryDirectory() as bucket_dir:
+            time.sleep(UPSTREAM_BURST / UPSTREAM_RPS)  # let the upstream bucket refill
+            results = ctx.Queue()
+            procs = [
+                ctx.Process(target=worker, args=(url, mode, bucket_dir, results))
+                for _ in range(WORKERS)
+            ]
+            for p in procs:
+                p.start()
+            rows = [results.get() for _ in procs]
+            for p in procs:
+                p.join()
+        throttled = sum(r[0] for r in rows)
+        wall = max(r[1] for r in rows)
+        queue_ms = sum(r[2] for r in rows) / len(rows)
+        print(f"{mode:>12} {throttled:>6} {wall:>7.2f} {queue_ms:>13.1f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# Keep the disk tiers out of the working tree; set before app modules import.
+_scratch = tempfile.mkdtemp(prefix="luxeplan-tests-")
+os.environ.setdefault("LUXEPLAN_CACHE_DIR", os.path.join(_scratch, "cache"))
+os.environ.setdefault("LUXEPLAN_ARTIFACT_DIR", os.path.join(_scratch, "artifacts"))
@@ -0,0 +1,74 @@
+import os
+import time
+
+from app.services.analysis_cache import AnalysisCache, content_hash, image_id_for
+
+
+def test_keys_on_content_kind_and_version(tmp_path):
+    cache = AnalysisCache(disk_dir=str(tmp_path))
+    image_hash = content_hash(b"photo")
+    assert image_hash == content_hash(b"photo") != content_hash(b"photo2")
+    assert image_id_for(image_hash) == image_id_for(content_hash(b"photo"))
+
+    cache.put(image_hash, "segment", "v1", b"masks")
+    assert cache.get(image_hash, "segment", "v1") == b"masks"
+    assert cache.get(image_hash, "segment", "v2") is None
+    assert cache.get(image_hash, "depth", "v1") is None
+    assert cache.get(content_hash(b"photo2"), "segment", "v1") is None
+
+    # Unsafe kind/version strings stay inside the cache directory.
+    cache.put(image_hash, "../kind", "v/1", b"x")
+    assert cache.get(image_hash, "../kind", "v/1") == b"x"
+    assert all(tmp_path in p.parents for p in tmp_path.rglob("*.bin"))
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = AnalysisCache(memory_budget=10, disk_dir=None)
+    cache.put("a", "k", "v", b"12345")
+    cache.put("b", "k", "v", b"12345")
+    assert cache.get("a", "k", "v") is not None  # "a" is now most recent
+    cache.put("c", "k", "v", b"12345")
+
+    assert cache.get("b", "k", "v") is None
+    assert cache.get("a", "k", "v") == cache.get("c", "k", "v") == b"12345"
+    cache.put("big", "k", "v", b"x" * 11)  # over budget: never held
+    assert cache.get("big", "k", "v") is None
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["memory_bytes"] == 10
+
+
+def test_disk_tier_survives_restart_and_prunes_oldest(tmp_path):
+    cache = AnalysisCache(memory_budget=0, disk_dir=str(tmp_path), disk_budget=25)
+    for n, name in enumerate("abc"):
+        cache.put(name, "k", "v", b"1234567890")
+        for path in tmp_path.rglob(f"*/{name}/*.bin"):
+            os.utime(path, (time.time() - 100 + n, time.time() - 100 + n))
+
+    fresh = AnalysisCache(memory_budget=0, disk_dir=str(tmp_path), disk_budget=25)
+    assert fresh.get("a", "k", "v") is None  # oldest, pruned
+    assert fresh.get("b", "k", "v") == fresh.get("c", "k", "v") == b"1234567890"
+    assert fresh.stats()["disk_hits"] == 2
+
+
+def test_overwriting_a_key_counts_its_bytes_once(tmp_path):
+    cache = AnalysisCache(memory_budget=0, disk_dir=str(tmp_path), disk_budget=1000)
+    cache.put("a", "k", "v", b"x" * 10)
+    for _ in range(3):
+        cache.put("a", "k", "v", b"y" * 12)
+    assert cache.stats()["disk_bytes"] == 12
+    assert cache.stats()["disk_bytes"] == cache._disk.scan()
+
+
+def test_scan_tolerates_files_pruned_by_another_process(tmp_path, monkeypatch):
+    cache = AnalysisCache(memory_budget=0, disk_dir=str(tmp_path))
+    cache.put("a", "k", "v", b"1234")
+    cache.put("b", "k", "v", b"5678")
+    real_rglob = type(tmp_path).rglob
+
+    def rglob_then_prune(self, pattern):
+        paths = list(real_rglob(self, pattern))
+        paths[0].unlink()  # gone between listing and stat
+        return iter(paths)
+
+    monkeypatch.setattr(type(tmp_path), "rglob", rglob_then_prune)
+    assert cache._disk.scan() == 4
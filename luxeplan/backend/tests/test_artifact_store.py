@@ -0,0 +1,62 @@
+import io
+import os
+import time
+
+import numpy as np
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.services.artifact_store import DEPTH, LABELS, ArtifactStore, artifact_store
+from app.services.depth_maps import depth_maps
+
+
+def test_put_converts_and_maps_read_only(tmp_path):
+    store = ArtifactStore(root=str(tmp_path))
+    depth = np.linspace(0.5, 8.0, 12, dtype=np.float64).reshape(3, 4)
+
+    stored = store.put("0a1b-image", DEPTH, depth)
+    assert isinstance(stored, np.memmap) and stored.dtype == np.float16
+    assert not stored.flags.writeable
+    np.testing.assert_allclose(stored, depth, rtol=1e-3)
+    assert store.exists("0a1b-image", DEPTH) and not store.exists("0a1b-image", LABELS)
+    assert store.open("missing", DEPTH) is None
+    # Ids can't step outside the root.
+    assert tmp_path in store.path("../../etc", DEPTH).parents
+
+
+def test_prunes_least_recently_opened_first(tmp_path):
+    labels = np.zeros((32, 32), np.uint8)
+    size = ArtifactStore(root=str(tmp_path / "probe")).put("probe", LABELS, labels).nbytes + 128
+    store = ArtifactStore(root=str(tmp_path / "store"), disk_budget=int(size * 2.5))
+    for n, image_id in enumerate(["old", "used", "new"]):
+        store.put(image_id, LABELS, labels)
+        stamp = time.time() - 100 + n
+        os.utime(store.path(image_id, LABELS), (stamp, stamp))
+        if image_id == "used":
+            store.open("old", LABELS)  # "old" becomes the most recently opened
+
+    assert store.exists("old", LABELS) and store.exists("new", LABELS)
+    assert not store.exists("used", LABELS)
+    assert store.stats()["evictions"] == 1
+    assert store.stats()["disk_bytes"] == store._disk.scan()
+
+
+def test_cached_analysis_republishes_pruned_depth():
+    from app.main import app
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (320, 240), (180, 170, 160)).save(buffer, "JPEG")
+    upload = {"file": ("room.jpg", buffer.getvalue(), "image/jpeg")}
+
+    with TestClient(app) as client:
+        first = client.post("/api/vision/analyze", files=upload).json()
+        image_id, url = first["image_id"], first["depth_map_url"]
+        # The artifact store is pruned on its own budget; drop this one.
+        artifact_store.path(image_id, DEPTH).unlink()
+        depth_maps._maps.pop(url, None)
+
+        second = client.post("/api/vision/analyze", files=upload).json()
+
+    assert second["depth_map_url"] == url
+    assert artifact_store.exists(image_id, DEPTH)
+    assert depth_maps.get(url) is not None
@@ -0,0 +1,36 @@
+import numpy as np
+from PIL import Image
+
+from app.services.asset_dedup import AssetDedupCache, Fingerprint, HammingIndex, dhash
+
+
+def test_nearest_within_max_distance():
+    rng = np.random.default_rng(0)
+    hashes = rng.integers(0, 2**64, 5000, dtype=np.uint64).tolist()
+    index: HammingIndex[int] = HammingIndex(max_distance=6)
+    for row, h in enumerate(hashes):
+        index.add(h, row)
+
+    near = hashes[42] ^ (1 << 3 | 1 << 20 | 1 << 37 | 1 << 50 | 1 << 61)
+    assert index.nearest(near) == (42, 5)
+    assert index.nearest(hashes[7]) == (7, 0)
+
+    far = hashes[42] ^ sum(1 << b for b in range(0, 64, 9))  # 8 bits flipped
+    match = index.nearest(far)
+    assert match is None or match[0] != 42
+
+
+def test_flat_images_get_no_perceptual_hash():
+    assert dhash(Image.new("RGB", (64, 64), (240, 240, 240))) is None
+    gradient = np.tile(np.arange(0, 256, 4, dtype=np.uint8), (64, 1))
+    assert dhash(Image.fromarray(gradient)) is not None
+
+
+def test_cache_lookup_prefers_exact_then_near():
+    cache: AssetDedupCache[str] = AssetDedupCache(max_distance=6)
+    cache.add(Fingerprint("a", 0b1011), "first")
+
+    assert cache.lookup(Fingerprint("a", None)) == ("first", "exact")
+    assert cache.lookup(Fingerprint("b", 0b1001)) == ("first", "near")
+    assert cache.lookup(Fingerprint("c", None)) is None
+    assert cache.stats()["exact_hits"] == 1 and cache.stats()["near_hits"] == 1
@@ -0,0 +1,91 @@
+import asyncio
+import io
+
+import httpx
+from PIL import Image
+
+from app.models import AssetPrepResponse
+from app.services import asset_prep
+from app.services.asset_dedup import AssetDedupCache, Fingerprint
+from app.services.asset_prep import AssetPrepService
+
+
+def test_waiters_take_over_one_at_a_time_after_a_failed_preparation():
+    service = AssetPrepService(dedup=AssetDedupCache())
+    fp = Fingerprint(exact="abc", perceptual=None)
+    calls = []
+
+    async def work():
+        calls.append(len(calls))
+        await asyncio.sleep(0.01)
+        if len(calls) == 1:
+            raise RuntimeError("matting failed")
+        return AssetPrepResponse(alpha_png_url="/a.png", pose_rating=8, is_insertion_ready=True)
+
+    async def run():
+        return await asyncio.gather(
+            *(service._prepared(fp, work) for _ in range(5)), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+
+    assert isinstance(results[0], RuntimeError)
+    responses = results[1:]
+    assert all(isinstance(r, AssetPrepResponse) for r in responses)
+    # One waiter re-ran the work; the rest reused its result.
+    assert len(calls) == 2
+    assert sorted(r.reused or "" for r in responses) == ["", "exact", "exact", "exact"]
+    assert service._in_flight == {}
+
+
+class _Pool:
+    def __init__(self, handler):
+        self.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_batch_downloads_only_allowed_hosts_within_the_size_cap(monkeypatch):
+    monkeypatch.setattr(asset_prep, "MAX_ASSET_BYTES", 1024)
+    requested = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested.append(str(request.url))
+        if request.url.path == "/moved.jpg":
+            return httpx.Response(302, headers={"location": "http://169.254.169.254/"})
+        if request.url.path == "/huge.jpg":
+            return httpx.Response(200, content=b"\0" * 4096)
+        return httpx.Response(200, content=_jpeg())
+
+    service = AssetPrepService(
+        dedup=AssetDedupCache(), http=_Pool(handler), allowed_hosts={"cdn.example.com"}
+    )
+    items = [
+        ("metadata", "http://169.254.169.254/latest/meta-data"),
+        ("moved", "https://cdn.example.com/moved.jpg"),
+        ("huge", "https://cdn.example.com/huge.jpg"),
+        ("ok", "https://cdn.example.com/chair.jpg"),
+    ]
+
+    async def run():
+        return [item async for item in service.prepare_many(items, pool="thread")]
+
+    results = {item.product_id: item for item in asyncio.run(run())}
+
+    assert "169.254.169.254" not in " ".join(requested)
+    assert results["metadata"].error.startswith("FetchRefused")
+    assert results["moved"].error.startswith("FetchRefused")
+    assert results["huge"].error.startswith("FetchRefused")
+    assert results["ok"].result is not None and results["ok"].error is None
+
+
+def test_unknown_pool_name_falls_back_to_the_process_pool(monkeypatch, caplog):
+    monkeypatch.setenv("LUXEPLAN_ASSET_PREP_POOL", "proces")
+    assert asset_prep.prep_pool_from_env() == "process"
+    assert "LUXEPLAN_ASSET_PREP_POOL" in caplog.text
+    monkeypatch.setenv("LUXEPLAN_ASSET_PREP_POOL", "thread")
+    assert asset_prep.prep_pool_from_env() == "thread"
+
+
+def _jpeg() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), (200, 80, 40)).save(buffer, "JPEG")
+    return buffer.getvalue()
@@ -0,0 +1,95 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from app.services.batching import BatchConfig, MicroBatcher
+
+rng = np.random.default_rng(0)
+WEIGHTS = [rng.standard_normal((16, 16)).astype(np.float32) / 4 for _ in range(2)]
+executor = ThreadPoolExecutor(max_workers=2)
+
+
+def stand_in_model(batch: list[np.ndarray]) -> list[np.ndarray]:
+    """A tiny MLP: one call on a stacked batch, one output per input."""
+    x = np.stack(batch)
+    for w in WEIGHTS:
+        x = np.maximum(x @ w, 0)
+    return list(x)
+
+
+def make_batcher(fn=stand_in_model, size: int = 4, wait_ms: float = 5.0) -> MicroBatcher:
+    return MicroBatcher("test", fn, BatchConfig(max_batch_size=size, max_wait_ms=wait_ms), executor)
+
+
+def test_outputs_match_unbatched_calls_in_order():
+    inputs = [rng.standard_normal(16).astype(np.float32) for _ in range(10)]
+    batcher = make_batcher(size=4)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(x) for x in inputs))
+
+    outputs = asyncio.run(run())
+    for x, y in zip(inputs, outputs):
+        np.testing.assert_allclose(y, stand_in_model([x])[0], rtol=1e-5, atol=1e-6)
+    metrics = batcher.metrics()
+    assert metrics["items"] == 10
+    assert metrics["batch_size_histogram"] == {"4": 2, "2": 1}
+
+
+def test_batches_never_exceed_max_size():
+    sizes = []
+
+    def record(batch):
+        sizes.append(len(batch))
+        return batch
+
+    batcher = make_batcher(record, size=3, wait_ms=50)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(n) for n in range(7)))
+
+    assert asyncio.run(run()) == list(range(7))
+    assert sizes == [3, 3, 1]
+
+
+def test_partial_batch_flushes_after_max_wait():
+    batcher = make_batcher(lambda batch: batch, size=8, wait_ms=30)
+
+    async def run():
+        started = time.perf_counter()
+        result = await batcher.submit("only")
+        return result, (time.perf_counter() - started) * 1000
+
+    result, elapsed_ms = asyncio.run(run())
+    assert result == "only"
+    assert 25 <= elapsed_ms < 500
+    assert batcher.metrics()["wait_max_ms"] >= 25
+
+
+def test_a_failing_batch_raises_to_every_waiter():
+    def broken(batch):
+        raise RuntimeError("model crashed")
+
+    batcher = make_batcher(broken, size=3)
+
+    async def run():
+        return await asyncio.gather(
+            *(batcher.submit(n) for n in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert [type(r) for r in results] == [RuntimeError] * 3
+    assert batcher.metrics()["failed_batches"] == 1
+
+
+def test_wrong_number_of_outputs_fails_the_batch():
+    batcher = make_batcher(lambda batch: batch[:-1], size=2)
+
+    async def run():
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2))
+
+    with pytest.raises(RuntimeError, match="returned 1 outputs"):
+        asyncio.run(run())
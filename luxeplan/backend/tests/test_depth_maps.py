@@ -0,0 +1,42 @@
+import io
+
+import httpx
+import numpy as np
+import pytest
+
+from app.services import depth_maps as depth_maps_module
+from app.services.depth_maps import DepthMapCache
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/etc/passwd",
+        "file:///etc/passwd",
+        "http://169.254.169.254/latest/meta-data",
+        "https://storage.example.com.evil.test/depth.npy",
+        "ftp://storage.example.com/depth.npy",
+        "/api/depth/../depth_map.png",
+    ],
+)
+def test_refuses_urls_off_the_storage_hosts(url):
+    cache = DepthMapCache(allowed_hosts={"storage.example.com"})
+    with pytest.raises(ValueError):
+        cache._load(url)
+
+
+def test_fetches_allowed_host_without_following_redirects(monkeypatch):
+    buffer = io.BytesIO()
+    np.save(buffer, np.ones((2, 2), dtype=np.float32))
+    calls = []
+
+    def fake_get(url, **kwargs):
+        calls.append(kwargs)
+        return httpx.Response(200, content=buffer.getvalue(), request=httpx.Request("GET", url))
+
+    monkeypatch.setattr(depth_maps_module.httpx, "get", fake_get)
+    cache = DepthMapCache(allowed_hosts={"storage.example.com"})
+    depth = cache.get("https://storage.example.com/scene/depth.npy")
+
+    assert depth.shape == (2, 2)
+    assert calls[0]["follow_redirects"] is False
@@ -0,0 +1,83 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.services.gemini_service import GeminiService, guidance_key, image_ref
+from app.services.http_client import FetchRefused
+
+GUIDANCE = {
+    "style_summary": "Warm contemporary.",
+    "color_palette": ["#E8E2DB"],
+    "recommended_product_ids": [],
+    "budget_warnings": [],
+}
+
+
+def test_guidance_key_ignores_selection_and_preference_order():
+    a = guidance_key("img", "kitchen", [{"id": 1}, {"id": 2}], ["warm", "modern"], "m")
+    b = guidance_key("img", "kitchen", [{"id": 2}, {"id": 1}], ["modern", "warm"], "m")
+    assert a == b
+    assert a != guidance_key("img", "bath", [{"id": 1}, {"id": 2}], ["warm", "modern"], "m")
+
+
+def test_image_ref_hashes_inline_images_and_keeps_urls():
+    assert image_ref("data:image/jpeg;base64,AAAA") == image_ref("data:image/png;base64,AAAA")
+    assert image_ref("https://cdn.example.com/room.jpg") == "url:https://cdn.example.com/room.jpg"
+
+
+def test_cache_hit_skips_image_download(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.method)
+        if request.method == "GET":
+            return httpx.Response(200, content=b"\xff\xd8room", headers={"content-type": "image/jpeg"})
+        text = json.dumps(GUIDANCE)
+        return httpx.Response(200, json={"candidates": [{"content": {"parts": [{"text": text}]}}]})
+
+    service = GeminiService(
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        allowed_hosts={"cdn.example.com"},
+    )
+
+    async def run():
+        for _ in range(3):
+            response = await service.get_guidance(
+                "https://cdn.example.com/room.jpg", "kitchen", [{"product_id": "p1"}]
+            )
+        return response
+
+    response = asyncio.run(run())
+    assert response.style_summary == "Warm contemporary."
+    assert requests == ["GET", "POST"]
+
+
+@pytest.mark.parametrize(
+    "url, error",
+    [
+        ("http://169.254.169.254/latest/meta-data", "allowed host"),
+        ("https://cdn.example.com/moved.jpg", "Redirects"),
+        ("https://cdn.example.com/huge.jpg", "bytes"),
+    ],
+)
+def test_refuses_images_off_the_allow_list_redirected_or_too_large(monkeypatch, url, error):
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+    monkeypatch.setattr("app.services.gemini_service.MAX_IMAGE_BYTES", 1024)
+    requested = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested.append(request.url.host)
+        if request.url.path == "/moved.jpg":
+            return httpx.Response(301, headers={"location": "http://169.254.169.254/"})
+        return httpx.Response(200, content=b"\xff" * 4096)
+
+    service = GeminiService(
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        allowed_hosts={"cdn.example.com"},
+    )
+    with pytest.raises(FetchRefused, match=error):
+        asyncio.run(service.get_guidance(url, "kitchen", []))
+    assert "169.254.169.254" not in requested
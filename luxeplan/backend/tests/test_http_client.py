@@ -0,0 +1,164 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.http_client import (
+    FetchRefused,
+    HttpClientPool,
+    InstrumentedTransport,
+    fetch_limited,
+)
+
+HOSTS = frozenset({"cdn.example.com"})
+
+
+def test_pool_reuses_one_client_until_closed():
+    pool = HttpClientPool(http2=False)
+
+    async def main():
+        client = await pool.open()
+        assert pool.client is client
+        assert pool.stats()["open"]
+
+        await pool.close()
+        assert client.is_closed
+        assert not pool.stats()["open"]
+
+        # Outside the lifespan (scripts, benchmarks) a new one opens on use.
+        reopened = pool.client
+        assert reopened is not client and not reopened.is_closed
+        await pool.close()
+
+    asyncio.run(main())
+
+
+def instrumented(handler, max_per_host=1):
+    stats = {}
+    transport = InstrumentedTransport(httpx.MockTransport(handler), max_per_host, stats)
+    return httpx.AsyncClient(transport=transport), stats
+
+
+def test_transport_counts_requests_connections_and_errors():
+    calls = 0
+
+    async def handler(request):
+        nonlocal calls
+        calls += 1
+        if request.url.path == "/down":
+            raise httpx.ConnectError("refused", request=request)
+        if calls == 1:  # only the first request opens a connection
+            await request.extensions["trace"]("connection.connect_tcp.complete", {})
+        return httpx.Response(200, content=b"ok")
+
+    async def main():
+        client, stats = instrumented(handler)
+        async with client:
+            for _ in range(3):
+                assert (await client.get("https://api.example.com/v1")).content == b"ok"
+            with pytest.raises(httpx.ConnectError):
+                await client.get("https://api.example.com/down")
+            await client.get("http://other.example.com/")
+        return stats
+
+    stats = asyncio.run(main())
+    api = stats["api.example.com:443"].snapshot()
+    assert (api["requests"], api["new_connections"], api["errors"]) == (3, 1, 1)
+    assert api["reuse_rate"] == pytest.approx(2 / 3, abs=1e-4)
+    assert sum(api["latency_histogram"].values()) == 3
+    assert stats["other.example.com:80"].requests == 1
+
+
+def test_host_slot_is_held_until_the_body_is_closed():
+    async def handler(request):
+        return httpx.Response(200, content=b"x" * 1024)
+
+    async def main():
+        client, _ = instrumented(handler, max_per_host=1)
+        async with client:
+            async with client.stream("GET", "https://api.example.com/a") as first:
+                # The only slot is taken while the first body is open.
+                second = asyncio.create_task(client.get("https://api.example.com/b"))
+                await asyncio.sleep(0.05)
+                assert not second.done()
+                await first.aread()
+            # Closing the first response frees it.
+            response = await asyncio.wait_for(second, timeout=1)
+            assert response.status_code == 200
+
+    asyncio.run(main())
+
+
+def test_error_releases_the_host_slot():
+    async def handler(request):
+        if request.url.path == "/down":
+            raise httpx.ReadTimeout("slow", request=request)
+        return httpx.Response(204)
+
+    async def main():
+        client, _ = instrumented(handler, max_per_host=1)
+        async with client:
+            with pytest.raises(httpx.ReadTimeout):
+                await client.get("https://api.example.com/down")
+            response = await asyncio.wait_for(client.get("https://api.example.com/ok"), timeout=1)
+            assert response.status_code == 204
+
+    asyncio.run(main())
+
+
+def fetch(handler, url, max_bytes=1024):
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await fetch_limited(client, url, HOSTS, max_bytes)
+
+    return asyncio.run(main())
+
+
+def test_fetch_limited_returns_body_and_type():
+    def handler(request):
+        return httpx.Response(200, content=b"jpeg", headers={"content-type": "image/jpeg"})
+
+    assert fetch(handler, "https://cdn.example.com/a.jpg") == (b"jpeg", "image/jpeg")
+
+
+@pytest.mark.parametrize("url", [
+    "http://169.254.169.254/latest/meta-data/",
+    "file:///etc/passwd",
+    "https://cdn.example.com.evil.test/a.jpg",
+])
+def test_fetch_limited_refuses_hosts_off_the_allow_list(url):
+    def handler(request):
+        raise AssertionError("no request should be made")
+
+    with pytest.raises(FetchRefused, match="allowed host"):
+        fetch(handler, url)
+
+
+def test_fetch_limited_refuses_redirects_and_oversized_bodies():
+    def redirect(request):
+        return httpx.Response(302, headers={"location": "http://127.0.0.1/"})
+
+    with pytest.raises(FetchRefused, match="Redirects"):
+        fetch(redirect, "https://cdn.example.com/a.jpg")
+
+    def declared(request):
+        return httpx.Response(200, headers={"content-length": "4096"}, content=b"x" * 4096)
+
+    with pytest.raises(FetchRefused, match="over 1024"):
+        fetch(declared, "https://cdn.example.com/a.jpg")
+
+    async def chunks():
+        for _ in range(8):
+            yield b"x" * 512
+
+    def streamed(request):
+        return httpx.Response(200, content=chunks())
+
+    with pytest.raises(FetchRefused, match="over 1024"):
+        fetch(streamed, "https://cdn.example.com/a.jpg")
+
+    def missing(request):
+        return httpx.Response(404)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        fetch(missing, "https://cdn.example.com/a.jpg")
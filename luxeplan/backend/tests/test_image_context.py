@@ -0,0 +1,70 @@
+import io
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.services.image_context import ImageContext
+
+
+def encode(image: Image.Image, format: str) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format, quality=95)
+    return buffer.getvalue()
+
+
+def photo(width: int, height: int) -> Image.Image:
+    y, x = np.mgrid[0:height, 0:width]
+    pixels = np.stack([x * 255 // max(width, 1), y * 255 // max(height, 1), (x + y) % 256], -1)
+    return Image.fromarray(pixels.astype(np.uint8), "RGB")
+
+
+@pytest.mark.parametrize("format", ["JPEG", "PNG"])
+def test_pyramid_levels_round_sides_up_and_match_the_full_decode(format):
+    data = encode(photo(1001, 603), format)
+    ctx = ImageContext(data)
+    levels = {level: ctx.pyramid(level) for level in (3, 1, 4)}
+
+    for level, image in levels.items():
+        factor = 2**level
+        assert image.size == (-(-1001 // factor), -(-603 // factor))
+    if format == "JPEG":
+        assert "image" not in ctx._views  # drafts never decode at full size
+
+    reference = ImageContext(data).rgb.reduce(8)
+    difference = np.abs(np.asarray(levels[3], np.int16) - np.asarray(reference, np.int16))
+    assert difference.mean() < 4
+
+
+@pytest.mark.parametrize("size", [(5000, 5), (3, 3000), (1, 1)])
+def test_thin_jpegs_decode_at_every_level(size):
+    data = encode(photo(*size), "JPEG")
+    for level in range(1, 5):
+        factor = 2**level
+        # A fresh context each time, so every level is drafted from the file.
+        image = ImageContext(data).pyramid(level)
+        assert image.size == tuple(-(-side // factor) for side in size)
+    scaled = ImageContext(data).for_inference(max_side=1024)
+    assert max(scaled.image.size) <= 1024
+    assert scaled.to_original(*scaled.image.size) == pytest.approx(size)
+
+
+def test_array_views_share_one_decode():
+    ctx = ImageContext(encode(photo(64, 32).convert("RGBA"), "PNG"))
+    assert np.shares_memory(ctx.rgb_array, ctx.array)
+    assert ctx.alpha_array.shape == (32, 64)
+
+    opaque = ImageContext(encode(photo(64, 32), "PNG"))
+    assert opaque.alpha_array.strides == (0, 0) and (opaque.alpha_array == 255).all()
+
+
+def test_analyze_accepts_a_thin_jpeg():
+    from app.main import app
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/api/vision/analyze",
+            files={"file": ("thin.jpg", encode(photo(5000, 5), "JPEG"), "image/jpeg")},
+        )
+    assert response.status_code == 200, response.text
@@ -0,0 +1,78 @@
+import asyncio
+import time
+
+from app.services.ingestion import NormalizedProduct, ProductIngestionService
+
+
+def product(source: str, i: int) -> NormalizedProduct:
+    return NormalizedProduct(f"{source}-{i}", source, "Faucet", "Brand", "faucet", 199.0, "", "")
+
+
+def make_service(monkeypatch, prep_s: float = 0.0) -> ProductIngestionService:
+    monkeypatch.setenv("LUXEPLAN_INGEST_HOMEDEPOT_TIMEOUT_S", "0.2")
+    service = ProductIngestionService()
+
+    async def serp(query, limit=20):
+        await asyncio.sleep(0.01)
+        return [product("serp", i) for i in range(2)]
+
+    async def homedepot(query, limit=20):
+        await asyncio.sleep(5)
+        return []
+
+    async def pinterest(query, limit=20):
+        raise RuntimeError("api key revoked")
+
+    async def prepare_assets(products):
+        await asyncio.sleep(prep_s)
+        for p in products:
+            p.is_insertion_ready = True
+
+    service.adapters["serp"].search = serp
+    service.adapters["homedepot"].search = homedepot
+    service.adapters["pinterest"].search = pinterest
+    service.prepare_assets = prepare_assets
+    return service
+
+
+def collect(service, **kwargs):
+    async def run():
+        started = time.perf_counter()
+        return [
+            (time.perf_counter() - started, result)
+            async for result in service.stream_all_sources("faucet", **kwargs)
+        ]
+
+    return asyncio.run(run())
+
+
+def test_each_source_reports_its_own_outcome(monkeypatch):
+    events = collect(make_service(monkeypatch))
+    outcomes = [(r.source, r.status, r.assets_ready) for _, r in events]
+
+    assert outcomes == [
+        ("pinterest", "error", True),
+        ("serp", "ok", False),
+        ("serp", "ok", True),
+        ("homedepot", "timeout", True),
+    ]
+    assert "api key revoked" in events[0][1].error
+    assert all(p.is_insertion_ready for p in events[2][1].products)
+
+
+def test_slow_asset_prep_neither_delays_results_nor_times_out(monkeypatch):
+    # Prep takes longer than serp's search timeout; the search still counts as ok.
+    monkeypatch.setenv("LUXEPLAN_INGEST_SERP_TIMEOUT_S", "0.2")
+    events = collect(make_service(monkeypatch, prep_s=0.4), sources=["serp"])
+
+    (searched_at, searched), (prepared_at, prepared) = events
+    assert searched.status == "ok" and not searched.assets_ready
+    assert searched_at < 0.2
+    assert prepared.status == "ok" and prepared.assets_ready
+    assert prepared_at >= 0.4
+
+
+def test_ingest_all_sources_returns_each_product_once(monkeypatch):
+    products = asyncio.run(make_service(monkeypatch).ingest_all_sources("faucet"))
+    assert [p.source_id for p in products] == ["serp-0", "serp-1"]
+    assert all(p.is_insertion_ready for p in products)
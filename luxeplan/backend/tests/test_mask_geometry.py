@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from app.services import mask_rle
+from app.services.mask_geometry import extract_regions
+from app.services.segmentation import ROOM_SEGMENTS, _stub_label_map
+
+UNLABELED = 255
+
+
+def test_area_is_pixel_count_and_holes_are_traced():
+    label_map = np.full((60, 80), UNLABELED, np.uint8)
+    label_map[10:50, 10:70] = 0
+    label_map[20:40, 30:50] = 1  # a hole in label 0
+
+    regions = extract_regions(label_map, 2)
+    outer, inner = regions[0], regions[1]
+    assert outer.area == outer.pixel_count == 40 * 60 - 20 * 20
+    assert inner.area == inner.pixel_count == 20 * 20
+    assert len(outer.polygons) == 1 and len(outer.holes) == 1
+    assert outer.bounds == (10, 10, 60, 40)
+    assert mask_rle.area(outer.rle_counts) == outer.pixel_count
+
+
+def test_speckle_is_dropped_but_region_kept():
+    label_map = np.zeros((40, 40), np.uint8)
+    label_map[5, 5] = 1  # lone pixel next to a large region of the same label
+    label_map[20:35, 20:35] = 1
+
+    region = extract_regions(label_map, 2, min_area=16)[1]
+    assert len(region.polygons) == 1
+    assert region.bounds == (20, 20, 15, 15)
+    assert region.area == 15 * 15 + 1
+
+
+@pytest.mark.parametrize("width, height", [(8, 8), (3000, 7)])
+def test_tiny_and_thin_uploads_keep_every_class(width, height):
+    label_map = _stub_label_map(width, height)
+    present = set(np.unique(label_map[label_map != UNLABELED]).tolist())
+
+    regions = extract_regions(label_map, len(ROOM_SEGMENTS))
+    assert set(regions) == present
+    for label, region in regions.items():
+        assert region.area == np.count_nonzero(label_map == label)
+        assert region.polygons and region.largest_polygon.shape[1] == 2
+        x, y, w, h = region.bounds
+        assert w > 0 and h > 0
+        assert x + w <= width and y + h <= height
+
+
+def test_fallback_polygon_is_the_pixel_bounding_box():
+    label_map = np.full((7, 300), UNLABELED, np.uint8)
+    label_map[3, 20:280] = 0  # one pixel thick: every contour has zero area
+
+    region = extract_regions(label_map, 1)[0]
+    np.testing.assert_array_equal(
+        region.polygons[0], [[20, 3], [280, 3], [280, 4], [20, 4]]
+    )
+    assert region.bounds == (20, 3, 260, 1)
+    assert region.area == 260
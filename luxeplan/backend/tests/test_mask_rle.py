@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from app.services import mask_rle
+
+
+def random_masks(seed: int = 0, count: int = 20):
+    rng = np.random.default_rng(seed)
+    for _ in range(count):
+        height, width = rng.integers(1, 40, 2)
+        # Blocky masks give long runs; noisy ones give many short runs.
+        block = rng.random((height // 4 + 1, width // 4 + 1)) < 0.5
+        blocky = np.kron(block, np.ones((4, 4), bool))[:height, :width]
+        yield blocky ^ (rng.random((height, width)) < 0.05)
+    yield np.zeros((5, 7), bool)
+    yield np.ones((5, 7), bool)
+
+
+@pytest.mark.parametrize("mask", list(random_masks()))
+def test_round_trips_through_counts_and_string(mask):
+    counts = mask_rle.encode(mask)
+    assert counts.sum() == mask.size
+    np.testing.assert_array_equal(mask_rle.decode(counts, mask.shape), mask)
+
+    packed = mask_rle.pack(counts, mask.shape)
+    restored, size = mask_rle.unpack(packed)
+    assert size == mask.shape
+    np.testing.assert_array_equal(restored, counts)
+
+
+def test_string_matches_coco_encoding():
+    # Column-major runs 0x1, 1x2, 0x1, 1x2 -> counts [1, 2, 1, 2]; COCO stores
+    # the fourth count on as a delta to counts[i - 2], so the last is 0.
+    mask = np.array([[0, 0], [1, 1], [1, 1]], bool)
+    counts = mask_rle.encode(mask)
+    assert counts.tolist() == [1, 2, 1, 2]
+    assert mask_rle.counts_to_string(counts) == "1210"
+    # Large and negative deltas take several 5-bit groups.
+    counts = np.array([0, 100000, 3, 7, 250000, 1], np.int64)
+    np.testing.assert_array_equal(
+        mask_rle.string_to_counts(mask_rle.counts_to_string(counts)), counts
+    )
+
+
+def test_run_operations_match_rasters():
+    rng = np.random.default_rng(2)
+    a = rng.random((37, 23)) < 0.3
+    b = np.zeros_like(a)
+    b[10:20, 5:15] = True
+    for mask in (a, b):
+        counts = mask_rle.encode(mask)
+        assert mask_rle.area(counts) == mask.sum()
+        ys, xs = np.nonzero(mask)
+        assert mask_rle.bounds(counts, mask.shape) == (
+            xs.min(), ys.min(), xs.max() - xs.min() + 1, ys.max() - ys.min() + 1
+        )
+    ca, cb = mask_rle.encode(a), mask_rle.encode(b)
+    np.testing.assert_array_equal(mask_rle.decode(mask_rle.union(ca, cb), a.shape), a | b)
+    np.testing.assert_array_equal(
+        mask_rle.decode(mask_rle.intersection(ca, cb), a.shape), a & b
+    )
+    assert mask_rle.bounds(mask_rle.encode(np.zeros((4, 4), bool)), (4, 4)) == (0, 0, 0, 0)
+
+
+def test_label_map_counts_match_per_label_encoding():
+    rng = np.random.default_rng(3)
+    label_map = rng.integers(0, 4, (30, 20)).astype(np.uint8)
+    label_map[:5] = 255  # unlabeled
+    counts = mask_rle.label_map_counts(label_map, num_labels=4)
+    assert sorted(counts) == [0, 1, 2, 3]
+    for label, runs in counts.items():
+        np.testing.assert_array_equal(
+            mask_rle.decode(runs, label_map.shape), label_map == label
+        )
@@ -0,0 +1,47 @@
+import numpy as np
+
+from app.services import mask_rle
+from app.services.occlusion import occlusion_mask
+
+SIZE = 256
+
+
+def receding_plane(near: float = 1.5, far: float = 6.0) -> np.ndarray:
+    """A ceiling that recedes towards the top of the image (inverse depth affine in y)."""
+    rows = np.arange(SIZE, dtype=np.float64)[:, None]
+    inverse = 1 / far + (1 / near - 1 / far) * rows / (SIZE - 1)
+    return np.broadcast_to(1 / inverse, (SIZE, SIZE)).astype(np.float32)
+
+
+def decode(result, box):
+    counts, bounds = result
+    x0, y0, x1, y1 = box
+    assert bounds == {"x": x0, "y": y0, "width": x1 - x0, "height": y1 - y0}
+    return mask_rle.decode(mask_rle.string_to_counts(counts), (y1 - y0, x1 - x0))
+
+
+def test_receding_mounting_surface_does_not_occlude_itself():
+    depth = receding_plane()
+    box = (60, 40, 200, 184)
+    assert occlusion_mask(depth, box, (SIZE, SIZE), "ceiling") is None
+    assert occlusion_mask(depth.T.copy(), box, (SIZE, SIZE), "wall") is None
+
+
+def test_nearer_object_on_a_receding_surface_occludes():
+    depth = receding_plane().copy()
+    depth[120:184, 60:110] = 1.0  # e.g. a pendant in front of the ceiling
+    box = (60, 40, 200, 184)
+    mask = decode(occlusion_mask(depth, box, (SIZE, SIZE), "ceiling"), box)
+
+    expected = np.zeros_like(mask)
+    expected[120 - 40 : 184 - 40, 0:50] = 1
+    assert np.array_equal(mask, expected)
+
+
+def test_standing_asset_uses_its_contact_depth():
+    depth = np.repeat(np.linspace(6.0, 3.0, SIZE, dtype=np.float32)[:, None], SIZE, axis=1)
+    depth[100:140, 100:130] = 2.0  # chair in front
+    box = (90, 80, 170, 160)
+    mask = decode(occlusion_mask(depth, box, (SIZE, SIZE), "floor"), box)
+    assert mask[100 - 80 : 140 - 80, 100 - 90 : 130 - 90].all()
+    assert mask.sum() == 40 * 30
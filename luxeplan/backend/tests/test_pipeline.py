@@ -0,0 +1,126 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services.pipeline import Stage, StageGraph
+
+
+@pytest.fixture
+def pool():
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        yield executor
+
+
+def test_stage_receives_dep_outputs_after_they_finish(pool):
+    order = []
+
+    def record(name, value):
+        def fn(**kwargs):
+            order.append(name)
+            return value(**kwargs)
+        return fn
+
+    graph = StageGraph([
+        Stage("total", record("total", lambda a, b: a + b), deps=("a", "b")),
+        Stage("a", record("a", lambda: 2)),
+        Stage("b", record("b", lambda a: a * 10), deps=("a",)),
+    ], executor=pool)
+
+    run = asyncio.run(graph.run())
+    assert run.outputs == {"a": 2, "b": 20, "total": 22}
+    assert order == ["a", "b", "total"]
+    assert set(run.timings) == {"a", "b", "total"}
+    assert run.server_timing().endswith(f"total;dur={run.total_ms:.1f}")
+
+
+def test_independent_stages_run_concurrently(pool):
+    # Each side waits for the other at the barrier; run one after the other,
+    # the first would time out.
+    barrier = threading.Barrier(2, timeout=5)
+
+    def meet(name):
+        def fn():
+            barrier.wait()
+            return name
+        return fn
+
+    graph = StageGraph([
+        Stage("segment", meet("segment")),
+        Stage("depth", meet("depth")),
+        Stage("both", lambda segment, depth: (segment, depth), deps=("segment", "depth")),
+    ], executor=pool)
+
+    run = asyncio.run(graph.run(["both"]))
+    assert run.outputs["both"] == ("segment", "depth")
+
+
+def test_seeded_stages_and_their_deps_are_skipped(pool):
+    calls = []
+
+    def stage(name, deps=()):
+        def fn(**kwargs):
+            calls.append(name)
+            return name
+        return Stage(name, fn, deps=deps)
+
+    graph = StageGraph([
+        stage("decode"),
+        stage("depth", ("decode",)),
+        stage("planes", ("depth",)),
+        stage("segment", ("decode",)),
+    ], executor=pool)
+
+    run = asyncio.run(graph.run(["planes"], seed={"depth": "cached"}))
+    assert calls == ["planes"]
+    assert run.outputs == {"depth": "cached", "planes": "planes"}
+    assert "depth" not in run.timings
+
+
+def test_targets_limit_what_runs(pool):
+    calls = []
+    graph = StageGraph([
+        Stage("a", lambda: calls.append("a")),
+        Stage("b", lambda: calls.append("b")),
+    ], executor=pool)
+
+    asyncio.run(graph.run(["a"]))
+    assert calls == ["a"]
+
+
+def test_failing_stage_propagates_and_cancels_the_rest(pool):
+    state = {}
+
+    def broken():
+        raise RuntimeError("segmentation failed")
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+
+    def downstream(segment):
+        state["downstream"] = True
+
+    graph = StageGraph([
+        Stage("segment", broken),
+        Stage("fetch", slow, inline=True),
+        Stage("place", downstream, deps=("segment",)),
+    ], executor=pool)
+
+    with pytest.raises(RuntimeError, match="segmentation failed"):
+        asyncio.run(asyncio.wait_for(graph.run(), timeout=5))
+    assert state == {"cancelled": True}
+
+
+def test_unknown_dep_and_cycles_are_rejected():
+    with pytest.raises(ValueError, match="unknown stage"):
+        StageGraph([Stage("a", lambda missing: None, deps=("missing",))])
+    with pytest.raises(ValueError, match="Cycle"):
+        StageGraph([
+            Stage("a", lambda b: None, deps=("b",)),
+            Stage("b", lambda a: None, deps=("a",)),
+        ])
@@ -0,0 +1,79 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models import AnchorPoint
+from app.services.placement_engine import AnchorIndex, FaucetPolicy, MirrorPolicy
+
+
+def anchor(
+    id: str, label: str, confidence: float, x: float = 100.0, plane: str = "countertop"
+) -> AnchorPoint:
+    return AnchorPoint(
+        id=id, label=label, x=x, y=200.0, width=80.0, height=40.0,
+        confidence=confidence, plane=plane,
+    )
+
+
+def test_index_keeps_the_most_confident_anchor_per_label():
+    index = AnchorIndex.from_anchors([
+        anchor("a", "sink", 0.7),
+        anchor("b", "sink", 0.9, x=300.0),
+        anchor("c", "sink", 0.9, x=500.0),
+    ])
+    assert index.best("sink").id == "b"
+    assert index.best("mirror") is None
+
+
+def test_index_keeps_the_most_confident_anchor_per_plane():
+    index = AnchorIndex.from_anchors([
+        anchor("a", "sink", 0.7),
+        anchor("b", "vanity", 0.8, plane="floor"),
+        anchor("c", "cooktop", 0.9),
+    ])
+    assert index.best_on_plane("countertop").id == "c"
+    assert index.best_on_plane("floor").id == "b"
+    assert index.best_on_plane("ceiling") is None
+
+
+def test_policy_falls_back_to_an_anchor_on_its_plane():
+    index = AnchorIndex.from_anchors([
+        anchor("a", "shower_head", 0.8, x=250.0, plane="wall"),
+        anchor("b", "sink", 0.95, x=600.0),
+    ])
+    # No mirror anchor: the mirror goes to the best wall anchor, not the sink.
+    result = MirrorPolicy().compute(index, 160, 80, 800, 600)
+    assert (result.x, result.y, result.scale) == (250.0, 200.0, 0.5)
+    # An explicit target that isn't in the scene falls back the same way.
+    result = MirrorPolicy().compute(index, 160, 80, 800, 600, target_anchor_label="medicine_cabinet")
+    assert result.x == 250.0
+
+
+def test_policy_falls_back_to_image_center_without_its_anchor_or_plane():
+    index = AnchorIndex.from_anchors([anchor("a", "mirror", 0.9, plane="wall")])
+    result = FaucetPolicy().compute(index, 100, 100, 800, 600)
+    assert (result.x, result.y) == (400, 300)
+
+
+def batch_request(**item):
+    return {
+        "anchors": [anchor("a", "sink", 0.9).model_dump()],
+        "depth_map_url": "",
+        "image_width": 800,
+        "image_height": 600,
+        "items": [
+            {"category": "faucets", "asset_width": 100, "asset_height": 100},
+            {"category": "sinks", "asset_width": 100, "asset_height": 100, **item},
+        ],
+    }
+
+
+def test_batch_rejects_non_positive_asset_sizes():
+    client = TestClient(app)
+    assert client.post("/api/placement/compute-batch", json=batch_request()).status_code == 200
+
+    response = client.post("/api/placement/compute-batch", json=batch_request(asset_width=0))
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "items", 1, "asset_width"]
+
+    single = {**batch_request(), **batch_request()["items"][0], "asset_height": -5}
+    assert client.post("/api/placement/compute", json=single).status_code == 422
@@ -0,0 +1,130 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.models import SegmentationMask
+from app.services import mask_rle, plane_fitting
+from app.services.image_context import ScaledImage
+from app.services.plane_fitting import fit_plane, focal_length_px, infer_planes, sample_mask
+
+WIDTH, HEIGHT = 128, 96
+CAMERA_HEIGHT_M = 1.5
+
+
+def plane_points(rng, count, outlier_ratio):
+    """Points on the floor y = -1.5 (n = (0, 1, 0), d = 1.5) plus outliers."""
+    xs = rng.uniform(-2, 2, count)
+    zs = rng.uniform(1, 6, count)
+    points = np.stack([xs, np.full(count, -CAMERA_HEIGHT_M), zs], axis=1)
+    points += rng.normal(0, 0.005, points.shape)
+    outliers = rng.random(count) < outlier_ratio
+    points[outliers] = rng.uniform([-2, -1.5, 1], [2, 1.5, 6], (outliers.sum(), 3))
+    return points, outliers
+
+
+def test_fit_plane_recovers_plane_despite_outliers():
+    rng = np.random.default_rng(0)
+    points, outliers = plane_points(rng, 2000, outlier_ratio=0.4)
+
+    fit = fit_plane(points, rng)
+    assert fit is not None
+    np.testing.assert_allclose(fit.normal, [0, 1, 0], atol=0.01)
+    assert fit.distance == pytest.approx(CAMERA_HEIGHT_M, abs=0.01)
+    # Nearly every true inlier is kept and few outliers sneak in.
+    assert fit.inliers[~outliers].mean() > 0.95
+    assert fit.inliers[outliers].mean() < 0.05
+
+
+def test_fit_plane_rejects_noise_and_too_few_points():
+    rng = np.random.default_rng(1)
+    assert fit_plane(rng.uniform(-2, 2, (500, 3)), rng) is None
+    points, _ = plane_points(rng, plane_fitting.MIN_POINTS - 1, outlier_ratio=0)
+    assert fit_plane(points, rng) is None
+
+
+class CountingRng:
+    """Records every hypothesis draw made through it."""
+
+    def __init__(self, seed=0):
+        self.rng = np.random.default_rng(seed)
+        self.sizes = []
+
+    def integers(self, *args, size=None, **kwargs):
+        self.sizes.append(size)
+        return self.rng.integers(*args, size=size, **kwargs)
+
+
+def test_fit_plane_draws_exactly_the_iteration_budget():
+    points, _ = plane_points(np.random.default_rng(2), 1000, outlier_ratio=0.2)
+    rng = CountingRng()
+    assert fit_plane(points, rng, iterations=17) is not None
+    assert rng.sizes == [(17, 3)]
+
+
+def test_sample_mask_draws_distinct_pixels_from_the_mask():
+    mask = np.zeros((40, 30), bool)
+    mask[5:20, 3:9] = True
+    mask[30:35, 20:28] = True
+    counts = mask_rle.encode(mask)
+
+    xs, ys = sample_mask(counts, mask.shape, 50, np.random.default_rng(3))
+    assert len(xs) == 50
+    assert mask[ys, xs].all()
+    assert len(set(zip(xs.tolist(), ys.tolist()))) == 50
+
+    xs, ys = sample_mask(counts, mask.shape, 10_000, np.random.default_rng(3))
+    assert len(xs) == mask.sum()
+
+
+def floor_scene():
+    """Metric depth of a floor seen from 1.5 m, and its segment mask."""
+    focal = focal_length_px(WIDTH)
+    rows = np.arange(HEIGHT, dtype=np.float64)[:, None].repeat(WIDTH, 1)
+    below_horizon = HEIGHT / 2 - rows - 0.5
+    floor = rows >= 60
+    depth = np.full((HEIGHT, WIDTH), np.nan)
+    depth[floor] = CAMERA_HEIGHT_M * focal / -below_horizon[floor]
+    return depth.astype(np.float32), floor
+
+
+def test_infer_planes_fits_the_floor_within_the_point_budget(monkeypatch):
+    depth, floor = floor_scene()
+    # A quarter of the floor reads as clutter at random depths.
+    rng = np.random.default_rng(4)
+    clutter = floor & (rng.random(floor.shape) < 0.25)
+    depth[clutter] = rng.uniform(0.5, 4.0, clutter.sum())
+
+    image = ScaledImage(Image.new("RGB", (WIDTH, HEIGHT)), original_size=(WIDTH * 2, HEIGHT * 2))
+    wall = ~floor
+    segments = [
+        SegmentationMask(
+            label=label,
+            mask_url="",
+            polygon=[],
+            area=float(mask.sum()),
+            rle=mask_rle.pack(mask_rle.encode(mask), mask.shape),
+        )
+        for label, mask in (("floor", floor), ("wall", wall), ("chair", floor))
+    ]
+
+    fitted_sizes = []
+    original_fit = plane_fitting.fit_plane
+
+    def recording_fit(points, rng):
+        fitted_sizes.append(len(points))
+        return original_fit(points, rng)
+
+    monkeypatch.setattr(plane_fitting, "POINT_BUDGET", 600)
+    monkeypatch.setattr(plane_fitting, "fit_plane", recording_fit)
+    planes = infer_planes(segments, depth, image)
+
+    # The wall has no valid depth and "chair" isn't planar; only the floor fits.
+    assert [p.label for p in planes] == ["floor"]
+    # Points are split between the two planar segments.
+    assert max(fitted_sizes) <= 600 // 2
+
+    (plane,) = planes
+    np.testing.assert_allclose(plane.normal, [0, 1, 0], atol=0.02)
+    assert plane.distance == pytest.approx(CAMERA_HEIGHT_M, abs=0.02)
+    assert 0.6 < plane.inlier_ratio < 0.9
+    assert plane.bounds["y"] >= 60 * 2 and plane.bounds["width"] <= WIDTH * 2
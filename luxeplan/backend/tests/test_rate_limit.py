@@ -0,0 +1,77 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.services.rate_limit import (
+    FileBucketState,
+    LocalBucketState,
+    RateLimiter,
+    UpstreamLimit,
+    _pause,
+    _take,
+)
+
+
+def test_take_spends_burst_then_spaces_by_rate():
+    tokens, updated = 2.0, 0.0
+    waits = []
+    for _ in range(4):
+        tokens, updated, wait = _take(tokens, updated, rate=2.0, burst=2.0, now=0.0)
+        waits.append(wait)
+    assert waits == [0.0, 0.0, 0.5, 1.0]
+
+    # Refill is capped at the burst.
+    tokens, updated, wait = _take(0.0, 0.0, rate=2.0, burst=2.0, now=100.0)
+    assert (tokens, updated, wait) == (1.0, 100.0, 0.0)
+
+
+def test_pause_drains_and_defers_refill():
+    tokens, updated = _pause(5.0, 10.0, until=13.0)
+    assert (tokens, updated) == (0.0, 13.0)
+    # No refill before the pause ends; the first token is due one interval after it.
+    _, _, wait = _take(tokens, updated, rate=1.0, burst=5.0, now=11.0)
+    assert wait == pytest.approx(3.0)
+    # A shorter pause never shortens one already in place.
+    assert _pause(-1.0, 13.0, until=12.0) == (-1.0, 13.0)
+
+
+def test_file_state_is_shared_between_instances(tmp_path):
+    path = tmp_path / "gemini.bucket"
+    first, second = FileBucketState(path, burst=1.0), FileBucketState(path, burst=1.0)
+    assert first.take(rate=1.0, burst=1.0) == 0.0
+    assert second.take(rate=1.0, burst=1.0) > 0.5
+
+
+def test_shared_state_is_updated_off_the_event_loop(tmp_path):
+    state_threads = set()
+
+    class Recording(FileBucketState):
+        def take(self, rate, burst):
+            state_threads.add(threading.get_ident())
+            return super().take(rate, burst)
+
+    limit = UpstreamLimit(rate=100.0, burst=10.0, max_concurrency=4)
+    shared = RateLimiter("test", limit, Recording(tmp_path / "test.bucket", limit.burst))
+
+    async def ok():
+        return "ok"
+
+    async def main():
+        assert await shared.call(ok) == "ok"
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(main())
+    assert state_threads and loop_thread not in state_threads
+
+
+def test_local_state_stays_on_the_event_loop():
+    limit = UpstreamLimit(rate=100.0, burst=10.0, max_concurrency=4)
+    local = RateLimiter("test", limit, LocalBucketState(limit.burst))
+    assert not local.state.blocking
+
+    async def ok():
+        return "ok"
+
+    assert asyncio.run(local.call(ok)) == "ok"
+    assert local.stats()["calls"] == 1
@@ -0,0 +1,231 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models import ConceptRenderRequest, ConceptRenderResponse
+from app.services.render_jobs import QueueFull, RenderJob, RenderJobQueue, SupabaseJobBackend
+
+
+def request(change: str = "oak floor", **state) -> ConceptRenderRequest:
+    return ConceptRenderRequest(
+        original_image_url="https://example.com/room.jpg",
+        segmentation_masks=[{"label": "floor"}],
+        current_design_state=state or {"a": 1, "b": 2},
+        requested_change=change,
+    )
+
+
+def make_queue(**kwargs):
+    calls = []
+
+    async def render(req, progress):
+        calls.append(req.requested_change)
+        await progress(0.5, "Rendering")
+        await asyncio.sleep(0.01)
+        if req.requested_change == "boom":
+            raise RuntimeError("model down")
+        return ConceptRenderResponse(render_url="/r.jpg", changes_summary=[req.requested_change])
+
+    return RenderJobQueue(render, **kwargs), calls
+
+
+def test_identical_requests_share_one_job():
+    async def run():
+        queue, calls = make_queue()
+        first = await queue.submit(request(a=1, b=2))
+        # Same request, design-state keys in another order.
+        second = await queue.submit(request(b=2, a=1))
+        final = await queue.wait(first.job_id)
+        again = await queue.submit(request())
+        await queue.close()
+        return first, second, final, again, calls
+
+    first, second, final, again, calls = asyncio.run(run())
+    assert second.job_id == first.job_id
+    assert final.status == "completed" and final.result.changes_summary == ["oak floor"]
+    assert again.job_id == first.job_id and again.status == "completed"
+    assert calls == ["oak floor"]
+
+
+def test_failed_jobs_are_not_reused():
+    async def run():
+        queue, calls = make_queue()
+        failed = await queue.wait((await queue.submit(request("boom"))).job_id)
+        retry = await queue.submit(request("boom"))
+        await queue.wait(retry.job_id)
+        await queue.close()
+        return failed, retry, calls
+
+    failed, retry, calls = asyncio.run(run())
+    assert failed.status == "failed" and "model down" in failed.error
+    assert retry.job_id != failed.job_id
+    assert calls == ["boom", "boom"]
+
+
+def test_full_queue_rejects_new_renders():
+    async def run():
+        queue, _ = make_queue(concurrency=1, max_pending=1)
+        await queue.submit(request("a"))
+        await asyncio.sleep(0)  # the one worker takes "a"
+        await queue.submit(request("b"))
+        try:
+            with pytest.raises(QueueFull):
+                await queue.submit(request("c"))
+        finally:
+            await queue.close()
+
+    asyncio.run(run())
+
+
+class FakeTable:
+    """Just enough of the supabase-py query builder for job_queue."""
+
+    def __init__(self, rows: list[dict]):
+        self.rows = rows
+        self._op = None
+        self._filters = []
+        self._limit = None
+
+    def select(self, _columns):
+        self._op = ("select", None)
+        return self
+
+    def insert(self, row):
+        self._op = ("insert", row)
+        return self
+
+    def update(self, values):
+        self._op = ("update", values)
+        return self
+
+    def eq(self, column, value):
+        self._filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def neq(self, column, value):
+        self._filters.append(lambda row: row.get(column) != value)
+        return self
+
+    def in_(self, column, values):
+        self._filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def gte(self, column, value):
+        self._filters.append(lambda row: row.get(column) >= value)
+        return self
+
+    def or_(self, expression):
+        tests = []
+        for part in expression.split(","):
+            column, op, value = part.split(".", 2)
+            if op == "is":
+                tests.append(lambda row, c=column: row.get(c) is None)
+            else:
+                tests.append(lambda row, c=column, v=value: row.get(c) is not None and row[c] < v)
+        self._filters.append(lambda row: any(test(row) for test in tests))
+        return self
+
+    def order(self, column, desc=False):
+        self.rows.sort(key=lambda row: row[column], reverse=desc)
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def execute(self):
+        op, value = self._op
+        if op == "insert":
+            self.rows.append({"created_at": _ago(0), **value})
+            return _Result([value])
+        matched = [row for row in self.rows if all(f(row) for f in self._filters)]
+        if op == "update":
+            for row in matched:
+                row.update(value)
+        return _Result(matched[: self._limit])
+
+
+class _Result:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeSupabase:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def table(self, name):
+        assert name == "job_queue"
+        return FakeTable(self.rows)
+
+
+def _ago(seconds: float) -> str:
+    return (datetime.now(timezone.utc) - timedelta(seconds=seconds)).isoformat()
+
+
+def _row(job_id, status, locked_ago, key="k", created_ago=0.0):
+    return {
+        "id": job_id, "job_type": "CONCEPT_RENDER", "dedup_key": key, "status": status,
+        "progress": 0.0, "stage": None, "result": None, "error": None,
+        "locked_at": None if locked_ago is None else _ago(locked_ago),
+        "created_at": _ago(created_ago),
+    }
+
+
+def test_rows_left_by_a_stopped_worker_are_failed_and_not_reused():
+    rows = [
+        _row("dead", "pending", locked_ago=600, key="dead"),
+        _row("legacy", "running", locked_ago=None, key="legacy"),
+        _row("alive", "running", locked_ago=5, key="alive"),
+    ]
+    backend = SupabaseJobBackend(FakeSupabase(rows), stale_s=120)
+
+    async def run():
+        before = [await backend.find_reusable(k) for k in ("dead", "legacy", "alive")]
+        failed = await backend.fail_stale()
+        return before, failed
+
+    before, failed = asyncio.run(run())
+    assert [s and s.job_id for s in before] == [None, None, "alive"]
+    assert failed == 2
+    status = {row["id"]: row["status"] for row in rows}
+    assert status == {"dead": "failed", "legacy": "failed", "alive": "running"}
+
+
+def test_queue_sweeps_stale_rows_on_start():
+    rows = [_row("dead", "running", locked_ago=600)]
+
+    async def run():
+        queue = RenderJobQueue(None, SupabaseJobBackend(FakeSupabase(rows), stale_s=120))
+        await queue.start()
+        await asyncio.sleep(0.01)
+        await queue.close()
+
+    asyncio.run(run())
+    assert rows[0]["status"] == "failed" and rows[0]["error"]
+
+
+def test_waiting_gives_up_at_the_deadline():
+    async def slow(req, progress):
+        await asyncio.sleep(10)
+
+    async def run():
+        queue = RenderJobQueue(slow)
+        live = await queue.submit(request("slow"))
+        # A job this process isn't running is watched by polling.
+        orphan = RenderJob(request=request("orphan"), dedup_key="orphan")
+        await queue.backend.create(orphan)
+        started = time.monotonic()
+        results = (
+            await queue.wait(live.job_id, timeout_s=0.05),
+            await queue.wait(orphan.id, timeout_s=0.05),
+        )
+        elapsed = time.monotonic() - started
+        await queue.close()
+        return results, elapsed
+
+    (live, orphan), elapsed = asyncio.run(run())
+    assert live.status == "running" and orphan.status == "pending"
+    assert elapsed < 1.0
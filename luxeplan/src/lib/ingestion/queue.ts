@@ -6,6 +6,7 @@
 // ─────────────────────────────────────────────
 
 import { getServiceClient } from "@/lib/supabase-server";
+import { WORKER_JOB_TYPES } from "./types";
 import type { Job, JobType, JobStatus } from "./types";
 
 export async function enqueueJob(
@@ -37,11 +38,12 @@ export async function dequeueJob(): Promise<Job | null> {
   // We'll use a two-step approach that is safe enough for a single-worker scenario
   // and document the upgrade path for production.
 
-  // Step 1: Find the oldest pending job
+  // Step 1: Find the oldest pending job of a type this worker handles
   const { data: pending, error: findErr } = await db
     .from("job_queue")
     .select("*")
     .eq("status", "pending")
+    .in("job_type", WORKER_JOB_TYPES)
     .order("created_at", { ascending: true })
     .limit(1)
     .single();
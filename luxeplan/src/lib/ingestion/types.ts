@@ -84,6 +84,15 @@ export type JobType =
   | "REFRESH_PRICE"
   | "REFRESH_INVENTORY";
 
+// Job types this worker claims. job_queue also holds rows owned by other
+// services (CONCEPT_RENDER, run by the Python backend) that it must skip.
+export const WORKER_JOB_TYPES: JobType[] = [
+  "INGEST_SOURCE",
+  "PREP_ASSETS_FOR_PRODUCT",
+  "REFRESH_PRICE",
+  "REFRESH_INVENTORY",
+];
+
 export type JobStatus = "pending" | "running" | "completed" | "failed";
 
 export interface Job {
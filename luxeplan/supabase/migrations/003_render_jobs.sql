@@ -0,0 +1,26 @@
+-- ─────────────────────────────────────────────
+-- LUXEPLAN Concept Render Jobs
+-- Migration 003
+-- ─────────────────────────────────────────────
+
+-- ── Job Queue: concept renders ──
+-- Run in-process by the Python backend; the ingestion worker's dequeueJob
+-- filters on its own job types and never claims these rows.
+-- The owning process refreshes locked_at while a render is unfinished;
+-- rows it stops refreshing are failed by the backend's stale-job sweep.
+
+ALTER TABLE job_queue DROP CONSTRAINT job_queue_job_type_check;
+ALTER TABLE job_queue ADD CONSTRAINT job_queue_job_type_check CHECK (job_type IN (
+    'INGEST_SOURCE', 'PREP_ASSETS_FOR_PRODUCT', 'REFRESH_PRICE', 'REFRESH_INVENTORY',
+    'CONCEPT_RENDER'
+));
+
+ALTER TABLE job_queue
+    ADD COLUMN dedup_key TEXT,
+    ADD COLUMN progress REAL NOT NULL DEFAULT 0,
+    ADD COLUMN stage TEXT,
+    ADD COLUMN result JSONB;
+
+-- Newest reusable job for identical render requests
+CREATE INDEX idx_job_queue_dedup ON job_queue(dedup_key, created_at DESC)
+    WHERE dedup_key IS NOT NULL AND status <> 'failed';